@@ -1,9 +1,10 @@
 # api.py - VERSIÓN COMPLETA CON MULTIMEDIA
 from fastapi import FastAPI, HTTPException, UploadFile, File, Form
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
-from typing import List, Optional, Any, Dict
+from typing import List, Optional, Any, Dict, Sequence
 import os
 import csv
 import tempfile
@@ -101,7 +102,7 @@ class CreateMultimediaTableRequest(BaseModel):
     table_name: str
     csv_file_path: str
     media_type: str  # 'image' o 'audio'
-    feature_method: str  # 'sift', 'resnet50', 'inception_v3', 'mfcc', 'spectrogram', 'comprehensive'
+    feature_method: str  # 'sift', 'orb', 'resnet50', 'inception_v3', 'mfcc', 'spectrogram', 'comprehensive'
     n_clusters: int = 256
     path_column: Optional[str] = None  # Columna con rutas de archivos
     base_path: Optional[str] = ""  # Ruta base para archivos
@@ -125,7 +126,7 @@ class APIResponse(BaseModel):
 
 # ========== FUNCIÓN PARSE CSV (ACTUALIZADA PARA MULTIMEDIA) ==========
 
-def parse_csv_records(records: List[Any], headers: List[str]) -> Dict[str, Any]:
+def parse_csv_records(records: List[Any], headers: Sequence[str]) -> Dict[str, Any]:
     """
     Parsea registros en formato CSV, listas o tuplas 
     y los convierte al formato esperado por el frontend.
@@ -224,7 +225,7 @@ def parse_csv_records(records: List[Any], headers: List[str]) -> Dict[str, Any]:
                 r.append("")
         
         # Ajustar headers al mismo tamaño
-        adjusted_headers = headers.copy()
+        adjusted_headers = list(headers)
         while len(adjusted_headers) < max_cols:
             # CORREGIDO: Detectar si la última columna es un score de similitud
             if len(adjusted_headers) == max_cols - 1:
@@ -243,7 +244,7 @@ def parse_csv_records(records: List[Any], headers: List[str]) -> Dict[str, Any]:
         # Si hay más headers que columnas, truncar
         adjusted_headers = adjusted_headers[:max_cols]
     else:
-        adjusted_headers = headers
+        adjusted_headers = list(headers)
 
     print(f"DEBUG parse_csv_records:")
     print(f"   - Records originales: {len(records)}")
@@ -311,6 +312,8 @@ async def load_multimedia_from_pickles(request: LoadMultimediaFromPicklesRequest
         feature_method = 'sift'  # Por defecto
         if 'sift' in request.codebook_path.lower():
             feature_method = 'sift'
+        elif 'orb' in request.codebook_path.lower():
+            feature_method = 'orb'
         elif 'resnet' in request.codebook_path.lower():
             feature_method = 'resnet50'
         elif 'inception' in request.codebook_path.lower():
@@ -370,7 +373,7 @@ async def load_multimedia_from_pickles(request: LoadMultimediaFromPicklesRequest
             headers = ['filename', 'similarity_score']
         
         # Usar la instancia global del engine principal
-        engine.table_headers[request.table_name] = headers
+        engine.table_headers[request.table_name] = tuple(headers)
         
         print(f"Tabla multimedia '{request.table_name}' registrada en sql_parser.multimedia_engines")
         print(f"Tablas multimedia disponibles: {list(sql_parser.multimedia_engines.keys())}")
@@ -408,7 +411,7 @@ async def create_multimedia_table(request: CreateMultimediaTableRequest):
         if request.media_type not in valid_media_types:
             raise HTTPException(status_code=400, detail=f"Tipo de media inválido. Válidos: {valid_media_types}")
         
-        valid_image_methods = ['sift', 'resnet50', 'inception_v3']
+        valid_image_methods = ['sift', 'orb', 'resnet50', 'inception_v3']
         valid_audio_methods = ['mfcc', 'spectrogram', 'comprehensive']
         
         if request.media_type == 'image' and request.feature_method not in valid_image_methods:
@@ -491,7 +494,7 @@ WHERE similarity <-> "{request.query_file_path}" METHOD {request.method} LIMIT {
             
             # Convertir a formato CSV para el frontend
             if multimedia_results:
-                headers = engine.get_table_headers(request.table_name).copy()
+                headers = list(engine.get_table_headers(request.table_name))
                 if "similarity_score" not in headers:
                     headers.extend(["filename", "similarity_score"])
                 
@@ -778,7 +781,7 @@ async def load_pickle_table(request: LoadPickleTableRequest):
                 }
                 
                 # Registrar headers
-                engine.table_headers[request.table_name] = headers + ['similarity_score']
+                engine.table_headers[request.table_name] = tuple(headers) + ('similarity_score',)
                 
                 print(f"Tabla textual '{request.table_name}' registrada exitosamente")
                 print(f"  - Documentos: {len(doc_info)}")
@@ -1124,7 +1127,7 @@ WHERE {search_field} @@ '{request.query}' LIMIT {request.k};'''
         
         # Procesar resultados
         if isinstance(results, list):
-            headers = engine.get_table_headers(request.table_name).copy()
+            headers = list(engine.get_table_headers(request.table_name))
             if "similarity_score" not in headers:
                 headers.append("similarity_score")
             
@@ -1295,18 +1298,11 @@ async def scan_table(table_name: str):
                 detail=f"Tabla '{table_name}' es multimedia. Use /multimedia/search para búsquedas por similitud."
             )
 
-        result = engine.scan(table_name)
+        # Líneas CSV directamente del scan, sin unirlas en un solo string y volver a separarlas
+        records = list(engine.scan_iter(table_name))
         headers = engine.get_table_headers(table_name)
 
-        # Si result es lista de tuplas → R-Tree
-        if isinstance(result, list) and result and isinstance(result[0], tuple) and len(result[0]) == 2:
-            records = [row for _, row in result]  # Sacar solo el "objeto" o fila original
-        elif isinstance(result, str):
-            records = result.strip().split('\n')
-        else:
-            records = result  # fallback
-
-        parsed_data = parse_csv_records(records, headers.copy())
+        parsed_data = parse_csv_records(records, list(headers))
 
         return APIResponse(
             success=True,
@@ -1321,6 +1317,25 @@ async def scan_table(table_name: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/tables/{table_name}/export")
+async def export_table(table_name: str):
+    """Exportar una tabla tradicional como CSV en streaming (sin armar la respuesta completa en memoria)"""
+    if table_name not in engine.tables:
+        raise HTTPException(status_code=404, detail=f"Tabla '{table_name}' no encontrada")
+    
+    def generate():
+        headers = engine.get_table_headers(table_name)
+        if headers:
+            yield ','.join(headers) + '\n'
+        # Bloques de texto ya formateados: un envío por bloque en vez de uno por fila
+        yield from engine.scan_chunks(table_name)
+    
+    return StreamingResponse(
+        generate(),
+        media_type="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="{table_name}.csv"'}
+    )
+
 # En api.py, en el endpoint /sql/execute, reemplazar esta sección:
 
 @app.post("/sql/execute", response_model=APIResponse)
@@ -1458,7 +1473,7 @@ async def execute_sql(request: SQLQueryRequest):
                     fields_str = select_match.group(1).strip()
                     if fields_str == '*':
                         # Para SELECT *, usar headers originales + similarity_score
-                        headers = engine.get_table_headers(table_name).copy()
+                        headers = list(engine.get_table_headers(table_name))
                         headers.append("similarity_score")
                     else:
                         # Para campos específicos, usar exactamente los campos solicitados + similarity_score
@@ -1466,7 +1481,7 @@ async def execute_sql(request: SQLQueryRequest):
                         headers.append("similarity_score")
                 else:
                     # Fallback
-                    headers = engine.get_table_headers(table_name).copy()
+                    headers = list(engine.get_table_headers(table_name))
                     headers.append("similarity_score")
             else:
                 # Para consultas tradicionales, usar headers de la tabla
@@ -1611,7 +1626,7 @@ async def search_records(request: SearchRequest):
         headers = engine.get_table_headers(request.table_name)
         
         # Parsear resultados CSV
-        parsed_data = parse_csv_records(results, headers.copy())
+        parsed_data = parse_csv_records(results, list(headers))
         
         return APIResponse(
             success=True,
@@ -1650,7 +1665,7 @@ async def delete_records(request: DeleteRequest):
         headers = engine.get_table_headers(request.table_name)
         
         # Parsear resultados CSV
-        parsed_data = parse_csv_records(results, headers.copy())
+        parsed_data = parse_csv_records(results, list(headers))
         
         return APIResponse(
             success=True,
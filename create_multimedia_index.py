@@ -8,13 +8,44 @@ import sys
 import gc
 import pickle
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Tuple
 import pandas as pd
 
+def _dump_out_of_band(obj, path: str):
+    """
+    Serializa con pickle protocolo 5 dejando los buffers de NumPy fuera de banda
+    (PEP 574): el pickle solo guarda la estructura y los bytes crudos de cada
+    array van a un sidecar ``path + '.bin'`` sin copias intermedias.
+    """
+    buffers = []
+    with open(path, 'wb') as f:
+        pickle.dump(obj, f, protocol=5, buffer_callback=buffers.append)
+    with open(path + '.bin', 'wb') as f:
+        for buf in buffers:
+            raw = buf.raw()
+            f.write(raw.nbytes.to_bytes(8, 'little'))
+            f.write(raw)
+
+def _load_out_of_band(path: str):
+    """Carga un objeto guardado con ``_dump_out_of_band``"""
+    with open(path + '.bin', 'rb') as f:
+        data = memoryview(bytearray(f.read()))
+    buffers = []
+    pos = 0
+    while pos < len(data):
+        size = int.from_bytes(data[pos:pos + 8], 'little')
+        pos += 8
+        buffers.append(data[pos:pos + size])
+        pos += size
+    with open(path, 'rb') as f:
+        return pickle.load(f, buffers=buffers)
+
 def create_sift_multimedia_index(csv_path: str, image_column: str, table_name: str, 
-                                sample_size: int = None, batch_size: int = 100):
+                                sample_size: int = None, batch_size: int = 100,
+                                feature_method: str = 'sift'):
     """
-    Crea un índice multimedia completo con SIFT
+    Crea un índice multimedia completo con SIFT (u ORB)
     
     Args:
         csv_path: ruta del CSV
@@ -22,22 +53,33 @@ def create_sift_multimedia_index(csv_path: str, image_column: str, table_name: s
         table_name: nombre de la tabla
         sample_size: número de imágenes a procesar (None = todas)
         batch_size: tamaño del lote para procesamiento
+        feature_method: 'sift' (por defecto) u 'orb' (más rápido)
     """
+    method_label = feature_method.upper()
     print("=" * 80)
-    print("🎨 CREACIÓN DE ÍNDICE MULTIMEDIA CON SIFT")
+    print(f"🎨 CREACIÓN DE ÍNDICE MULTIMEDIA CON {method_label}")
     print("=" * 80)
     
     # Paso 1: Leer dataset y preparar rutas
     print("\n📊 Leyendo dataset...")
-    df = pd.read_csv(csv_path, encoding='latin1')
-    total_rows = len(df)
-    print(f"Total de registros: {total_rows}")
+    if sample_size:
+        # Con muestra: leer por bloques y detenerse apenas haya suficientes imágenes
+        chunks = pd.read_csv(csv_path, encoding='latin1', usecols=[image_column],
+                             chunksize=max(1000, sample_size * 2))
+    else:
+        df = pd.read_csv(csv_path, encoding='latin1')
+        print(f"Total de registros: {len(df)}")
+        chunks = [df]
     
     # Filtrar imágenes válidas
     valid_images = []
-    for idx, row in df.iterrows():
-        if pd.notna(row[image_column]) and os.path.exists(row[image_column]):
-            valid_images.append((idx, row[image_column]))
+    for chunk in chunks:
+        for idx, image_path in chunk[image_column].items():
+            if pd.notna(image_path) and os.path.exists(image_path):
+                valid_images.append((idx, image_path))
+            
+            if sample_size and len(valid_images) >= sample_size:
+                break
         
         if sample_size and len(valid_images) >= sample_size:
             break
@@ -55,18 +97,29 @@ def create_sift_multimedia_index(csv_path: str, image_column: str, table_name: s
     
     multimedia_engine = MultimediaEngine(
         media_type='image',
-        feature_method='sift',
+        feature_method=feature_method,
         n_clusters=256  # Puedes reducir esto para menos memoria
     )
     
     # Paso 3: Extraer características en lotes
-    print(f"\n🖼️  Extrayendo características SIFT de {actual_size} imágenes...")
+    print(f"\n🖼️  Extrayendo características {method_label} de {actual_size} imágenes...")
     print(f"Procesando en lotes de {batch_size} imágenes")
     
     all_features = []
     features_dir = "embeddings/temp_features"
     os.makedirs(features_dir, exist_ok=True)
     
+    # El guardado de cada lote (I/O) corre en un hilo mientras se extrae el siguiente (CPU).
+    # Solo se mantiene un guardado pendiente para no acumular lotes en memoria.
+    spill_executor = ThreadPoolExecutor(max_workers=1)
+    pending_spill = None
+    
+    def wait_spill(spill):
+        try:
+            spill.result()
+        except Exception as e:
+            print(f"❌ Error guardando lote: {e}")
+    
     for i in range(0, actual_size, batch_size):
         batch_end = min(i + batch_size, actual_size)
         batch_images = [path for _, path in valid_images[i:batch_end]]
@@ -77,10 +130,11 @@ def create_sift_multimedia_index(csv_path: str, image_column: str, table_name: s
             # Extraer características del lote
             batch_features = multimedia_engine.feature_extractor.extract_features_batch(batch_images)
             
-            # Guardar lote en archivo temporal
+            # Guardar lote en archivo temporal (en segundo plano)
             batch_file = f"{features_dir}/batch_{i//batch_size}.pkl"
-            with open(batch_file, 'wb') as f:
-                pickle.dump(batch_features, f)
+            if pending_spill is not None:
+                wait_spill(pending_spill)
+            pending_spill = spill_executor.submit(_dump_out_of_band, batch_features, batch_file)
             
             print(f"✅ Lote procesado: {len(batch_features)} características extraídas")
             
@@ -92,15 +146,18 @@ def create_sift_multimedia_index(csv_path: str, image_column: str, table_name: s
             print(f"❌ Error en lote: {e}")
             continue
     
+    if pending_spill is not None:
+        wait_spill(pending_spill)
+    spill_executor.shutdown(wait=True)
+    
     # Paso 4: Cargar todas las características y construir codebook
     print("\n📚 Construyendo codebook con todas las características...")
     
     all_features = []
     for file in os.listdir(features_dir):
         if file.endswith('.pkl'):
-            with open(f"{features_dir}/{file}", 'rb') as f:
-                batch_features = pickle.load(f)
-                all_features.extend(batch_features)
+            batch_features = _load_out_of_band(f"{features_dir}/{file}")
+            all_features.extend(batch_features)
     
     print(f"Total de características cargadas: {len(all_features)}")
     
@@ -111,7 +168,7 @@ def create_sift_multimedia_index(csv_path: str, image_column: str, table_name: s
     # Guardar todas las características
     features_path = f"embeddings/{table_name}_features.pkl"
     with open(features_path, 'wb') as f:
-        pickle.dump(all_features, f)
+        pickle.dump(all_features, f, protocol=5)
     
     multimedia_engine.features_data = all_features
     
@@ -173,7 +230,7 @@ def create_sift_multimedia_index(csv_path: str, image_column: str, table_name: s
     print(f"  - {table_name}_multimedia/ (sistema completo)")
     
     print("\n🔍 Ahora puedes hacer búsquedas similares con:")
-    print(f"  engine = MultimediaEngine('image', 'sift')")
+    print(f"  engine = MultimediaEngine('image', '{feature_method}')")
     print(f"  engine.load_complete_system('embeddings/{table_name}_multimedia')")
     print(f"  results = engine.search_similar('query_image.jpg', k=10)")
     
@@ -223,6 +280,10 @@ def main():
         sample_size = None
         print("✅ Procesando todas las imágenes")
     
+    # Método de extracción
+    method_input = input("\n🔍 Método de características (sift/orb, Enter = sift): ").strip().lower()
+    feature_method = method_input if method_input in ('sift', 'orb') else 'sift'
+    
     # Tamaño de lote
     batch_input = input("\n📦 Tamaño de lote (Enter = 100): ").strip()
     batch_size = int(batch_input) if batch_input else 100
@@ -234,6 +295,7 @@ def main():
     print(f"  Columna: {image_column}")
     print(f"  Tabla: {table_name}")
     print(f"  Imágenes a procesar: {sample_size if sample_size else 'Todas'}")
+    print(f"  Método: {feature_method}")
     print(f"  Tamaño de lote: {batch_size}")
     print("=" * 50)
     
@@ -248,7 +310,8 @@ def main():
         image_column=image_column,
         table_name=table_name,
         sample_size=sample_size,
-        batch_size=batch_size
+        batch_size=batch_size,
+        feature_method=feature_method
     )
     
     if success:
@@ -55,10 +55,17 @@ def main():
     
     # 3. Check if all indexed files exist on disk
     print("\nChecking file existence...")
-    missing_files = []
-    for path in indexed_paths:
-        if not os.path.exists(path):
-            missing_files.append(path)
+    # One scandir per directory instead of one stat() per file
+    existing_by_dir = {}
+    for directory in {os.path.dirname(path) for path in indexed_paths}:
+        try:
+            with os.scandir(directory or '.') as entries:
+                existing_by_dir[directory] = {entry.name for entry in entries}
+        except OSError:
+            existing_by_dir[directory] = set()
+    
+    missing_files = [path for path in indexed_paths
+                     if os.path.basename(path) not in existing_by_dir[os.path.dirname(path)]]
     
     if missing_files:
         print(f"❌ {len(missing_files)} files missing from disk:")
@@ -72,12 +79,16 @@ def main():
     print("Index Path | CSV Path | Match?")
     print("-" * 70)
     
+    # Build filename -> audio_path lookup once (first match wins, like iloc[0])
+    csv_by_name = {}
+    for filename, audio_path in zip(df['filename'], df['audio_path']):
+        csv_by_name.setdefault(filename, audio_path)
+    
     for i, (idx_path, _) in enumerate(histogram_data[:5]):
         basename = os.path.basename(idx_path)
-        csv_match = df[df['filename'] == basename]
+        csv_path = csv_by_name.get(basename)
         
-        if not csv_match.empty:
-            csv_path = csv_match.iloc[0]['audio_path']
+        if csv_path is not None:
             match = "✓" if idx_path == csv_path else "✗"
             print(f"{idx_path} | {csv_path} | {match}")
         else:
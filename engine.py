@@ -1,9 +1,19 @@
 # engine.py - CORREGIDO para soporte de índices textuales SPIMI
 
 import csv
+import io
+import logging
+import mmap
 import os
 import pickle
-from typing import List, Any, Tuple, Dict, Union, Optional
+import re
+import tempfile
+import threading
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain, islice, zip_longest
+from operator import itemgetter, methodcaller
+from typing import IO, List, Any, Tuple, Dict, Union, Optional, Iterable, Iterator, Callable
 from indices.sequential import SequentialFile
 from indices.isam import ISAM
 from indices.hash_extensible import ExtendibleHash
@@ -19,10 +29,66 @@ except ImportError:
     MultidimensionalRTree = None
     RTREE_AVAILABLE = False
 
+# PyArrow es opcional: si está disponible se usa su parser CSV (multihilo, en C)
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pacsv
+    PYARROW_AVAILABLE = True
+except ImportError:
+    pa = None
+    pc = None
+    pacsv = None
+    PYARROW_AVAILABLE = False
+
+# NumPy es opcional: vectoriza los filtros del full scan sobre columnas cacheadas
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+try:
+    import scipy.sparse as sp
+    SCIPY_AVAILABLE = NUMPY_AVAILABLE
+except ImportError:
+    sp = None
+    SCIPY_AVAILABLE = False
+
+# Trazas de las operaciones frecuentes (load/search/insert/range): sin costo si DEBUG está desactivado
+logger = logging.getLogger(__name__)
+
+CSV_BLOCK_SIZE = 1 << 20  # 1 MiB por bloque de lectura de Arrow
+# Un registro str sin separador '|' ni caracteres que obliguen a entrecomillar ya es su línea CSV
+_CSV_SPECIAL = re.compile(r'[|,"\r\n]').search
+
+# Buffer de lectura para los open() de CSV (por defecto 1 MiB en vez de 8 KiB)
+CSV_READ_BUFFER = int(os.environ.get('CSV_READ_BUFFER', 1 << 20))
+
+# Pool de strings para Engine(intern_strings=True)
+INTERN_MAX_LENGTH = 32
+INTERN_POOL_LIMIT = 100_000
+
+# Registros por bloque de texto en scan_chunks (un writerows por bloque)
+SCAN_CHUNK_ROWS = 1000
+
+# Filtro de columna en paralelo (Arrow libera el GIL): mínimo de filas para repartir y número de hilos
+PARALLEL_SEARCH_MIN_ROWS = 50_000
+SEARCH_WORKERS = os.cpu_count() or 4
+
+# Máximo de índices hash secundarios (tabla, columna) en memoria; se descarta el menos usado
+SECONDARY_HASH_MAX_COLUMNS = 8
+# Búsquedas sobre una misma columna antes de construir su hash secundario (las previas usan Arrow)
+SECONDARY_HASH_MIN_SEARCHES = 2
+
+# Índices textuales (SPIMI) abiertos que se mantienen entre consultas; se descarta el menos usado
+TEXT_INDEX_CACHE_MAX = 4
+
 class Engine:
-    def __init__(self):
+    def __init__(self, intern_strings: bool = False):
         self.tables: Dict[str, BaseIndex] = {}
-        self.table_headers: Dict[str, List[str]] = {}      
+        self.table_headers: Dict[str, Tuple[str, ...]] = {}  # inmutables: se comparten sin copiar
         self.table_file_paths: Dict[str, str] = {}
         self.table_schemas: Dict[str, List[tuple]] = {}
         
@@ -31,9 +97,230 @@ class Engine:
         
         # NUEVO: Soporte para tablas de embeddings
         self.embedding_tables: Dict[str, Dict[str, Any]] = {}  # tabla -> {embeddings, metadata, pickle_path}
+        
+        # Vista columnar cacheada para los full scans (se invalida al modificar la tabla)
+        self.table_rows: Dict[str, List[Any]] = {}  # tabla -> registros en orden de scan
+        self.table_columns: Dict[str, Dict[int, Any]] = {}  # tabla -> {columna: pa.Array / np.ndarray de celdas}
+        self.table_csv_lines: Dict[str, List[str]] = {}  # tabla -> línea CSV ya formateada de cada registro
+        self.dict_column_keys: Dict[str, Dict[int, Optional[str]]] = {}  # tabla -> {columna: clave del dict}
+        # Vista materializada del scan: tabla -> (archivo temporal con el CSV ya formateado,
+        # mmap de solo lectura o None si está vacío); el texto vive en el page cache, no en el heap
+        self.table_views: Dict[str, Tuple[IO[str], Optional[mmap.mmap]]] = {}
+        
+        # Índices hash secundarios creados bajo demanda por search: (tabla, columna) -> {valor: [posiciones]}
+        self.secondary_hash: 'OrderedDict[Tuple[str, int], Dict[str, List[int]]]' = OrderedDict()
+        self.column_search_counts: Dict[Tuple[str, int], int] = {}
+        
+        # Índices textuales ya abiertos: tabla -> (firma de archivos, InvertedIndex listo para consultar)
+        self.text_index_cache: 'OrderedDict[str, Tuple[Tuple[Any, ...], Any]]' = OrderedDict()
+        
+        # Cachés derivados de cada tabla, descartados juntos por _invalidate_table_cache:
+        # los indexados por tabla y los indexados por (tabla, columna); las vistas del scan
+        # (table_views) se cierran aparte porque tienen un archivo temporal abierto
+        self._table_caches = (self.table_rows, self.table_columns, self.table_csv_lines,
+                              self.text_index_cache)
+        self._column_caches = (self.secondary_hash, self.column_search_counts)
+        
+        # Opcional: compartir un solo objeto str para valores cortos repetidos al cargar CSVs
+        self.intern_strings = intern_strings
+        
+        # csv.writer reutilizado por _format_record_to_csv (el entrecomillado se hace en C);
+        # el lock evita que dos hilos (p.ej. endpoints del API) mezclen filas en el mismo buffer
+        self._row_buffer = io.StringIO()
+        self._row_writer = csv.writer(self._row_buffer, lineterminator='\n')
+        self._row_lock = threading.Lock()
+        
+        # type(registro) -> función que devuelve sus valores limpios (una búsqueda O(1) en vez
+        # de la cadena de isinstance); las subclases se resuelven y se agregan al verlas
+        self._values_dispatch: Dict[type, Callable[[Any], List[str]]] = {
+            dict: self._dict_values,
+            list: self._sequence_values,
+            tuple: self._sequence_values,
+            str: self._str_values,
+        }
+
+    def _invalidate_table_cache(self, table: str, schema_changed: bool = False) -> None:
+        """Único punto de invalidación: descarta todo lo cacheado de una tabla tras
+        insert/remove/load (o al registrar de nuevo una tabla textual).
+
+        Las claves dict resueltas por columna solo dependen del schema, así que
+        se conservan salvo que la tabla se vuelva a cargar (``schema_changed``).
+        """
+        for cache in self._table_caches:
+            cache.pop(table, None)
+        for cache in self._column_caches:
+            for cache_key in [k for k in cache if k[0] == table]:
+                del cache[cache_key]
+        self._drop_table_view(table)
+        if schema_changed:
+            self.dict_column_keys.pop(table, None)
+
+    def _table_view(self, table: str) -> Optional[mmap.mmap]:
+        """Texto CSV del scan completo escrito una vez a un archivo temporal y mapeado en memoria.
+
+        El archivo es propio de este Engine y no tiene nombre en el directorio de trabajo
+        (el SO lo borra al cerrarlo). Se regenera (perezosamente) tras cualquier
+        insert/remove/load de la tabla.
+        """
+        view = self.table_views.get(table)
+        if view is None:
+            f = tempfile.TemporaryFile('w+', encoding='utf-8', newline='')
+            try:
+                f.writelines(self.scan_chunks(table))
+                f.flush()
+                mapped = None
+                if f.tell() > 0:  # mmap no admite archivos vacíos
+                    mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except BaseException:
+                f.close()
+                raise
+            view = (f, mapped)
+            self.table_views[table] = view
+        return view[1]
+
+    def _drop_table_view(self, table: str) -> None:
+        view = self.table_views.pop(table, None)
+        if view is None:
+            return
+        f, mapped = view
+        if mapped is not None:
+            mapped.close()
+        f.close()
+
+    def close(self) -> None:
+        """Libera las vistas del scan (sus archivos temporales) de todas las tablas"""
+        for table in list(self.table_views):
+            self._drop_table_view(table)
+
+    def _dict_column_key(self, table: str, column: int, row: Dict[str, Any]) -> Optional[str]:
+        """Nombre de la clave que ocupa la posición ``column`` en los registros dict de la tabla"""
+        keys_by_column = self.dict_column_keys.setdefault(table, {})
+        if column not in keys_by_column:
+            keys = list(row.keys())
+            keys_by_column[column] = keys[column] if column < len(keys) else None
+        return keys_by_column[column]
+
+    def _table_rows(self, table: str) -> List[Any]:
+        """Registros de la tabla en orden de scan (cacheados hasta el próximo cambio)"""
+        rows = self.table_rows.get(table)
+        if rows is None:
+            rows = list(self.tables[table].iter_all())
+            self.table_rows[table] = rows
+        return rows
+
+    def _table_csv_lines(self, table: str) -> List[str]:
+        """Línea CSV de cada registro en orden de scan, formateada una sola vez por versión de la tabla"""
+        lines = self.table_csv_lines.get(table)
+        if lines is None:
+            lines = self._format_records_to_csv(self._table_rows(table))
+            self.table_csv_lines[table] = lines
+        return lines
+
+    @staticmethod
+    def _cells_array(values: List[Optional[str]]) -> Any:
+        """Columna contigua: Arrow si está disponible, si no un array object de NumPy"""
+        if PYARROW_AVAILABLE:
+            return pa.array(values, type=pa.string())
+        return np.array(values, dtype=object)
+
+    def _column_store(self, table: str) -> Dict[int, Any]:
+        """Almacén columnar (SoA) de la tabla: columna -> array con su valor en cada registro.
+
+        La primera vez se parte cada registro una sola vez y se transponen todas las
+        columnas juntas; otros objetos se resuelven por columna.
+        """
+        columns = self.table_columns.get(table)
+        if columns is None:
+            columns = {}
+            rows = self._table_rows(table)
+            if rows:
+                values = self._values_handler(rows[0])
+                if (values is self._dict_values or values is self._sequence_values
+                        or (values is self._str_values and '|' in rows[0])):
+                    # AoS -> SoA: None donde un registro no tiene la columna
+                    for column, cells in enumerate(zip_longest(*map(values, rows))):
+                        columns[column] = self._cells_array(list(cells))
+                elif values is self._str_values:
+                    self._split_csv_rows(rows, columns)
+            self.table_columns[table] = columns
+        return columns
+
+    def _split_csv_rows(self, rows: List[str], columns: Dict[int, Any]) -> None:
+        """Filas CSV con coma: un solo csv.reader (en C) parte todas las filas una vez.
+
+        Si alguna fila trae saltos de línea o el reader falla, no se llena nada y
+        cada columna se resuelve luego por fila con su extractor.
+        """
+        stripped = [row.strip() for row in rows]
+        if any('\n' in row or '\r' in row for row in stripped):
+            return
+        try:
+            parsed = list(csv.reader(stripped))
+        except csv.Error:
+            return
+        for column, cells in enumerate(zip_longest(*parsed)):
+            columns[column] = self._cells_array([None if cell is None else cell.strip() for cell in cells])
+
+    def _column_cells(self, table: str, column: int) -> Any:
+        """Array con el valor de ``column`` en cada registro: Arrow (contiguo) o, sin PyArrow, NumPy"""
+        columns = self._column_store(table)
+        cells = columns.get(column)
+        if cells is None:
+            rows = self._table_rows(table)
+            extract = self._cell_extractor(table, column, rows[0]) if rows else None
+            cells = self._cells_array([extract(row) for row in rows])
+            columns[column] = cells
+        return cells
+
+    def _matching_positions(self, table: str, column: int, key_value: str) -> List[int]:
+        """Posiciones (en orden de scan) cuyo valor en ``column`` es ``key_value``, comparando en C"""
+        cells = self._column_cells(table, column)
+        if not PYARROW_AVAILABLE:
+            return np.flatnonzero(cells == key_value).tolist()
+        
+        key = pa.scalar(key_value, pa.string())
+        total = len(cells)
+        workers = min(SEARCH_WORKERS, total // PARALLEL_SEARCH_MIN_ROWS)
+        if workers < 2:
+            return pc.indices_nonzero(pc.equal(cells, key)).to_pylist()
+        
+        # Tabla grande: un tramo contiguo de ceil(N / hilos) filas por hilo; los kernels de
+        # Arrow liberan el GIL, así que las comparaciones corren en paralelo
+        step = -(-total // workers)
+        
+        def match(offset: int) -> List[int]:
+            part = pc.indices_nonzero(pc.equal(cells.slice(offset, step), key))
+            return [offset + i for i in part.to_pylist()]
+        
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            parts = pool.map(match, range(0, total, step))
+            return list(chain.from_iterable(parts))
+
+    def _secondary_hash(self, table: str, column: int) -> Dict[str, List[int]]:
+        """Índice hash en memoria valor -> posiciones de registro para ``column`` (se construye en un solo scan)"""
+        cache_key = (table, column)
+        buckets = self.secondary_hash.get(cache_key)
+        if buckets is not None:
+            self.secondary_hash.move_to_end(cache_key)
+            return buckets
+        
+        # Se agrupa sobre la columna del almacén columnar: sin volver a partir cada registro
+        cells = self._column_cells(table, column)
+        cells = cells.to_pylist() if PYARROW_AVAILABLE else cells.tolist()
+        grouped = defaultdict(list)
+        for position, cell_value in enumerate(cells):
+            if cell_value is not None:
+                grouped[cell_value].append(position)
+        buckets = dict(grouped)
+        
+        self.secondary_hash[cache_key] = buckets
+        if len(self.secondary_hash) > SECONDARY_HASH_MAX_COLUMNS:
+            self.secondary_hash.popitem(last=False)
+        return buckets
 
     def register_text_table(self, table_name: str, index_path: str, text_fields: List[str], csv_path: str):
         """Registra una tabla con índice textual SPIMI"""
+        self._invalidate_table_cache(table_name, schema_changed=True)
         self.text_tables[table_name] = {
             'index_path': index_path,
             'text_fields': text_fields,
@@ -46,7 +333,7 @@ class Engine:
             with open(csv_path, 'r', encoding='utf-8') as f:
                 reader = csv.reader(f)
                 headers = next(reader, [])
-                self.table_headers[table_name] = headers
+                self.table_headers[table_name] = tuple(headers)
                 self.table_file_paths[table_name] = csv_path
                 
             print(f" Tabla textual '{table_name}' registrada exitosamente")
@@ -73,7 +360,7 @@ class Engine:
         else:
             headers = ['embedding_id', 'embedding_vector']
         
-        self.table_headers[table_name] = headers
+        self.table_headers[table_name] = tuple(headers)
         self.table_file_paths[table_name] = pickle_path
         
         print(f" Tabla de embeddings '{table_name}' registrada exitosamente")
@@ -98,77 +385,22 @@ class Engine:
         csv_path = text_info['csv_path']
         
         try:
-            # Importar módulos necesarios
-            from indices.spimi import SPIMIIndexBuilder
-            from indices.inverted_index import InvertedIndex
-            
             # Cargar el índice SPIMI construido
             if not os.path.exists(index_path):
                 raise ValueError(f"Archivo de índice no encontrado: {index_path}")
             
-            print(f" Cargando índice desde: {index_path}")
-            
-            # Cargar datos del índice
-            with open(index_path, 'rb') as f:
-                index_data = pickle.load(f)
-            
-            print(f" Índice cargado: {len(index_data.get('index', {}))} términos")
-            
-            # Cargar documentos originales para los resultados
-            documents = []
-            
-            # Si hay CSV, cargar desde ahí
-            if csv_path and os.path.exists(csv_path):
-                with open(csv_path, 'r', encoding='utf-8') as f:
-                    reader = csv.DictReader(f)
-                    for row in reader:
-                        documents.append(row)
-                print(f" Documentos cargados desde CSV: {len(documents)}")
-            
-            # Si no hay CSV, intentar cargar desde el índice
-            elif 'doc_info' in index_data:
-                doc_info = index_data['doc_info']
-                print(f" Documentos encontrados en índice: {len(doc_info)}")
-                # Convertir doc_info a lista de documentos
-                for doc_id, doc_data in doc_info.items():
-                    if isinstance(doc_data, dict):
-                        documents.append(doc_data)
-                    else:
-                        # Si es solo texto, crear un documento básico
-                        documents.append({'content': str(doc_data), 'doc_id': doc_id})
-            
-            # Si no hay documentos, crear documentos vacíos
-            if not documents:
-                print(" ADVERTENCIA: No se encontraron documentos, usando placeholders")
-                # Crear documentos placeholder basados en el índice
-                doc_count = index_data.get('total_documents', 100)
-                for i in range(doc_count):
-                    documents.append({'doc_id': i, 'content': f'Documento {i}'})
-            
-            # Procesar consulta usando componentes de InvertedIndex
-            # Crear un índice temporal para ejecutar la búsqueda
-            temp_index = InvertedIndex(table_name, text_info['text_fields'], 'spanish')
-            
-            # Cargar la información del índice SPIMI
-            temp_index.inverted_index = index_data.get('index', {})
-            temp_index.total_documents = index_data.get('total_documents', len(documents))
-            temp_index.document_metadata = {i: doc for i, doc in enumerate(documents)}
-            
-            # OPTIMIZACIÓN: Cargar normas precalculadas si existen
-            if 'document_norms' in index_data:
-                print(" Cargando normas precalculadas...")
-                temp_index.tfidf_calculator.document_norms = index_data['document_norms']
-                temp_index.tfidf_calculator.document_count = temp_index.total_documents
-                temp_index.tfidf_calculator.vocabulary = set(temp_index.inverted_index.keys())
-                
-                # Cargar document frequencies
-                temp_index.tfidf_calculator.document_frequencies = index_data.get('document_frequencies', {})
-                
-                print(f" Configuración TF-IDF cargada desde índice")
+            # Índice ya cargado para esta tabla: se reutiliza mientras el índice y el CSV no cambien
+            signature = self._text_index_signature(index_path, csv_path)
+            cached = self.text_index_cache.get(table_name)
+            if cached is not None and cached[0] == signature:
+                self.text_index_cache.move_to_end(table_name)
+                temp_index = cached[1]
+                print(" Índice textual reutilizado desde caché")
             else:
-                print(" Normas no encontradas en índice, calculando...")
-                # Fallback al método optimizado anterior
-                self._calculate_document_norms_optimized(temp_index)
+                temp_index = self._load_text_index(table_name, text_info)
+                self.text_index_cache[table_name] = (signature, temp_index)
+                if len(self.text_index_cache) > TEXT_INDEX_CACHE_MAX:
+                    self.text_index_cache.popitem(last=False)
             
             # Ejecutar búsqueda
             results = temp_index.search(query_text, k)
@@ -183,18 +415,129 @@ class Engine:
             traceback.print_exc()
             return []
 
+    def _load_text_index(self, table_name: str, text_info: Dict[str, Any]):
+        """Abre el índice SPIMI de una tabla textual y arma el InvertedIndex listo para consultar"""
+        from indices.spimi import FlatPostings, CsvRows
+        from indices.inverted_index import InvertedIndex
+        
+        index_path = text_info['index_path']
+        csv_path = text_info['csv_path']
+        
+        print(f" Cargando índice desde: {index_path}")
+        
+        # Cargar datos del índice: con la copia plana solo se lee el léxico y los
+        # postings quedan mapeados en memoria; si no existe, se deserializa el pickle
+        if FlatPostings.exists(index_path):
+            postings = FlatPostings(index_path)
+            index_data = dict(postings.header)
+            index_data['index'] = postings
+            index_data['document_norms'] = postings.norms
+            index_data['document_frequencies'] = postings.document_frequencies()
+        else:
+            with open(index_path, 'rb') as f:
+                index_data = pickle.load(f)
+        
+        print(f" Índice cargado: {len(index_data.get('index', {}))} términos")
+        
+        # Cargar documentos originales para los resultados
+        documents = []
+        
+        # Si hay CSV, sus filas se leen bajo demanda (solo las del top-k) vía offsets de bytes
+        if csv_path and os.path.exists(csv_path):
+            documents = CsvRows(csv_path, self._csv_row_offsets(index_path, csv_path))
+            print(f" Documentos en CSV: {len(documents)}")
+        
+        # Si no hay CSV, intentar cargar desde el índice
+        elif 'doc_info' in index_data:
+            doc_info = index_data['doc_info']
+            print(f" Documentos encontrados en índice: {len(doc_info)}")
+            # Convertir doc_info a lista de documentos
+            for doc_id, doc_data in doc_info.items():
+                if isinstance(doc_data, dict):
+                    documents.append(doc_data)
+                else:
+                    # Si es solo texto, crear un documento básico
+                    documents.append({'content': str(doc_data), 'doc_id': doc_id})
+        
+        # Si no hay documentos, crear documentos vacíos
+        if not documents:
+            print(" ADVERTENCIA: No se encontraron documentos, usando placeholders")
+            # Crear documentos placeholder basados en el índice
+            # (lista nueva: un CsvRows vacío, p.ej. CSV solo con cabecera, no admite append)
+            doc_count = index_data.get('total_documents', 100)
+            documents = [{'doc_id': i, 'content': f'Documento {i}'} for i in range(doc_count)]
+        
+        # Procesar consulta usando componentes de InvertedIndex
+        # Crear un índice temporal para ejecutar la búsqueda
+        temp_index = InvertedIndex(table_name, text_info['text_fields'], 'spanish')
+        
+        # Cargar la información del índice SPIMI
+        temp_index.inverted_index = index_data.get('index', {})
+        temp_index.total_documents = index_data.get('total_documents', len(documents))
+        # Lista o CsvRows: ya se indexan por doc_id, sin copiarlos a un dict
+        temp_index.document_metadata = documents
+        
+        # OPTIMIZACIÓN: Cargar normas precalculadas si existen
+        if 'document_norms' in index_data:
+            print(" Cargando normas precalculadas...")
+            temp_index.tfidf_calculator.document_norms = self._norms_array(
+                index_data['document_norms'], temp_index.total_documents)
+            temp_index.tfidf_calculator.document_count = temp_index.total_documents
+            # Vista de las claves (sin copia): la consulta solo hace pruebas de pertenencia
+            temp_index.tfidf_calculator.vocabulary = temp_index.inverted_index.keys()
+            
+            # Cargar document frequencies
+            temp_index.tfidf_calculator.document_frequencies = index_data.get('document_frequencies', {})
+            
+            print(f" Configuración TF-IDF cargada desde índice")
+        else:
+            print(" Normas no encontradas en índice, calculando...")
+            # Fallback al método optimizado anterior
+            self._calculate_document_norms_optimized(temp_index)
+        
+        return temp_index
+
+    @staticmethod
+    def _text_index_signature(index_path: str, csv_path: Optional[str]) -> Tuple[Any, ...]:
+        """Rutas y mtime del índice y del CSV: si alguno cambia, el índice cacheado ya no sirve"""
+        csv_mtime = os.stat(csv_path).st_mtime_ns if csv_path and os.path.exists(csv_path) else None
+        return (index_path, os.stat(index_path).st_mtime_ns, csv_path, csv_mtime)
+
+    @staticmethod
+    def _csv_row_offsets(index_path: str, csv_path: str):
+        """Offsets de las filas del CSV: los guardados junto al índice si no son más viejos que el CSV"""
+        from indices.spimi import FLAT_ROWS, csv_row_offsets
+        rows_path = index_path + FLAT_ROWS
+        if (NUMPY_AVAILABLE and os.path.exists(rows_path)
+                and os.path.getmtime(rows_path) >= os.path.getmtime(csv_path)):
+            offsets = np.fromfile(rows_path, dtype=np.int64)
+            # Offsets que no caben en el CSV son de otro archivo (p.ej. la tabla se registró
+            # con un CSV distinto del que armó el índice): se recalculan
+            if len(offsets) and offsets[-1] < os.path.getsize(csv_path):
+                return offsets
+        return csv_row_offsets(csv_path)
+
     def _calculate_document_norms_optimized(self, temp_index):
         """Calcula normas de documentos de manera optimizada"""
         print(" Calculando normas de documentos (método optimizado)...")
         
         # Configurar TF-IDF calculator básico
         temp_index.tfidf_calculator.document_count = temp_index.total_documents
-        temp_index.tfidf_calculator.vocabulary = set(temp_index.inverted_index.keys())
+        temp_index.tfidf_calculator.vocabulary = temp_index.inverted_index.keys()
         
-        # Reconstruir document frequencies
-        for term, postings in temp_index.inverted_index.items():
-            temp_index.tfidf_calculator.document_frequencies[term] = len(postings)
+        # Reconstruir document frequencies (el índice plano ya las trae por term_id)
+        index = temp_index.inverted_index
+        if hasattr(index, 'document_frequencies'):
+            temp_index.tfidf_calculator.document_frequencies = index.document_frequencies()
+        else:
+            temp_index.tfidf_calculator.document_frequencies.update(zip(index.keys(), map(len, index.values())))
         
+        if SCIPY_AVAILABLE:
+            temp_index.tfidf_calculator.document_norms = self._sparse_document_norms(
+                temp_index.inverted_index, temp_index.total_documents)
+            print(f" Normas calculadas para {len(temp_index.tfidf_calculator.document_norms)} documentos")
+            return
+
         # Inicializar normas
         temp_index.tfidf_calculator.document_norms = {}
         doc_vectors = {}  # doc_id -> {term: weight}
@@ -218,6 +561,35 @@ class Engine:
         
         print(f" Normas calculadas para {len(temp_index.tfidf_calculator.document_norms)} documentos")
 
+    @staticmethod
+    def _norms_array(document_norms, total_documents: int):
+        """Normas como arreglo contiguo indexado por doc_id (los índices pickle antiguos las traen en dict)"""
+        if not NUMPY_AVAILABLE or not isinstance(document_norms, dict):
+            return document_norms
+        doc_ids = np.fromiter(document_norms.keys(), dtype=np.int64, count=len(document_norms))
+        values = np.fromiter(document_norms.values(), dtype=np.float64, count=len(document_norms))
+        size = max(total_documents, int(doc_ids.max()) + 1 if len(doc_ids) else 0)
+        norms = np.zeros(size, dtype=np.float64)
+        inside = doc_ids >= 0
+        norms[doc_ids[inside]] = values[inside]
+        return norms
+
+    @staticmethod
+    def _sparse_document_norms(inverted_index, total_documents: int):
+        """Normas L2 por documento con una matriz CSR documento x término (una pasada en C)"""
+        postings_lists = list(inverted_index.values())
+        lengths = np.fromiter((len(p) for p in postings_lists), dtype=np.int64, count=len(postings_lists))
+        nnz = int(lengths.sum())
+        doc_ids = np.fromiter((d for p in postings_lists for d, _ in p), dtype=np.int64, count=nnz)
+        weights = np.fromiter((w for p in postings_lists for _, w in p), dtype=np.float64, count=nnz)
+        term_ids = np.repeat(np.arange(len(postings_lists), dtype=np.int64), lengths)
+
+        # Solo cuentan los doc_id dentro de [0, total_documents), igual que el recorrido por dicts
+        in_range = (doc_ids >= 0) & (doc_ids < total_documents)
+        matrix = sp.csr_matrix((weights[in_range], (doc_ids[in_range], term_ids[in_range])),
+                               shape=(total_documents, len(postings_lists)))
+        return np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+
     def _init_index(self, tipo: str, table: str, index_field: int, schema: Optional[List[Tuple[str, str, int]]]) -> BaseIndex:
         """Inicializa un índice según su tipo"""
         if tipo == 'sequential':
@@ -233,7 +605,7 @@ class Engine:
                         index_field)
         elif tipo == 'hash':
             hash_idx = ExtendibleHash(
-                dir_file=f'indices/{table}_hash_dir.pkl',
+                dir_file=f'indices/{table}_hash_dir.bin',
                 data_file=f'indices/{table}_hash_data.bin'
             )
             hash_idx.field_index = index_field
@@ -249,27 +621,74 @@ class Engine:
         else:
             raise ValueError(f"Tipo de índice '{tipo}' no soportado")
 
+    def _iter_csv_rows(self, path: str, num_columns: int):
+        """Itera las filas de datos (sin header) como listas de strings.
+
+        Con PyArrow se leen lotes de ``CSV_BLOCK_SIZE`` bytes, por lo que la
+        memoria pico no depende del tamaño del archivo. Sin PyArrow se usa
+        ``csv.reader`` en streaming. Si ``intern_strings`` está activo, los
+        valores cortos repetidos (categorías, códigos) comparten un mismo str.
+        """
+        rows = self._read_csv_rows(path, num_columns)
+        if not self.intern_strings:
+            return rows
+        return self._intern_rows(rows)
+
+    def _intern_rows(self, rows):
+        """Reemplaza valores cortos por una instancia compartida de un pool acotado"""
+        pool: Dict[str, str] = {}
+        for row in rows:
+            if len(pool) > INTERN_POOL_LIMIT:
+                pool.clear()
+            yield [pool.setdefault(v, v) if len(v) <= INTERN_MAX_LENGTH else v for v in row]
+
+    def _read_csv_rows(self, path: str, num_columns: int):
+        if PYARROW_AVAILABLE and num_columns > 0:
+            names = [f'col{i}' for i in range(num_columns)]
+            reader = pacsv.open_csv(
+                path,
+                read_options=pacsv.ReadOptions(encoding='latin1', block_size=CSV_BLOCK_SIZE,
+                                               column_names=names, skip_rows=1),
+                convert_options=pacsv.ConvertOptions(column_types={n: pa.string() for n in names})
+            )
+            for batch in reader:
+                for row in zip(*[c.to_pylist() for c in batch.columns]):
+                    yield list(row)
+            return
+
+        with open(path, newline='', encoding='latin1', buffering=CSV_READ_BUFFER) as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            for row in reader:
+                yield row
+
     def load_csv(self, table: str, path: str, tipo: str, index_field: int) -> str:
         """Carga un archivo CSV en una tabla con el índice especificado"""
-        print(f"Intentando leer archivo: {path}")
+        logger.debug("Intentando leer archivo: %s", path)
 
-        # Leer y guardar headers
+        # Leer y guardar headers (una sola vez; las ramas de abajo reutilizan first_row)
+        first_row: List[str] = []
         try:
-            headers = []
-            with open(path, 'r', encoding='latin1') as f:
-                reader = csv.reader(f)
-                first_row = next(reader, [])
-                headers = [col.strip() for col in first_row if col.strip()]
+            headers: Tuple[str, ...] = ()
+            with open(path, 'r', encoding='latin1', buffering=CSV_READ_BUFFER, newline='') as f:
+                first_line = f.readline()
+                if '"' in first_line:
+                    # Header con comillas (puede traer comas o saltos de línea): csv.reader
+                    first_row = next(csv.reader(chain([first_line], f)), [])
+                elif first_line:
+                    # Caso común: un readline + split, sin la máquina de estados del lector
+                    first_row = first_line.rstrip('\r\n').split(',')
+                # Un solo strip por columna; se conservan las columnas sin nombre para no desalinear índices
+                headers = tuple(col.strip() for col in first_row)
             
             self.table_headers[table] = headers
             self.table_file_paths[table] = path
             
-            print(f"Headers detectados para tabla '{table}': {headers}")
-            print(f"Total de columnas: {len(headers)}")
+            logger.debug("Headers detectados para tabla '%s': %s (%d columnas)", table, headers, len(headers))
             
         except Exception as e:
-            print(f"Advertencia: No se pudieron leer headers del archivo {path}: {e}")
-            self.table_headers[table] = []
+            logger.warning("No se pudieron leer headers del archivo %s: %s", path, e)
+            self.table_headers[table] = ()
             self.table_file_paths[table] = path
 
         # Crear índice según tipo
@@ -282,28 +701,26 @@ class Engine:
             idx.load_csv(path)  # MultidimensionalRTree.load_csv acepta str
 
         elif tipo == 'isam':
-            # ISAM requiere un manejo especial con diccionarios
-            with open(path, newline='', encoding='latin1') as f:
-                reader = csv.reader(f)
-                headers_isam = next(reader)
-                rows = list(reader)
+            # ISAM requiere un schema fijo de campos
+            if not first_row:
+                raise ValueError(f"No se pudo leer la cabecera del CSV {path}")
 
             # Crear schema ANTES de inicializar el índice
-            schema = [(f'col{i}', '20s', 20) for i in range(len(headers_isam))]
+            schema = [(f'col{i}', '20s', 20) for i in range(len(first_row))]
             self.table_schemas[table] = schema
             
-            # Convertir filas a diccionarios para ISAM
-            data_dicts = [dict(zip([f'col{i}' for i in range(len(row))], row)) for row in rows]
-            
             # Ahora schema es definitivamente no-None
             idx = self._init_index(tipo, table, index_field, schema)
-            # ISAM.load_csv acepta específicamente List[Dict[str, Any]]
+            
+            # Filas como namedtuple del schema (sin un dict por registro), de forma perezosa
+            num_fields = len(schema)
+            rows = self._iter_csv_rows(path, num_fields)
             if isinstance(idx, ISAM):
-                idx.load_csv(data_dicts)  # type: ignore[arg-type]
+                make_row = idx.reg.fila._make
+                idx.load_csv(make_row(row[:num_fields]) for row in rows)
             else:
                 # Fallback para otros tipos que puedan implementar load_csv
-                for row in rows:
-                    idx.insert(None, row)
+                idx.insert_pipelined(row[:num_fields] for row in rows)
 
         elif tipo == 'hash':
             # Hash Extensible requiere configuración específica
@@ -327,22 +744,19 @@ class Engine:
             # Sequential File y otros índices
             idx = self._init_index(tipo, table, index_field, None)  # Schema explícitamente None
             
-            if isinstance(idx, SequentialFile):
-                # Sequential File acepta path directamente
-                idx.load_csv(path)  # SequentialFile.load_csv acepta str
-            else:
-                # Para otros índices, cargar datos manualmente
-                with open(path, newline='', encoding='latin1') as f:
-                    reader = csv.reader(f)
-                    rows = list(reader)
-                
-                for row in rows:
-                    idx.insert(None, row)
+            try:
+                # Sequential File (y cualquier índice con load_csv propio) acepta path directamente
+                idx.load_csv(path)
+            except NotImplementedError:
+                # Solo si el índice no sabe leer el CSV: parseo en un hilo, inserción por bloques en este
+                idx.insert_pipelined(self._iter_csv_rows(path, len(first_row)))
 
         # Guardar índice en tabla
         self.tables[table] = idx
+        self._invalidate_table_cache(table, schema_changed=True)
         
-        headers_count = len(self.table_headers.get(table, []))
+        headers = self.table_headers.get(table, ())
+        headers_count = len(headers)
         tipo_real = type(idx).__name__
         
         extra_info = ""
@@ -355,13 +769,13 @@ class Engine:
             if isinstance(records_loaded, dict):
                 extra_info = f" ({len(records_loaded)} registros espaciales cargados)"
         
-        return f"Tabla '{table}' cargada con éxito usando índice {tipo} ({tipo_real}){extra_info}. Detectadas {headers_count} columnas: {', '.join(self.table_headers.get(table, [])[:5])}{'...' if headers_count > 5 else ''}"
+        return f"Tabla '{table}' cargada con éxito usando índice {tipo} ({tipo_real}){extra_info}. Detectadas {headers_count} columnas: {', '.join(headers[:5])}{'...' if headers_count > 5 else ''}"
 
     # ========== MÉTODOS PARA HEADERS ==========
     
-    def get_table_headers(self, table_name: str) -> List[str]:
-        """Obtener los headers/columnas de una tabla específica"""
-        return self.table_headers.get(table_name, [])
+    def get_table_headers(self, table_name: str) -> Tuple[str, ...]:
+        """Obtener los headers/columnas de una tabla específica (tupla inmutable compartida)"""
+        return self.table_headers.get(table_name, ())
     
     def get_table_file_path(self, table_name: str) -> str:
         """Obtener la ruta del archivo CSV original de una tabla"""
@@ -371,7 +785,7 @@ class Engine:
         """Obtener información completa de una tabla"""
         info = {
             'name': table_name,
-            'headers': self.get_table_headers(table_name),
+            'headers': list(self.get_table_headers(table_name)),
             'csv_path': self.get_table_file_path(table_name),
             'headers_count': len(self.get_table_headers(table_name))
         }
@@ -422,29 +836,123 @@ class Engine:
 
     # ========== MÉTODOS PRINCIPALES ==========
 
+    @staticmethod
+    def _dict_values(record: Dict[str, Any]) -> List[str]:
+        return [str(v).strip() for v in record.values()]
+
+    @staticmethod
+    def _sequence_values(record: Union[list, tuple]) -> List[str]:
+        return [str(v).strip() for v in record]
+
+    @staticmethod
+    def _str_values(record: str) -> List[str]:
+        # Las partes de un str ya son str: no hace falta str() por valor
+        if '|' in record:
+            return [v.strip() for v in record.split('|')]
+        return [record.strip()]
+
+    @staticmethod
+    def _other_values(record: Any) -> List[str]:
+        return [str(record).strip()]
+
+    def _values_handler(self, record: Any) -> Callable[[Any], List[str]]:
+        """Función de valores para el tipo de ``record`` (dict de despacho por tipo)"""
+        kind = type(record)
+        handler = self._values_dispatch.get(kind)
+        if handler is None:
+            # Subclase (namedtuple, OrderedDict, ...): se resuelve una vez por tipo
+            if isinstance(record, dict):
+                handler = self._dict_values
+            elif isinstance(record, (list, tuple)):
+                handler = self._sequence_values
+            elif isinstance(record, str):
+                handler = self._str_values
+            else:
+                handler = self._other_values
+            self._values_dispatch[kind] = handler
+        return handler
+
+    def _record_values(self, record: Any) -> List[str]:
+        """Normaliza cualquier registro a la lista de valores limpios de su fila"""
+        return self._values_handler(record)(record)
+
     def _format_record_to_csv(self, record: Any) -> str:
         """Convierte cualquier registro a formato CSV"""
-        if isinstance(record, dict):
-            values = [str(v) for v in record.values()]
-        elif isinstance(record, (list, tuple)):
-            values = [str(v) for v in record]
-        elif isinstance(record, str):
-            if '|' in record:
-                values = [v.strip() for v in record.split('|')]
-            else:
-                values = [record]
-        else:
-            values = [str(record)]
-        
-        # Limpiar y formatear cada valor
-        cleaned_values = []
-        for v in values:
-            cleaned = str(v).strip()
-            if ',' in cleaned or '"' in cleaned or '\n' in cleaned:
-                cleaned = '"' + cleaned.replace('"', '""') + '"'
-            cleaned_values.append(cleaned)
+        values = self._values_handler(record)
+        if values is self._str_values:
+            value = record.strip()
+            if value and not _CSV_SPECIAL(value):
+                return value
+        row = values(record)
+        if row == ['']:
+            return ''  # csv.writer entrecomilla un único campo vacío ('""'); se conserva la línea vacía
+        with self._row_lock:
+            self._row_writer.writerow(row)
+            line = self._row_buffer.getvalue()[:-1]
+            self._row_buffer.seek(0)
+            self._row_buffer.truncate(0)
+        return line
+
+    def _values_function(self, sample: Any) -> Callable[[Any], List[str]]:
+        """Versión de ``_record_values`` especializada en el tipo del primer registro"""
+        handler = self._values_handler(sample)
+        if handler is self._str_values or handler is self._other_values:
+            # Filas str u otros objetos: se conserva el despacho por registro
+            return self._record_values
+        return handler
+
+    def _iter_records_csv(self, records: Iterable[Any]) -> Iterator[str]:
+        """Genera una línea CSV por registro con un único csv.writer (en C)"""
+        records = iter(records)
+        first = next(records, None)
+        if first is None:
+            return
+        record_values = self._values_function(first)
         
-        return ','.join(cleaned_values)
+        plain_strings = self._values_handler(first) is self._str_values
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator='\n')
+        for record in chain([first], records):
+            if plain_strings:
+                value = record.strip()
+                if value and not _CSV_SPECIAL(value):
+                    yield value
+                    continue
+            row = record_values(record)
+            if row == ['']:
+                yield ''  # un único valor vacío: línea vacía, no '""'
+                continue
+            writer.writerow(row)
+            yield buffer.getvalue()[:-1]
+            buffer.seek(0)
+            buffer.truncate(0)
+
+    def _write_records_csv(self, records: Iterable[Any]) -> str:
+        """Texto CSV de todos los registros con una sola llamada a ``writerows`` (en C)"""
+        records = list(records)
+        if not records:
+            return ''
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator='\n')
+        writer.writerows(map(self._values_function(records[0]), records))
+        text = buffer.getvalue()
+        # Una fila de un único valor vacío sale como '""' (o hay comillas escapadas que lo
+        # parecen): se rehace por registro para dejar esas filas como líneas vacías
+        if '""\n' in text:
+            return ''.join(line + '\n' for line in self._iter_records_csv(records))
+        return text
+
+    def _format_records_to_csv(self, records: Iterable[Any]) -> List[str]:
+        """Convierte varios registros a líneas CSV en un solo lote"""
+        records = list(records)
+        if not records or isinstance(records[0], str):
+            # Las filas str suelen salir tal cual: el camino por registro ya evita el writer
+            return list(self._iter_records_csv(records))
+        text = self._write_records_csv(records)
+        # Un salto por registro: ningún valor trae saltos de línea embebidos y se puede partir
+        if text.count('\n') == len(records):
+            return text[:-1].split('\n')
+        return list(self._iter_records_csv(records))
 
     def _list_to_isam_dict(self, table: str, values: List[str]) -> Dict[str, Any]:
         """Convierte una lista de valores a diccionario para ISAM"""
@@ -469,6 +977,7 @@ class Engine:
             raise ValueError(f"Tabla '{table}' no encontrada")
         
         idx = self.tables[table]
+        self._invalidate_table_cache(table)
         
         if isinstance(idx, ISAM):
             val_dict = self._list_to_isam_dict(table, values)
@@ -478,102 +987,166 @@ class Engine:
         
         return f"Registro insertado en '{table}'"
 
-    def scan(self, table: str) -> str:
-        """Escanear tabla completa"""
+    def _scan_records(self, table: str) -> Iterator[Any]:
+        """Registros de la tabla tal como los entrega su índice (en streaming)"""
         if table not in self.tables:
             raise ValueError(f"Tabla '{table}' no encontrada")
         
         idx = self.tables[table]
-        registros = idx.scan_all()
-        
+        records = idx.iter_all()
         if RTREE_AVAILABLE and MultidimensionalRTree and isinstance(idx, MultidimensionalRTree):
-            formatted_records = []
-            for vector, obj in registros:
-                if isinstance(obj, list):
-                    cleaned_values = []
-                    for v in obj:
-                        cleaned = str(v).strip()
-                        if ',' in cleaned or '"' in cleaned or '\n' in cleaned:
-                            cleaned = '"' + cleaned.replace('"', '""') + '"'
-                        cleaned_values.append(cleaned)
-                    csv_record = ','.join(cleaned_values)
-                    formatted_records.append(csv_record)
-                else:
-                    csv_record = self._format_record_to_csv(obj)
-                    formatted_records.append(csv_record)
-            return '\n'.join(formatted_records)
-        
-        formatted_records = []
-        for record in registros:
-            csv_record = self._format_record_to_csv(record)
-            formatted_records.append(csv_record)
+            # (vector, obj): itemgetter saca los objetos en C, sin un frame de generador por fila;
+            # scan_chunks los formatea luego por bloques con un solo writerows
+            records = map(itemgetter(1), records)
+        return records
+
+    def scan_iter(self, table: str) -> Iterator[str]:
+        """Escanear tabla completa entregando una línea CSV por registro (en streaming)"""
+        return self._iter_records_csv(self._scan_records(table))
+
+    def scan_chunks(self, table: str, chunk_rows: int = SCAN_CHUNK_ROWS) -> Iterator[str]:
+        """Escanear tabla completa en bloques de texto CSV (cada uno termina en salto de línea).
+
+        Cada bloque se arma con un solo ``writerows`` y la memoria pico es la de un
+        bloque, no la del texto completo: pensado para respuestas en streaming.
+        """
+        records = self._scan_records(table)
+        while True:
+            chunk = self._write_records_csv(islice(records, chunk_rows))
+            if not chunk:
+                return
+            yield chunk
+
+    def scan(self, table: str) -> str:
+        """Escanear tabla completa (texto completo; para streaming usar scan_chunks/scan_iter)"""
+        if table not in self.tables:
+            raise ValueError(f"Tabla '{table}' no encontrada")
         
-        return '\n'.join(formatted_records)
+        # Mientras la tabla no cambie, el texto sale de la vista materializada sin reformatear
+        mapped = self._table_view(table)
+        if mapped is None:
+            return ''
+        # Se decodifica directo desde el mmap (sin el último salto de línea), sin copiar antes a bytes
+        with memoryview(mapped) as view, view[:-1] as text:
+            return str(text, 'utf-8')
 
-    def search(self, table: str, key: str, column: int) -> List[str]:
-        """Buscar registros básicos (solo para índices tradicionales)"""
+    def search(self, table: str, key: str, column: int, limit: Optional[int] = None) -> List[str]:
+        """Buscar registros básicos (solo para índices tradicionales)
+
+        Si se indica ``limit``, se devuelven como máximo ese número de resultados.
+        """
         if table not in self.tables:
             raise ValueError(f"Tabla '{table}' no encontrada")
         
         idx = self.tables[table]
         
-        # Para hash con búsqueda directa
-        if (hasattr(idx, 'search') and hasattr(idx, 'field_index') and 
-            idx.field_index == column and isinstance(idx, ExtendibleHash)):
-            try:
-                resultados = idx.search(key)
-                final_result = []
-                for r in resultados:
-                    csv_record = self._format_record_to_csv(r)
-                    final_result.append(csv_record)
-                return final_result
-            except Exception as e:
-                print(f"Error en búsqueda directa: {e}")
+        # Búsqueda directa si el índice sabe resolver la columna consultada
+        # (Hash Extensible, B+ Tree y Sequential File sobre su campo indexado)
+        try:
+            resultados = idx.search_column(column, key)
+            logger.debug("search '%s' columna %d: búsqueda directa en %s", table, column, type(idx).__name__)
+            if limit is not None:
+                resultados = resultados[:limit]
+            return self._format_records_to_csv(resultados)
+        except NotImplementedError:
+            pass
+        except Exception as e:
+            logger.warning("Error en búsqueda directa: %s", e)
         
-        # Full scan con filtro manual para otros casos
-        resultados = []
-        all_records = idx.scan_all()
+        key_value = str(key).strip()
+        cache_key = (table, column)
         
-        for row in all_records:
-            try:
-                cell_value = None
-                
-                if isinstance(row, dict):
-                    values = list(row.values())
-                    if column < len(values):
-                        cell_value = str(values[column]).strip()
-                elif isinstance(row, (list, tuple)):
-                    if column < len(row):
-                        cell_value = str(row[column]).strip()
-                elif isinstance(row, str):
-                    if '|' in row:
-                        cols = [c.strip() for c in row.split('|')]
-                        if column < len(cols):
-                            cell_value = cols[column].strip()
-                    else:
-                        import csv
-                        import io
-                        try:
-                            reader = csv.reader(io.StringIO(row.strip()))
-                            cols = next(reader, [])
-                            if column < len(cols):
-                                cell_value = cols[column].strip()
-                        except:
-                            cols = [c.strip() for c in row.split(',')]
-                            if column < len(cols):
-                                cell_value = cols[column].strip()
-                
-                if cell_value is not None and cell_value == str(key).strip():
-                    csv_record = self._format_record_to_csv(row)
-                    resultados.append(csv_record)
-                    
-            except Exception:
-                continue
+        # Columna sin hash secundario aún: filtro vectorizado de Arrow/NumPy (comparación en C)
+        positions = None
+        if (PYARROW_AVAILABLE or NUMPY_AVAILABLE) and cache_key not in self.secondary_hash:
+            searches = self.column_search_counts.get(cache_key, 0) + 1
+            self.column_search_counts[cache_key] = searches
+            if searches < SECONDARY_HASH_MIN_SEARCHES:
+                positions = self._matching_positions(table, column, key_value)
+        
+        # Columna consultada con frecuencia: hash secundario en memoria (un scan al construirlo, luego O(1))
+        if positions is None:
+            positions = self._secondary_hash(table, column).get(key_value, [])
+        if limit is not None:
+            positions = positions[:limit]
+        
+        # Las líneas CSV se formatean una vez por tabla y se reutilizan entre búsquedas
+        lines = self._table_csv_lines(table)
+        return [lines[i] for i in positions]
 
-        return resultados
+    def _cell_extractor(self, table: str, column: int, sample: Any) -> Callable[[Any], Optional[str]]:
+        """Elige una vez, según el tipo del primer registro, la función que extrae ``column``.
 
-    def range_search(self, table: str, begin_key: str, end_key: str) -> List[str]:
-        """Búsqueda por rango básica"""
+        Un mismo índice siempre entrega registros del mismo tipo, así que el bucle
+        del full scan no repite la cadena de ``isinstance`` por fila.
+        """
+        if isinstance(sample, dict):
+            dict_key = self._dict_column_key(table, column, sample)
+            if dict_key is None:
+                return lambda row: self._extract_cell(row, column)
+            
+            # Guardas explícitas en lugar de try/except por fila
+            def extract(row):
+                if dict_key in row:
+                    return str(row[dict_key]).strip()
+                return self._extract_cell(row, column)
+            return extract
+        
+        if isinstance(sample, (list, tuple)):
+            def extract(row):
+                return str(row[column]).strip() if column < len(row) else None
+            return extract
+        
+        if isinstance(sample, str):
+            # El separador de una tabla es fijo: se detecta una vez con el primer registro
+            if '|' in sample:
+                split_row = methodcaller('split', '|')
+            else:
+                def split_row(row):
+                    # csv.reader directo sobre la fila (respeta comillas), sin un StringIO por fila
+                    try:
+                        return next(csv.reader((row.strip(),)), [])
+                    except csv.Error:
+                        return row.split(',')
+            
+            def extract(row):
+                cols = split_row(row)
+                return cols[column].strip() if column < len(cols) else None
+            return extract
+        
+        return lambda row: self._extract_cell(row, column)
+
+    def _extract_cell(self, row: Any, column: int) -> Optional[str]:
+        """Valor limpio de la columna ``column`` de un registro (None si no existe)
+
+        Cada rama comprueba el rango de ``column`` antes de indexar; un error
+        inesperado se propaga en vez de descartar la fila en silencio.
+        """
+        if isinstance(row, dict):
+            values = list(row.values())
+            if column < len(values):
+                return str(values[column]).strip()
+        elif isinstance(row, (list, tuple)):
+            if column < len(row):
+                return str(row[column]).strip()
+        elif isinstance(row, str):
+            if '|' in row:
+                cols = row.split('|')
+            else:
+                try:
+                    cols = next(csv.reader((row.strip(),)), [])
+                except csv.Error:
+                    cols = row.split(',')
+            if column < len(cols):
+                return cols[column].strip()
+        return None
+
+    def range_search(self, table: str, begin_key: str, end_key: str, column: Optional[int] = None) -> List[str]:
+        """Búsqueda por rango básica
+
+        Sin ``column`` (o con la columna indexada) el rango se resuelve sobre el campo
+        del índice; Sequential File también acepta otras columnas.
+        """
         if table not in self.tables:
             raise ValueError(f"Tabla '{table}' no encontrada")
         
@@ -594,23 +1167,10 @@ class Engine:
                 
                 spatial_results = idx.range_search(point, param)
                 
-                formatted_results = []
-                for dist, obj in spatial_results:
-                    if isinstance(obj, list):
-                        cleaned_values = []
-                        for v in obj:
-                            cleaned = str(v).strip()
-                            if ',' in cleaned or '"' in cleaned or '\n' in cleaned:
-                                cleaned = '"' + cleaned.replace('"', '""') + '"'
-                            cleaned_values.append(cleaned)
-                        
-                        csv_record = ','.join(cleaned_values) + f',{dist:.3f}'
-                        formatted_results.append(csv_record)
-                    else:
-                        csv_record = self._format_record_to_csv(obj)
-                        formatted_results.append(f"{csv_record},{dist:.3f}")
-                
-                return formatted_results
+                # Los objetos se formatean en un solo lote y luego se les añade la distancia
+                csv_records = self._format_records_to_csv(map(itemgetter(1), spatial_results))
+                return [f"{csv_record},{dist:.3f}"
+                        for csv_record, (dist, _) in zip(csv_records, spatial_results)]
                 
             except Exception as e:
                 raise ValueError(f"Error en búsqueda espacial R-Tree: {e}")
@@ -618,9 +1178,19 @@ class Engine:
         if isinstance(idx, ExtendibleHash):
             raise ValueError("Hash Extensible no soporta búsquedas por rango. Use ISAM o B+ Tree para rangos.")
         
+        if isinstance(idx, SequentialFile):
+            # Columna no indexada: full scan con las columnas ordenadas que cachea el índice
+            raw_results = idx.range_search(begin_key, end_key, column)
+            return self._format_records_to_csv(raw_results)
+        
+        # B+ Tree usa field_index e ISAM index_field
+        indexed_column = getattr(idx, 'field_index', getattr(idx, 'index_field', None))
+        if column is not None and column != indexed_column:
+            raise ValueError(f"{type(idx).__name__} solo soporta búsquedas por rango sobre su campo indexado")
+        
         if hasattr(idx, 'range_search'):
             raw_results = idx.range_search(begin_key, end_key)
-            return [self._format_record_to_csv(r) for r in raw_results]
+            return self._format_records_to_csv(raw_results)
         
         return []
 
@@ -634,6 +1204,7 @@ class Engine:
         if not hasattr(idx, 'remove'):
             raise NotImplementedError(f"El índice {type(idx).__name__} no soporta eliminación")
         
+        self._invalidate_table_cache(table)
         try:
             raw_results = idx.remove(key)
             
@@ -660,5 +1231,5 @@ class Engine:
             return formatted_results
             
         except Exception as e:
-            print(f"Error eliminando registros: {e}")
+            logger.warning("Error eliminando registros: %s", e)
             return []
\ No newline at end of file
@@ -6,6 +6,16 @@ Script para arreglar las rutas en el CSV del dataset Fashion
 import os
 import pandas as pd
 
+# Filas por bloque al escribir los CSV corregidos
+CSV_WRITE_CHUNK = 50_000
+
+def read_metadata_csv(csv_file, **kwargs):
+    """Lee el CSV con el lector multihilo de pyarrow; si no está (o no acepta las opciones), con el de C"""
+    try:
+        return pd.read_csv(csv_file, engine='pyarrow', **kwargs)
+    except (ImportError, ValueError):
+        return pd.read_csv(csv_file, **kwargs)
+
 def fix_fashion_csv_paths():
     """Arregla las rutas en los CSV del dataset Fashion"""
     print(" Arreglando rutas del dataset Fashion...")
@@ -27,7 +37,9 @@ def fix_fashion_csv_paths():
     
     # Verificar cuántas imágenes hay
     try:
-        image_files = [f for f in os.listdir(images_dir) if f.endswith('.jpg')]
+        # Un solo listado del directorio; las filas se verifican contra este set (sin un stat por fila)
+        existing = set(os.listdir(images_dir))
+        image_files = [f for f in existing if f.endswith('.jpg')]
         print(f"📷 Imágenes encontradas en {images_dir}: {len(image_files)}")
     except Exception as e:
         print(f" Error leyendo directorio de imágenes: {e}")
@@ -44,21 +56,22 @@ def fix_fashion_csv_paths():
         try:
             print(f"\n Procesando: {csv_file}")
             
-            # Leer CSV
-            df = pd.read_csv(csv_file)
-            print(f"    Filas: {len(df)}")
-            print(f"    Columnas: {list(df.columns)}")
-            
-            # Identificar columna de archivos
+            # Identificar columna de archivos leyendo solo la cabecera
             filename_col = None
             path_col = None
             
-            for col in df.columns:
+            for col in pd.read_csv(csv_file, nrows=0).columns:
                 if 'filename' in col.lower():
                     filename_col = col
                 elif 'path' in col.lower() and 'image' in col.lower():
                     path_col = col
             
+            # Leer CSV: filename como texto (sin inferir tipo, conserva ceros a la izquierda);
+            # el resto de columnas solo se reescribe
+            df = read_metadata_csv(csv_file, dtype={filename_col: str} if filename_col else None)
+            print(f"    Filas: {len(df)}")
+            print(f"    Columnas: {list(df.columns)}")
+            
             if not filename_col:
                 print(f"    No se encontró columna 'filename'")
                 continue
@@ -69,28 +82,19 @@ def fix_fashion_csv_paths():
             
             # Mostrar rutas actuales
             print(f"    Rutas actuales (primeras 3):")
-            for i in range(min(3, len(df))):
-                filename = df.iloc[i][filename_col]
-                current_path = df.iloc[i][path_col] if path_col else 'N/A'
-                print(f"      {i+1}. filename: {filename}, path: {current_path}")
-            
-            # Construir rutas correctas
-            correct_paths = []
-            valid_images = 0
-            
-            for _, row in df.iterrows():
-                filename = row[filename_col]
-                if pd.isna(filename):
-                    correct_paths.append('')
-                    continue
-                    
-                # Construir ruta completa
-                full_path = os.path.join(images_dir, filename)
-                correct_paths.append(full_path)
-                
-                # Verificar si la imagen existe
-                if os.path.exists(full_path):
-                    valid_images += 1
+            preview = df.head(3)
+            current_paths = preview[path_col] if path_col else ['N/A'] * len(preview)
+            for i, (filename, current_path) in enumerate(zip(preview[filename_col], current_paths), 1):
+                print(f"      {i}. filename: {filename}, path: {current_path}")
+            
+            # Construir rutas correctas (vectorizado: sin armar un Series por fila)
+            filenames = df[filename_col]
+            missing = filenames.isna()
+            correct_paths = (images_dir + os.sep + filenames.astype(str)).mask(missing, '')
+            
+            # Verificar qué imágenes existen (búsqueda en el listado del directorio)
+            found = filenames.astype(str).isin(existing) & ~missing
+            valid_images = int(found.sum())
             
             # Actualizar o crear columna image_path
             df['image_path'] = correct_paths
@@ -100,14 +104,13 @@ def fix_fashion_csv_paths():
             
             # Mostrar rutas corregidas
             print(f"    Rutas corregidas (primeras 3):")
-            for i in range(min(3, len(df))):
-                path = df.iloc[i]['image_path']
-                exists = "" if os.path.exists(path) else ""
-                print(f"      {i+1}. {exists} {path}")
+            for i, (path, ok) in enumerate(zip(df['image_path'].head(3), found.head(3)), 1):
+                exists = "" if ok else ""
+                print(f"      {i}. {exists} {path}")
             
             # Crear versión corregida
             fixed_filename = csv_file.replace('.csv', '_fixed.csv')
-            df.to_csv(fixed_filename, index=False)
+            df.to_csv(fixed_filename, index=False, chunksize=CSV_WRITE_CHUNK)
             
             print(f"    Guardado como: {fixed_filename}")
             fixed_files.append((fixed_filename, valid_images, len(df)))
@@ -115,12 +118,12 @@ def fix_fashion_csv_paths():
             # Si hay suficientes imágenes válidas, crear versión funcional
             if valid_images >= 10:
                 # Filtrar solo filas con imágenes válidas
-                valid_df = df[df['image_path'].apply(os.path.exists)].copy()
+                valid_df = df[found].copy()
                 
                 # Crear versión pequeña para pruebas
                 small_df = valid_df.head(20)
                 small_filename = csv_file.replace('.csv', '_working_20.csv')
-                small_df.to_csv(small_filename, index=False)
+                small_df.to_csv(small_filename, index=False, chunksize=CSV_WRITE_CHUNK)
                 
                 print(f"    Versión funcional (20 imágenes): {small_filename}")
                 fixed_files.append((small_filename, len(small_df), len(small_df)))
@@ -4,8 +4,26 @@ Script para arreglar las rutas en los CSV del dataset FMA
 """
 
 import os
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
-import glob
+
+# Filas por bloque al escribir los CSV corregidos
+CSV_WRITE_CHUNK = 50_000
+
+# Subdirectorios listados a la vez al armar el mapeo de archivos
+SCAN_WORKERS = 16
+
+def read_metadata_csv(csv_file, **kwargs):
+    """Lee el CSV con el lector multihilo de pyarrow; si no está (o no acepta las opciones), con el de C"""
+    try:
+        return pd.read_csv(csv_file, engine='pyarrow', **kwargs)
+    except (ImportError, ValueError):
+        return pd.read_csv(csv_file, **kwargs)
+
+def list_mp3_files(subdir_path):
+    """Rutas de los .mp3 de un directorio en una sola lectura (DirEntry ya trae el tipo, sin stat extra)"""
+    with os.scandir(subdir_path) as entries:
+        return [e.path for e in entries if e.name.endswith('.mp3') and e.is_file()]
 
 def check_fma_structure():
     """Verifica la estructura del dataset FMA"""
@@ -24,7 +42,7 @@ def check_fma_structure():
     sample_files = []
     for subdir in subdirs[:3]:  # Solo primeros 3 directorios
         subdir_path = os.path.join(fma_dir, subdir)
-        mp3_files = glob.glob(os.path.join(subdir_path, "*.mp3"))
+        mp3_files = list_mp3_files(subdir_path)
         sample_files.extend(mp3_files[:2])  # 2 archivos por directorio
         print(f"   {subdir}/: {len(mp3_files)} archivos .mp3")
     
@@ -59,16 +77,18 @@ def fix_fma_csv_paths():
     print(" Creando mapeo de archivos...")
     file_mapping = {}
     
-    subdirs = [d for d in os.listdir(fma_dir) if os.path.isdir(os.path.join(fma_dir, d)) and d.isdigit()]
-    for subdir in subdirs:
-        subdir_path = os.path.join(fma_dir, subdir)
-        mp3_files = glob.glob(os.path.join(subdir_path, "*.mp3"))
-        
-        for mp3_file in mp3_files:
-            filename = os.path.basename(mp3_file)
-            file_mapping[filename] = mp3_file
+    # Subdirectorios numéricos del primer nivel, listados en paralelo: cada listado
+    # espera al sistema de archivos sin el GIL, así se solapan sus latencias
+    with os.scandir(fma_dir) as entries:
+        subdirs = [e.path for e in entries if e.name.isdigit() and e.is_dir()]
+    with ThreadPoolExecutor(max_workers=SCAN_WORKERS) as pool:
+        # map conserva el orden de los subdirectorios (mismo resultado que en serie)
+        for mp3_files in pool.map(list_mp3_files, subdirs):
+            file_mapping.update((os.path.basename(mp3_file), mp3_file) for mp3_file in mp3_files)
     
     print(f" Mapeo creado: {len(file_mapping)} archivos")
+    # Tabla de referencia filename -> ruta para resolver cada CSV con un join en C
+    reference = pd.Series(file_mapping, dtype=object)
     
     # Procesar cada CSV
     fixed_files = []
@@ -81,21 +101,22 @@ def fix_fma_csv_paths():
         try:
             print(f"\n Procesando: {csv_file}")
             
-            # Leer CSV
-            df = pd.read_csv(csv_file)
-            print(f"    Filas: {len(df)}")
-            print(f"    Columnas: {list(df.columns)}")
-            
-            # Identificar columna de archivos
+            # Identificar columna de archivos leyendo solo la cabecera
             filename_col = None
             path_col = None
             
-            for col in df.columns:
+            for col in pd.read_csv(csv_file, nrows=0).columns:
                 if 'filename' in col.lower():
                     filename_col = col
                 elif 'path' in col.lower() and 'audio' in col.lower():
                     path_col = col
             
+            # Leer CSV: filename como texto (sin inferir tipo, conserva ceros a la izquierda);
+            # el resto de columnas solo se reescribe
+            df = read_metadata_csv(csv_file, dtype={filename_col: str} if filename_col else None)
+            print(f"    Filas: {len(df)}")
+            print(f"    Columnas: {list(df.columns)}")
+            
             if not filename_col:
                 print(f"    No se encontró columna 'filename'")
                 continue
@@ -104,33 +125,16 @@ def fix_fma_csv_paths():
             if path_col:
                 print(f"    Columna path existente: {path_col}")
             
-            # Construir rutas correctas
-            correct_paths = []
-            valid_audio = 0
-            
-            for _, row in df.iterrows():
-                filename = row[filename_col]
-                if pd.isna(filename):
-                    correct_paths.append('')
-                    continue
-                
-                # Buscar archivo en el mapeo
-                if filename in file_mapping:
-                    full_path = file_mapping[filename]
-                    correct_paths.append(full_path)
-                    valid_audio += 1
-                else:
-                    # Intentar buscar agregando .mp3 si no lo tiene
-                    if not filename.endswith('.mp3'):
-                        filename_with_ext = filename + '.mp3'
-                        if filename_with_ext in file_mapping:
-                            full_path = file_mapping[filename_with_ext]
-                            correct_paths.append(full_path)
-                            valid_audio += 1
-                        else:
-                            correct_paths.append('')
-                    else:
-                        correct_paths.append('')
+            # Construir rutas correctas con un solo join contra la referencia: todas sus
+            # claves terminan en .mp3, así que basta agregarlo a los nombres que no lo tienen
+            filenames = df[filename_col]
+            missing = filenames.isna()
+            names = filenames.astype(str)
+            names = names.where(names.str.endswith('.mp3'), names + '.mp3')
+            correct_paths = names.map(reference).mask(missing).fillna('')
+            # Las rutas del mapeo salen del listado del directorio: existen sin hacer stat
+            found = correct_paths != ''
+            valid_audio = int(found.sum())
             
             # Actualizar o crear columna audio_path
             df['audio_path'] = correct_paths
@@ -140,18 +144,17 @@ def fix_fma_csv_paths():
             
             # Mostrar rutas corregidas
             print(f"    Rutas corregidas (primeras 3):")
-            for i in range(min(3, len(df))):
-                path = df.iloc[i]['audio_path']
+            for i, path in enumerate(df['audio_path'].head(3), 1):
                 if path:
                     exists = "" if os.path.exists(path) else ""
                     filename = os.path.basename(path)
-                    print(f"      {i+1}. {exists} {filename}")
+                    print(f"      {i}. {exists} {filename}")
                 else:
-                    print(f"      {i+1}.  Sin ruta")
+                    print(f"      {i}.  Sin ruta")
             
             # Crear versión corregida
             fixed_filename = csv_file.replace('.csv', '_fixed.csv')
-            df.to_csv(fixed_filename, index=False)
+            df.to_csv(fixed_filename, index=False, chunksize=CSV_WRITE_CHUNK)
             
             print(f"    Guardado como: {fixed_filename}")
             fixed_files.append((fixed_filename, valid_audio, len(df)))
@@ -159,12 +162,12 @@ def fix_fma_csv_paths():
             # Si hay suficientes archivos válidos, crear versión funcional
             if valid_audio >= 10:
                 # Filtrar solo filas con archivos válidos
-                valid_df = df[df['audio_path'].apply(lambda x: x and os.path.exists(x))].copy()
+                valid_df = df[found].copy()
                 
                 # Crear versión pequeña para pruebas
                 small_df = valid_df.head(20)
                 small_filename = csv_file.replace('.csv', '_working_20.csv')
-                small_df.to_csv(small_filename, index=False)
+                small_df.to_csv(small_filename, index=False, chunksize=CSV_WRITE_CHUNK)
                 
                 print(f"    Versión funcional (20 archivos): {small_filename}")
                 fixed_files.append((small_filename, len(small_df), len(small_df)))
@@ -243,7 +246,7 @@ def create_minimal_working_dataset():
     
     for subdir in sorted(subdirs)[:3]:  # Solo primeros 3 directorios
         subdir_path = os.path.join(fma_dir, subdir)
-        mp3_files = glob.glob(os.path.join(subdir_path, "*.mp3"))
+        mp3_files = list_mp3_files(subdir_path)
         
         for mp3_file in mp3_files[:10]:  # Máximo 10 por directorio
             filename = os.path.basename(mp3_file)
@@ -275,10 +278,7 @@ def create_minimal_working_dataset():
         print(f" {len(df)} archivos de audio válidos")
         
         # Verificar archivos
-        valid_count = 0
-        for _, row in df.iterrows():
-            if os.path.exists(row['audio_path']):
-                valid_count += 1
+        valid_count = int(df['audio_path'].map(os.path.exists).sum())
         
         print(f" {valid_count}/{len(df)} archivos verificados")
         
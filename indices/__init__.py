@@ -1,84 +1,50 @@
 """
 Índices del proyecto de base de datos multimedia
-"""
-
-# Imports de índices base (siempre disponibles)
-try:
-    from .base_index import BaseIndex
-    BASE_INDEX_AVAILABLE = True
-except ImportError:
-    BaseIndex = None
-    BASE_INDEX_AVAILABLE = False
-
-# Imports de índices principales (usando nombres reales de tus clases)
-try:
-    from .sequential import SequentialFile  # Es SequentialFile, no SequentialIndex
-    SEQUENTIAL_AVAILABLE = True
-except ImportError:
-    SequentialFile = None
-    SEQUENTIAL_AVAILABLE = False
-
-try:
-    from .btree import BPlusTree  # Es BPlusTree, no BTreeIndex
-    BTREE_AVAILABLE = True
-except ImportError:
-    BPlusTree = None
-    BTREE_AVAILABLE = False
-
-try:
-    from .hash_extensible import ExtendibleHash  # Es ExtendibleHash, no ExtensibleHashIndex
-    HASH_AVAILABLE = True
-except ImportError:
-    ExtendibleHash = None
-    HASH_AVAILABLE = False
 
-try:
-    from .isam import ISAM  # Es ISAM, no ISAMIndex
-    ISAM_AVAILABLE = True
-except ImportError:
-    ISAM = None
-    ISAM_AVAILABLE = False
-
-try:
-    from .rtree import MultidimensionalRTree  # Es MultidimensionalRTree, no RTreeIndex
-    RTREE_AVAILABLE = True
-except ImportError:
-    MultidimensionalRTree = None
-    RTREE_AVAILABLE = False
-
-# Imports de nuevos índices (con manejo de errores)
-try:
-    from .inverted_index import InvertedIndex
-    INVERTED_INDEX_AVAILABLE = True
-except ImportError as e:
-    print(f"Info: InvertedIndex no disponible: {e}")
-    InvertedIndex = None
-    INVERTED_INDEX_AVAILABLE = False
-
-try:
-    from .spimi import SPIMIIndexBuilder
-    SPIMI_AVAILABLE = True
-except ImportError as e:
-    print(f"Info: SPIMI no disponible: {e}")
-    SPIMIIndexBuilder = None
-    SPIMI_AVAILABLE = False
-
-# Lista dinámica de exports (usando nombres reales)
-__all__ = []
+Las clases se importan recién cuando se usan (PEP 562): importar un submódulo,
+p.ej. ``indices.btree``, ya no carga todos los demás índices ni sus dependencias
+(numpy, scipy, numba de los índices de texto). Si falta la dependencia de un
+índice, su nombre vale None y su bandera ``*_AVAILABLE`` es False, como antes.
+"""
 
-if BASE_INDEX_AVAILABLE:
-    __all__.append('BaseIndex')
-if SEQUENTIAL_AVAILABLE:
-    __all__.append('SequentialFile')  # Nombre real
-if BTREE_AVAILABLE:
-    __all__.append('BPlusTree')  # Nombre real
-if HASH_AVAILABLE:
-    __all__.append('ExtendibleHash')  # Nombre real
-if ISAM_AVAILABLE:
-    __all__.append('ISAM')  # Nombre real
-if RTREE_AVAILABLE:
-    __all__.append('MultidimensionalRTree')  # Nombre real
-if INVERTED_INDEX_AVAILABLE:
-    __all__.append('InvertedIndex')
-if SPIMI_AVAILABLE:
-    __all__.append('SPIMIIndexBuilder')
\ No newline at end of file
+import importlib
+
+# Nombre exportado -> (submódulo, bandera de disponibilidad, avisar si no se puede importar)
+_LAZY_EXPORTS = {
+    'BaseIndex': ('.base_index', 'BASE_INDEX_AVAILABLE', False),
+    'SequentialFile': ('.sequential', 'SEQUENTIAL_AVAILABLE', False),  # Es SequentialFile, no SequentialIndex
+    'BPlusTree': ('.btree', 'BTREE_AVAILABLE', False),  # Es BPlusTree, no BTreeIndex
+    'ExtendibleHash': ('.hash_extensible', 'HASH_AVAILABLE', False),  # Es ExtendibleHash, no ExtensibleHashIndex
+    'ISAM': ('.isam', 'ISAM_AVAILABLE', False),  # Es ISAM, no ISAMIndex
+    'MultidimensionalRTree': ('.rtree', 'RTREE_AVAILABLE', False),  # Es MultidimensionalRTree, no RTreeIndex
+    'InvertedIndex': ('.inverted_index', 'INVERTED_INDEX_AVAILABLE', True),
+    'SPIMIIndexBuilder': ('.spimi', 'SPIMI_AVAILABLE', True),
+}
+_FLAGS = {flag: name for name, (_, flag, _) in _LAZY_EXPORTS.items()}
+
+__all__ = list(_LAZY_EXPORTS)
+
+
+def __getattr__(name):
+    if name in _FLAGS:
+        # La bandera se conoce al intentar importar su clase
+        __getattr__(_FLAGS[name])
+        return globals()[name]
+    if name not in _LAZY_EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    module_name, flag, report = _LAZY_EXPORTS[name]
+    try:
+        value = getattr(importlib.import_module(module_name, __name__), name)
+    except ImportError as e:
+        if report:
+            print(f"Info: {name} no disponible: {e}")
+        value = None
+    # Se guarda en el módulo: los accesos siguientes no vuelven a pasar por aquí
+    globals()[name] = value
+    globals()[flag] = value is not None
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_EXPORTS) | set(_FLAGS))
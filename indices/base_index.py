@@ -1,5 +1,12 @@
+import queue
+import threading
 from abc import ABC, abstractmethod
-from typing import List
+from itertools import islice
+from typing import Any, Iterable, Iterator, List
+
+# Carga productor/consumidor: filas por bloque y bloques en vuelo como máximo
+LOAD_CHUNK_ROWS = 10_000
+LOAD_QUEUE_CHUNKS = 4
 
 class BaseIndex(ABC):
     """
@@ -18,6 +25,61 @@ class BaseIndex(ABC):
         """Devuelve todos los registros como lista de strings."""
         pass
 
+    def insert_bulk(self, rows: Iterable[Any]) -> None:
+        """Inserta varios registros; override si el índice puede agruparlos."""
+        for row in rows:
+            self.insert(None, row)
+
+    def insert_pipelined(self, rows: Iterable[Any], chunk_rows: int = LOAD_CHUNK_ROWS) -> None:
+        """
+        Inserta ``rows`` con un pipeline productor/consumidor: un hilo consume el
+        iterable (lectura y parseo del CSV) en bloques de ``chunk_rows`` mientras
+        el hilo que llama los pasa a ``insert_bulk``. El índice solo se modifica
+        desde el hilo que llama, así que no necesita ser thread-safe.
+        """
+        chunks: queue.Queue = queue.Queue(maxsize=LOAD_QUEUE_CHUNKS)
+        done = object()
+        failure: List[BaseException] = []
+        stop = threading.Event()
+        iterator = iter(rows)
+
+        def produce():
+            try:
+                while not stop.is_set():
+                    chunk = list(islice(iterator, chunk_rows))
+                    if not chunk:
+                        break
+                    chunks.put(chunk)
+            except BaseException as e:
+                failure.append(e)
+            finally:
+                chunks.put(done)
+
+        producer = threading.Thread(target=produce, name='load-csv-producer', daemon=True)
+        producer.start()
+        try:
+            while True:
+                chunk = chunks.get()
+                if chunk is done:
+                    break
+                self.insert_bulk(chunk)
+        finally:
+            # Si el consumidor falló, liberar la cola para que el productor no quede bloqueado
+            stop.set()
+            while producer.is_alive():
+                try:
+                    chunks.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            producer.join()
+
+        if failure:
+            raise failure[0]
+
+    def iter_all(self) -> Iterator[Any]:
+        """Itera los registros uno a uno; override para no materializar la lista."""
+        yield from self.scan_all()
+
     def load_csv(self, path: str) -> None:
         """Carga un CSV; override en índices que lo soportan."""
         raise NotImplementedError("Este índice no soporta 'load_csv'.")
@@ -26,6 +88,11 @@ class BaseIndex(ABC):
         """Búsqueda por clave exacta; override si se soporta."""
         raise NotImplementedError("Este índice no soporta 'search'.")
 
+    def search_column(self, column: int, key: str) -> List[Any]:
+        """Búsqueda exacta sobre una columna arbitraria; override si el índice
+        puede resolverla sin que el Engine haga un full scan."""
+        raise NotImplementedError("Este índice no soporta 'search_column'.")
+
     def range_search(self, begin, end) -> List[str]:
         """Búsqueda por rango; override si se soporta."""
         raise NotImplementedError("Este índice no soporta 'range_search'.")
@@ -1,31 +1,210 @@
+import csv
+import logging
 import os
 import pickle
-from typing import Optional
+import re
+import struct
+from bisect import bisect_left, bisect_right
+from operator import itemgetter, methodcaller
+from typing import Iterator, List, Optional
 from indices.base_index import BaseIndex
 
-ORDER = 4
+try:
+    import lz4.frame
+    LZ4_AVAILABLE = True
+except ImportError:
+    lz4 = None
+    LZ4_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Hijos por nodo interno por defecto (las hojas guardan ORDER - 1 filas): con nodos
+# anchos el árbol queda de pocos niveles y cada búsqueda es un bisect por nivel
+ORDER = 128
+
+# Log de cambios puntuales (insert/remove) junto al snapshot del árbol: cada
+# operación agrega un registro en vez de reescribir el pickle completo
+WAL_SUFFIX = '.wal'
+WAL_SNAPSHOT_OPS = 10_000   # registros en el log antes de rehacer el snapshot
+WAL_INSERT = 1
+WAL_REMOVE = 2
+_WAL_HEADER = struct.Struct('<I')  # largo del registro pickleado (op, clave, valor)
+
+# Los snapshots se comprimen con lz4 si está instalado; al cargar se detecta por su firma
+_LZ4_MAGIC = b'\x04\x22\x4d\x18'
+
+# Detecta valores que deben ir entre comillas al serializar la fila
+_NEEDS_QUOTE = re.compile(r'[,"\n]').search
+
+def _sort_key(key):
+    """Clave de orden (grupo, valor): números (int y float juntos) antes que strings,
+    comparable aunque se mezclen tipos."""
+    return (1, key) if isinstance(key, str) else (0, key)
 
 class BTreeNode:
+    # Sin __dict__ por nodo: menos memoria por nodo y un pickle más chico
+    __slots__ = ('keys', 'values', 'children', 'is_leaf', 'next')
+
     def __init__(self, is_leaf=True):
-        self.keys = []  # lista de tuplas (key, value)
+        # Estructura de arreglos: las claves de orden en una lista (búsqueda con bisect,
+        # en C) y, en las hojas, la fila CSV de cada clave en una lista paralela
+        self.keys = []
+        self.values = []
         self.children = []
         self.is_leaf = is_leaf
         self.next = None
 
+    def __getstate__(self):
+        # Sin el enlace a la hoja siguiente: pickle seguiría la cadena de hojas en
+        # recursión (RecursionError en árboles grandes); se rearma al cargar
+        return self.keys, self.values, self.children, self.is_leaf
+
+    def __setstate__(self, state):
+        if isinstance(state, dict):
+            # Snapshots guardados antes de __slots__ (con __dict__); en los más
+            # antiguos falta 'values' y el árbol se reconstruye al abrirlo
+            for name, value in state.items():
+                setattr(self, name, value)
+            if not hasattr(self, 'next'):
+                self.next = None
+            return
+        self.keys, self.values, self.children, self.is_leaf = state
+        self.next = None
+
 class BPlusTree(BaseIndex):
-    def __init__(self, path='embeddings/btree_index.pkl'):
+    def __init__(self, path='embeddings/btree_index.pkl', autosave=True, order=ORDER):
+        if order < 3:
+            raise ValueError("El orden del B+ Tree debe ser al menos 3")
         self.path = path
+        self.order = order
         self.field_index = 0  # será sobrescrito por el Engine si es necesario
+        # Con autosave=False (o dentro de un bloque with) los cambios quedan en
+        # memoria hasta flush(): una sola escritura del pickle por lote
+        self.autosave = autosave
+        self._autosave_outer = autosave  # valor a restaurar al salir del bloque with
+        self._dirty = False
+        self._wal = None
+        self._wal_ops = 0
         if os.path.exists(self.path):
-            with open(self.path, 'rb') as f:
-                self.root = pickle.load(f)
+            self.root = self._load_snapshot()
+            if not hasattr(self.root, 'values'):
+                self._upgrade_legacy_tree()
+            else:
+                self._link_leaves()
         else:
             self.root = BTreeNode()
             self._save()
+        self._replay_wal()
 
     def _save(self):
-        with open(self.path, 'wb') as f:
-            pickle.dump(self.root, f)
+        """Snapshot completo del árbol; el log queda vacío porque el snapshot ya lo incluye."""
+        tmp_path = self.path + '.tmp'
+        with (lz4.frame.open if LZ4_AVAILABLE else open)(tmp_path, 'wb') as f:
+            pickle.dump(self.root, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.path)
+        if self._wal is not None:
+            self._wal.close()
+            self._wal = None
+        if os.path.exists(self.path + WAL_SUFFIX):
+            os.remove(self.path + WAL_SUFFIX)
+        self._wal_ops = 0
+
+    def _load_snapshot(self):
+        with open(self.path, 'rb') as f:
+            compressed = f.read(len(_LZ4_MAGIC)) == _LZ4_MAGIC
+        if compressed and not LZ4_AVAILABLE:
+            raise ImportError(f"El índice {self.path} está comprimido con lz4 y lz4 no está instalado")
+        with (lz4.frame.open if compressed else open)(self.path, 'rb') as f:
+            return pickle.load(f)
+
+    def _link_leaves(self):
+        """Reenlaza las hojas de izquierda a derecha (el snapshot no guarda ``next``)."""
+        leaves = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if node.is_leaf:
+                leaves.append(node)
+            else:
+                stack.extend(reversed(node.children))
+        for left, right in zip(leaves, leaves[1:]):
+            left.next = right
+        leaves[-1].next = None
+
+    def _upgrade_legacy_tree(self):
+        """Árboles guardados con tuplas (clave, fila) en las hojas: se reconstruyen con la estructura actual."""
+        node = self.root
+        while not node.is_leaf:
+            node = node.children[0]
+        entries = []
+        while node:
+            entries.extend(node.keys)
+            node = node.next
+        self.root = BTreeNode()
+        self._build_packed(entries)
+        self._dirty = True
+
+    def _replay_wal(self):
+        """Aplica sobre el snapshot los cambios registrados después de él."""
+        wal_path = self.path + WAL_SUFFIX
+        if not os.path.exists(wal_path):
+            return
+        with open(wal_path, 'rb') as f:
+            data = f.read()
+        pos = 0
+        while pos + _WAL_HEADER.size <= len(data):
+            (length,) = _WAL_HEADER.unpack_from(data, pos)
+            end = pos + _WAL_HEADER.size + length
+            if end > len(data):
+                break  # registro incompleto (escritura cortada)
+            op, key, value = pickle.loads(data[pos + _WAL_HEADER.size:end])
+            if op == WAL_INSERT:
+                self._insert_entry(key, value)
+            elif op == WAL_REMOVE:
+                self._remove_key(key)
+            pos = end
+            self._wal_ops += 1
+        if pos < len(data):
+            # Recortar la cola cortada para que los próximos registros queden legibles
+            with open(wal_path, 'r+b') as f:
+                f.truncate(pos)
+        self._dirty = self._dirty or self._wal_ops > 0
+
+    def _log(self, op, key, value=None):
+        """Registra un cambio puntual: con autosave va al log, sin reescribir el snapshot."""
+        self._dirty = True
+        if not self.autosave:
+            return
+        if self._wal is None:
+            self._wal = open(self.path + WAL_SUFFIX, 'ab')
+        record = pickle.dumps((op, key, value), protocol=pickle.HIGHEST_PROTOCOL)
+        self._wal.write(_WAL_HEADER.pack(len(record)) + record)
+        self._wal.flush()
+        self._wal_ops += 1
+        if self._wal_ops >= WAL_SNAPSHOT_OPS:
+            self.flush()
+
+    def _mark_dirty(self):
+        """Registra un cambio en bloque y lo persiste de inmediato solo si autosave está activo."""
+        self._dirty = True
+        if self.autosave:
+            self.flush()
+
+    def flush(self):
+        """Escribe el snapshot del árbol si tiene cambios pendientes (y vacía el log)."""
+        if self._dirty:
+            self._save()
+            self._dirty = False
+
+    def __enter__(self):
+        self._autosave_outer = self.autosave
+        self.autosave = False
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.autosave = self._autosave_outer
+        self.flush()
+        return False
 
     def _parse_key(self, k):
         """Convierte la clave a int si es posible, si no la deja como string."""
@@ -42,77 +221,113 @@ class BPlusTree(BaseIndex):
                 # Si no es numérico, mantener como string pero limpiar espacios
                 return str(k).strip()
 
-    def _compare_keys(self, key1, key2):
-        """Compara dos claves de manera segura, manejando tipos diferentes."""
-        # Si ambas son del mismo tipo, comparar directamente
-        if type(key1) == type(key2):
-            return key1 < key2, key1 == key2, key1 > key2
-        
-        # Si una es numérica y otra string, convertir ambas a string para comparar
-        str1 = str(key1)
-        str2 = str(key2)
-        return str1 < str2, str1 == str2, str1 > str2
-
     def search(self, key):
         """Devolver filas completas parseadas como arrays, no strings CSV"""
-        key = self._parse_key(key)
+        target = _sort_key(self._parse_key(key))
         result = []
         
-        # Buscar en todas las hojas para manejar duplicados correctamente
-        node = self.root
-        # Ir a la primera hoja
-        while not node.is_leaf:
-            node = node.children[0]
-        
-        # Recorrer todas las hojas
+        # Bajar a la primera hoja que puede tener la clave; los duplicados pueden
+        # seguir en las hojas siguientes
+        node = self._find_leaf(target)
         while node:
-            for k, v in node.keys:
-                _, equals, _ = self._compare_keys(key, k)
-                if equals:
-                    # CAMBIO CRÍTICO: Parsear el CSV string a array
-                    parsed_row = self._parse_csv_to_array(v)
-                    result.append(parsed_row)
+            lo = bisect_left(node.keys, target)
+            hi = bisect_right(node.keys, target, lo)
+            result.extend(self._parse_rows(node.values[lo:hi]))
+            if hi < len(node.keys):  # apareció una clave mayor
+                break
             node = node.next
             
-        print(f" B+Tree search - devolviendo {len(result)} arrays")
+        logger.debug("B+Tree search - devolviendo %d arrays", len(result))
         return result
 
+    def _find_leaf(self, target):
+        """Hoja más a la izquierda que puede contener ``target`` (clave de orden)."""
+        node = self.root
+        while not node.is_leaf:
+            # Con duplicados, claves iguales al separador pueden quedar en el hijo izquierdo
+            node = node.children[bisect_left(node.keys, target)]
+        return node
+
+    def search_column(self, column, key):
+        """Solo la columna indexada se resuelve directamente en el árbol"""
+        if column != self.field_index:
+            raise NotImplementedError("B+ Tree solo busca directamente por su campo indexado")
+        return self.search(key)
+
     def range_search(self, start_key, end_key):
         """Devolver filas completas parseadas como arrays"""
-        start_key = self._parse_key(start_key)
-        end_key = self._parse_key(end_key)
+        start = _sort_key(self._parse_key(start_key))
+        end = _sort_key(self._parse_key(end_key))
         
         result = []
-        node = self.root
-        
-        # Navegar hasta la hoja que contiene start_key
-        while not node.is_leaf:
-            i = 0
-            while i < len(node.keys):
-                _, _, greater = self._compare_keys(start_key, node.keys[i][0])
-                if not greater:  # start_key <= node.keys[i][0]
-                    break
-                i += 1
-            node = node.children[i]
-
-        # Recorrer las hojas buscando claves en el rango
+        # Navegar hasta la hoja que contiene start_key y recorrer las hojas
+        # tomando de cada una el tramo [start, end] con dos búsquedas binarias
+        node = self._find_leaf(start)
         while node:
-            for k, v in node.keys:
-                less_than_start, _, _ = self._compare_keys(k, start_key)
-                _, _, greater_than_end = self._compare_keys(k, end_key)
-                
-                if not less_than_start and not greater_than_end:  # start_key <= k <= end_key
-                    # CAMBIO CRÍTICO: Parsear el CSV string a array
-                    parsed_row = self._parse_csv_to_array(v)
-                    result.append(parsed_row)
-                elif greater_than_end:  # k > end_key
-                    return result
+            lo = bisect_left(node.keys, start)
+            hi = bisect_right(node.keys, end, lo)
+            result.extend(self._parse_rows(node.values[lo:hi]))
+            if hi < len(node.keys):  # k > end_key
+                break
             node = node.next
         
-        print(f" B+Tree range_search - devolviendo {len(result)} arrays")
+        logger.debug("B+Tree range_search - devolviendo %d arrays", len(result))
         return result
 
     def insert(self, _, values):
+        key, value = self._insert_row(values)
+        self._log(WAL_INSERT, key, value)
+
+    def insert_bulk(self, rows):
+        """Inserta un bloque de filas guardando el árbol una sola vez al final."""
+        if not self.root.keys and self.root.is_leaf:
+            # Árbol vacío: construcción empaquetada de abajo hacia arriba
+            self._build_packed(self._row_entry(values) for values in rows)
+        else:
+            for values in rows:
+                self._insert_row(values)
+        self._mark_dirty()
+
+    def _build_packed(self, entries):
+        """Ordena las entradas una vez y llena hojas e internos por niveles (sin splits)."""
+        # Orden estable: las claves repetidas conservan el orden de llegada
+        entries = sorted(((_sort_key(key), value) for key, value in entries), key=itemgetter(0))
+        if not entries:
+            return
+        fill = self.order - 1
+        sort_keys = [key for key, _ in entries]
+        values = [value for _, value in entries]
+
+        # Hojas llenas y enlazadas en orden
+        level = []
+        for start in range(0, len(entries), fill):
+            leaf = BTreeNode(is_leaf=True)
+            leaf.keys = sort_keys[start:start + fill]
+            leaf.values = values[start:start + fill]
+            if level:
+                level[-1].next = leaf
+            level.append(leaf)
+
+        # Niveles internos: hasta self.order hijos por nodo; la clave separadora es la
+        # primera entrada del subárbol derecho, igual que al partir una hoja
+        firsts = [leaf.keys[0] for leaf in level]
+        while len(level) > 1:
+            groups = [list(range(i, min(i + self.order, len(level)))) for i in range(0, len(level), self.order)]
+            if len(groups) > 1 and len(groups[-1]) == 1:
+                # Un interno no puede quedar con un solo hijo: tomar uno del grupo anterior
+                groups[-1].insert(0, groups[-2].pop())
+            parents, parent_firsts = [], []
+            for group in groups:
+                node = BTreeNode(is_leaf=False)
+                node.children = [level[i] for i in group]
+                node.keys = [firsts[i] for i in group[1:]]
+                parents.append(node)
+                parent_firsts.append(firsts[group[0]])
+            level, firsts = parents, parent_firsts
+        self.root = level[0]
+
+    def _row_entry(self, values):
+        """Par (clave, fila CSV completa) que se guarda en las hojas."""
         # Usar self.field_index para determinar qué columna indexar
         if len(values) <= self.field_index:
             raise ValueError(f"El registro no tiene suficientes columnas. Se esperaba al menos {self.field_index + 1}, pero tiene {len(values)}")
@@ -121,48 +336,48 @@ class BPlusTree(BaseIndex):
         
         # CAMBIO: Guardar la fila COMPLETA como value en formato CSV
         # En lugar de excluir la columna indexada
-        cleaned_values = []
-        for v in values:
-            cleaned = str(v).strip()
-            # Escapar comillas y comas para CSV
-            if ',' in cleaned or '"' in cleaned or '\n' in cleaned:
-                cleaned = '"' + cleaned.replace('"', '""') + '"'
-            cleaned_values.append(cleaned)
-        
+        cleaned_values = [str(v).strip() for v in values]
         value = ','.join(cleaned_values)  # Fila completa en CSV
         
+        # Una sola revisión de la fila unida: si solo tiene los separadores y ninguna
+        # comilla ni salto de línea, ningún valor necesita comillas (caso común)
+        if value.count(',') != len(cleaned_values) - 1 or '"' in value or '\n' in value:
+            # Escapar comillas y comas para CSV
+            value = ','.join('"' + cleaned.replace('"', '""') + '"' if _NEEDS_QUOTE(cleaned) else cleaned
+                             for cleaned in cleaned_values)
+        return key, value
+
+    def _insert_row(self, values):
+        """Inserta una fila en memoria, sin persistir el árbol; devuelve su entrada."""
+        key, value = self._row_entry(values)
+        self._insert_entry(key, value)
+        return key, value
+
+    def _insert_entry(self, key, value):
+        key = _sort_key(key)
+        full = self.order - 1
         root = self.root
-        if len(root.keys) == ORDER - 1:
+        if len(root.keys) >= full:
             new_root = BTreeNode(is_leaf=False)
             new_root.children.append(root)
             self._split_child(new_root, 0)
             self.root = new_root
         
-        self._insert_non_full(self.root, key, value)
-        self._save()
-
-    def _insert_non_full(self, node, key, value):
-        if node.is_leaf:
-            node.keys.append((key, value))
-            node.keys.sort(key=lambda kv: (str(type(kv[0]).__name__), kv[0]))  # Ordenar por tipo y luego por valor
-        else:
-            i = len(node.keys) - 1
-            while i >= 0:
-                less_than, _, _ = self._compare_keys(key, node.keys[i][0])
-                if not less_than:  # key >= node.keys[i][0]
-                    break
-                i -= 1
-            i += 1
-            
-            if i >= len(node.children):
-                raise IndexError(f"Child index {i} out of range")
-                
-            if len(node.children[i].keys) == ORDER - 1:
+        # Una sola bajada iterativa: cada hijo lleno se parte antes de entrar en él,
+        # así la hoja siempre tiene lugar y no hay que volver a subir por el camino
+        node = self.root
+        while not node.is_leaf:
+            i = bisect_right(node.keys, key)  # primer hijo con separador > key
+            if len(node.children[i].keys) >= full:
                 self._split_child(node, i)
-                _, _, greater = self._compare_keys(key, node.keys[i][0])
-                if greater:  # key > node.keys[i][0]
+                if key > node.keys[i]:
                     i += 1
-            self._insert_non_full(node.children[i], key, value)
+            node = node.children[i]
+        
+        # Detrás de las claves iguales, como el orden estable de antes
+        i = bisect_right(node.keys, key)
+        node.keys.insert(i, key)
+        node.values.insert(i, value)
 
     def _split_child(self, parent, i):
         node = parent.children[i]
@@ -173,7 +388,9 @@ class BPlusTree(BaseIndex):
         if node.is_leaf:
             # Para hojas: el nodo derecho toma desde mid hasta el final
             right.keys = node.keys[mid:]
+            right.values = node.values[mid:]
             node.keys = node.keys[:mid]
+            node.values = node.values[:mid]
             # Mantener el enlace a la siguiente hoja
             right.next = node.next
             node.next = right
@@ -196,59 +413,83 @@ class BPlusTree(BaseIndex):
     def remove(self, key):
         """Eliminar registros y devolver filas eliminadas en CSV"""
         key = self._parse_key(key)
-        removed_records = []
+        removed_records = self._remove_key(key)
         
-        # Ir a la primera hoja
-        node = self.root
-        while not node.is_leaf:
-            node = node.children[0]
+        # Guardar los cambios (si hubo)
+        if removed_records:
+            self._log(WAL_REMOVE, key)
+        return removed_records  # Lista de filas CSV eliminadas
+
+    def _remove_key(self, key):
+        """Quita de las hojas las entradas con esa clave (ya parseada), sin persistir."""
+        removed_records = []
         
-        # Recorrer todas las hojas
+        # Bajar a la primera hoja que puede tenerla: las entradas iguales son un
+        # tramo contiguo que se ubica con bisect y se borra por slice
+        target = _sort_key(key)
+        node = self._find_leaf(target)
         while node:
-            original_count = len(node.keys)
-            
-            # Guardar los registros que van a ser eliminados
-            for k, v in node.keys:
-                _, equals, _ = self._compare_keys(key, k)
-                if equals:
-                    removed_records.append(v)  # Fila CSV completa
-            
-            # Filtrar las claves que NO coinciden
-            node.keys = [(k, v) for (k, v) in node.keys 
-                        if not self._compare_keys(key, k)[1]]
-            
+            lo = bisect_left(node.keys, target)
+            hi = bisect_right(node.keys, target, lo)
+            more = hi == len(node.keys)  # el tramo puede seguir en la hoja siguiente
+            if hi > lo:
+                # Guardar los registros que van a ser eliminados (fila CSV completa)
+                removed_records.extend(node.values[lo:hi])
+                del node.keys[lo:hi]
+                del node.values[lo:hi]
+            if not more:
+                break
             node = node.next
-        
-        # Guardar los cambios
-        self._save()
-        return removed_records  # Lista de filas CSV eliminadas
+        return removed_records
 
-    def scan_all(self):
-        """Devolver todas las filas parseadas como arrays"""
+    def iter_all(self) -> Iterator[List[str]]:
+        """Iterar todas las filas parseadas como arrays, hoja por hoja"""
         node = self.root
         while not node.is_leaf:
             node = node.children[0]
         
-        result = []
         while node:
-            for k, v in node.keys:
-                # CAMBIO CRÍTICO: Parsear el CSV string a array
-                parsed_row = self._parse_csv_to_array(v)
-                result.append(parsed_row)
+            yield from self._parse_rows(node.values)
             node = node.next
-        
-        print(f" B+Tree scan_all - devolviendo {len(result)} arrays")
+
+    def _parse_rows(self, values) -> Iterator[List[str]]:
+        """Parsea un tramo de filas CSV de una hoja en bloque (no fila por fila)."""
+        if not values:
+            return
+        # Caso común: ninguna fila del tramo tiene comillas ni saltos de línea, así que
+        # cada una es solo sus celdas (ya limpias al insertar) unidas por comas: split
+        blob = '\n'.join(values)
+        if '"' not in blob and '\r' not in blob and blob.count('\n') == len(values) - 1:
+            yield from map(methodcaller('split', ','), values)
+            return
+        # Un solo csv.reader por tramo en vez de uno (más un StringIO) por fila
+        try:
+            rows = list(csv.reader([v.strip() for v in values]))
+        except csv.Error:
+            rows = None
+        if rows is not None and len(rows) == len(values):
+            for row in rows:
+                yield [cell.strip().strip('"') for cell in row]
+        else:
+            for v in values:
+                yield self._parse_csv_to_array(v)
+
+    def scan_all(self):
+        """Devolver todas las filas parseadas como arrays"""
+        result = list(self.iter_all())
+        logger.debug("B+Tree scan_all - devolviendo %d arrays", len(result))
         return result
     
     def load_csv(self, path_or_data, index_col: Optional[int] = None):
         """Carga un CSV usando la columna especificada como índice."""
-        import csv
-        
-        # Si recibe una lista de diccionarios (para compatibilidad con ISAM)
-        if isinstance(path_or_data, list):
-            for data_dict in path_or_data:
-                values = list(data_dict.values())
-                self.insert(None, values)
+        # Si recibe filas ya parseadas (lista o generador de dicts/secuencias, como ISAM),
+        # se consumen en streaming sin materializar la lista completa
+        if not isinstance(path_or_data, (str, os.PathLike)):
+            rows = (list(r.values()) if isinstance(r, dict) else list(r) for r in path_or_data)
+            if not self.root.keys and self.root.is_leaf:
+                self.insert_bulk(rows)
+            else:
+                self.insert_pipelined(rows)
             return
         
         # Si recibe un path (string)
@@ -263,26 +504,30 @@ class BPlusTree(BaseIndex):
             if index_col >= len(headers):
                 raise ValueError(f"La columna {index_col} no existe. El CSV solo tiene {len(headers)} columnas (0-{len(headers)-1})")
             
-            for row in reader:
-                if len(row) < len(headers):
-                    # Rellenar con valores vacíos si faltan columnas
-                    while len(row) < len(headers):
-                        row.append("")
-                
-                if len(row) > index_col:
-                    self.insert(None, row)
+            def padded_rows():
+                for row in reader:
+                    if len(row) < len(headers):
+                        # Rellenar con valores vacíos si faltan columnas
+                        while len(row) < len(headers):
+                            row.append("")
+                    
+                    if len(row) > index_col:
+                        yield row
+            
+            if not self.root.keys and self.root.is_leaf:
+                # Árbol vacío: la construcción empaquetada necesita todas las filas para ordenarlas
+                self.insert_bulk(padded_rows())
+            else:
+                # El parseo corre en un hilo mientras aquí se inserta en el árbol
+                self.insert_pipelined(padded_rows())
 
     def _parse_csv_to_array(self, csv_string):
         """Convierte un string CSV a un array de valores"""
-        import csv
-        import io
-        
         try:
-            # Usar csv.reader para parsear correctamente
-            reader = csv.reader(io.StringIO(csv_string.strip()))
-            row = next(reader, [])
+            # Usar csv.reader para parsear correctamente (directo sobre la fila, sin StringIO)
+            row = next(csv.reader((csv_string.strip(),)), [])
             # Limpiar cada valor
-            cleaned_row = [str(cell).strip().strip('"') for cell in row]
+            cleaned_row = [cell.strip().strip('"') for cell in row]
             return cleaned_row
         except Exception as e:
             print(f"Error parseando CSV: {e}")
@@ -1,15 +1,22 @@
 # indices/hash_extensible.py - VERSIÓN COMPLETAMENTE CORREGIDA
 import os
+import mmap
 import struct
 import pickle
 import hashlib
 import csv
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Iterator
 from indices.base_index import BaseIndex
 
 BUCKET_CAPACITY = 32
 MAX_GLOBAL_DEPTH = 8
 
+# Directorio en binario: cabecera (magic, global_depth, field_index, nº de entradas) y luego,
+# por entrada, las longitudes del prefijo y del path del bucket seguidas de sus bytes
+DIR_MAGIC = b'EHD1'
+DIR_HEADER = struct.Struct('<4sIII')
+DIR_ENTRY = struct.Struct('<HH')
+
 class Bucket:
     def __init__(self, local_depth: int):
         self.records: List[List[str]] = []  # CORREGIDO: Guardar como listas de strings
@@ -20,7 +27,7 @@ class Bucket:
         return len(self.records) >= BUCKET_CAPACITY
 
 class ExtendibleHash(BaseIndex):
-    def __init__(self, dir_file: str = 'embeddings/hash_dir.pkl', data_file: str = 'embeddings/hash_data.bin'):
+    def __init__(self, dir_file: str = 'embeddings/hash_dir.bin', data_file: str = 'embeddings/hash_data.bin'):
         self.dir_file = dir_file
         self.data_file = data_file
         self.global_depth: int = 1
@@ -34,8 +41,13 @@ class ExtendibleHash(BaseIndex):
         self._init_directory()
 
     def _init_directory(self) -> None:
+        legacy_file = os.path.splitext(self.dir_file)[0] + '.pkl'
         if os.path.exists(self.dir_file):
             self._load_directory()
+        elif legacy_file != self.dir_file and os.path.exists(legacy_file):
+            # Migración: directorio guardado con pickle por versiones anteriores
+            self._load_directory(legacy_file)
+            self._save_directory()
         else:
             self._create_new_directory()
 
@@ -54,10 +66,17 @@ class ExtendibleHash(BaseIndex):
             pickle.dump(Bucket(local_depth), f)
         return bucket_path
 
-    def _load_directory(self) -> None:
+    def _load_directory(self, path: Optional[str] = None) -> None:
+        path = path or self.dir_file
         try:
-            with open(self.dir_file, 'rb') as f:
-                data = pickle.load(f)
+            with open(path, 'rb') as f:
+                # mmap: se leen solo las páginas del directorio, sin deserializar con pickle
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                    if view[:len(DIR_MAGIC)] == DIR_MAGIC:
+                        self._unpack_directory(view)
+                        return
+                f.seek(0)
+                data = pickle.load(f)  # formato anterior
                 self.global_depth = data.get('global_depth', 1)
                 self.directory = data.get('directory', {})
                 self.field_index = data.get('field_index', 0)
@@ -65,14 +84,30 @@ class ExtendibleHash(BaseIndex):
             print(f"Error cargando directorio hash: {e}")
             self._create_new_directory()
 
+    def _unpack_directory(self, view: mmap.mmap) -> None:
+        _, self.global_depth, self.field_index, entries = DIR_HEADER.unpack_from(view, 0)
+        directory: Dict[str, str] = {}
+        offset = DIR_HEADER.size
+        for _ in range(entries):
+            prefix_len, path_len = DIR_ENTRY.unpack_from(view, offset)
+            offset += DIR_ENTRY.size
+            prefix = view[offset:offset + prefix_len].decode('ascii')
+            offset += prefix_len
+            directory[prefix] = view[offset:offset + path_len].decode('utf-8')
+            offset += path_len
+        self.directory = directory
+
     def _save_directory(self) -> None:
         try:
+            parts = [DIR_HEADER.pack(DIR_MAGIC, self.global_depth, self.field_index, len(self.directory))]
+            for prefix, bucket_path in self.directory.items():
+                prefix_bytes = prefix.encode('ascii')
+                path_bytes = bucket_path.encode('utf-8')
+                parts.append(DIR_ENTRY.pack(len(prefix_bytes), len(path_bytes)))
+                parts.append(prefix_bytes)
+                parts.append(path_bytes)
             with open(self.dir_file, 'wb') as f:
-                pickle.dump({
-                    'global_depth': self.global_depth,
-                    'directory': self.directory,
-                    'field_index': self.field_index
-                }, f)
+                f.write(b''.join(parts))
         except Exception as e:
             print(f"Error guardando directorio hash: {e}")
 
@@ -264,6 +299,12 @@ class ExtendibleHash(BaseIndex):
         
         return results
 
+    def search_column(self, column: int, key: str) -> List[List[str]]:
+        """Solo la columna hasheada tiene acceso directo"""
+        if column != self.field_index:
+            raise NotImplementedError("Hash Extensible solo busca directamente por su campo indexado")
+        return self.search(key)
+
     def remove(self, key: str) -> List[str]:
         """Elimina registros por clave - RETORNA STRINGS CSV"""
         key = str(key).strip()
@@ -306,9 +347,8 @@ class ExtendibleHash(BaseIndex):
         
         return removed_records
 
-    def scan_all(self) -> List[List[str]]:
-        """Escanea todos los registros - RETORNA LISTAS"""
-        all_records = []
+    def iter_all(self) -> Iterator[List[str]]:
+        """Itera todos los registros bucket por bucket"""
         visited_buckets = set()
         
         # Recorrer todos los buckets únicos
@@ -322,14 +362,15 @@ class ExtendibleHash(BaseIndex):
                 visited_buckets.add(current_path)
                 bucket = self._load_bucket(current_path)
                 
-                # Agregar todos los registros del bucket
-                for record in bucket.records:
-                    all_records.append(record)
+                # Entregar todos los registros del bucket
+                yield from bucket.records
                 
                 # Seguir cadena de overflow
                 current_path = bucket.next_bucket
-        
-        return all_records
+
+    def scan_all(self) -> List[List[str]]:
+        """Escanea todos los registros - RETORNA LISTAS"""
+        return list(self.iter_all())
 
     def load_csv(self, csv_path: str, index_col: int = 0) -> None:
         """Carga datos desde un archivo CSV"""
@@ -340,18 +381,22 @@ class ExtendibleHash(BaseIndex):
                 reader = csv.reader(f)
                 headers = next(reader, [])  # Skip header
                 
-                for row_num, row in enumerate(reader):
-                    if not row or len(row) == 0:
-                        continue
-                    
-                    # Limpiar y preparar datos
-                    clean_row = [str(cell).strip() for cell in row]
-                    
-                    # Asegurar que tiene al menos una columna para indexar
-                    if len(clean_row) > index_col:
-                        self.insert(None, clean_row)
-                    else:
-                        print(f"Fila {row_num + 1} omitida: no tiene suficientes columnas")
+                def clean_rows():
+                    for row_num, row in enumerate(reader):
+                        if not row or len(row) == 0:
+                            continue
+                        
+                        # Limpiar y preparar datos
+                        clean_row = [cell.strip() for cell in row]
+                        
+                        # Asegurar que tiene al menos una columna para indexar
+                        if len(clean_row) > index_col:
+                            yield clean_row
+                        else:
+                            print(f"Fila {row_num + 1} omitida: no tiene suficientes columnas")
+                
+                # El parseo corre en un hilo mientras aquí se escriben los buckets
+                self.insert_pipelined(clean_rows())
                 
                 print(f"Hash Extensible: Cargados datos desde {csv_path} indexando por columna {index_col}")
                 
@@ -9,9 +9,48 @@ import heapq
 import time
 import math
 import re
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Tuple, Any, Optional
 from collections import defaultdict, Counter
 
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+# SciPy es opcional: con él la consulta se puntúa como un producto matriz dispersa x vector
+try:
+    import scipy.sparse as sp
+    SCIPY_AVAILABLE = NUMPY_AVAILABLE
+except ImportError:
+    sp = None
+    SCIPY_AVAILABLE = False
+
+# Numba compila el bucle que acumula los productos punto sobre los postings. Está fijado
+# en requirements.txt, pero se importa como opcional (no hay wheel para toda plataforma
+# o versión de Python): sin él se usa SciPy y, sin SciPy, el recorrido en Python
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = NUMPY_AVAILABLE
+except ImportError:
+    njit = None
+    NUMBA_AVAILABLE = False
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _accumulate_dot_products(doc_ids, weights, lengths, query_weights, n_docs):
+        """scores[doc] += q[t] * w, término a término en el orden de la consulta"""
+        scores = np.zeros(n_docs, dtype=np.float64)
+        position = 0
+        for term in range(lengths.shape[0]):
+            query_weight = query_weights[term]
+            for i in range(position, position + lengths[term]):
+                scores[doc_ids[i]] += query_weight * weights[i]
+            position += lengths[term]
+        return scores
+
 # Imports con manejo de errores para compatibilidad
 try:
     from text_processing.preprocessor import TextPreprocessor
@@ -28,6 +67,14 @@ except ImportError:
     print(" SPIMI no encontrado, usando construcción en memoria.")
     SPIMI_AVAILABLE = False
 
+# Decodificación de postings por término en paralelo (NumPy libera el GIL): mínimo de postings y número de hilos
+PARALLEL_QUERY_MIN_POSTINGS = 50_000
+QUERY_WORKERS = os.cpu_count() or 4
+
+# Acentos básicos -> ASCII y patrón de palabras, preparados una vez para todos los textos
+ACCENT_TABLE = str.maketrans({'á': 'a', 'é': 'e', 'í': 'i', 'ó': 'o', 'ú': 'u', 'ñ': 'n'})
+WORD_PATTERN = re.compile(r'\b[a-z]+\b')
+
 # Versión simplificada de procesamiento de texto
 class SimpleTextProcessor:
     """Procesador de texto básico sin dependencias externas"""
@@ -58,13 +105,11 @@ class SimpleTextProcessor:
         # Limpiar y normalizar
         text = text.lower()
         
-        # Quitar acentos básicos
-        replacements = {'á': 'a', 'é': 'e', 'í': 'i', 'ó': 'o', 'ú': 'u', 'ñ': 'n'}
-        for old, new in replacements.items():
-            text = text.replace(old, new)
+        # Quitar acentos básicos (una sola pasada en C)
+        text = text.translate(ACCENT_TABLE)
         
         # Extraer palabras
-        words = re.findall(r'\b[a-z]+\b', text)
+        words = WORD_PATTERN.findall(text)
         
         # Filtrar stopwords y palabras cortas
         words = [w for w in words if len(w) >= 3 and w not in self.stopwords]
@@ -225,6 +270,8 @@ class InvertedIndex:
     # Métodos requeridos por compatibilidad con el engine existente
     def scan_all(self) -> List[Dict]:
         """Retorna todos los documentos indexados"""
+        if isinstance(self.document_metadata, list):
+            return list(self.document_metadata)
         return list(self.document_metadata.values())
     
     def insert(self, key: Any, values: List[str]) -> None:
@@ -264,15 +311,23 @@ class InvertedIndex:
             print(" Vector de consulta vacío")
             return []
         
-        # Obtener documentos candidatos
-        candidate_docs = self._get_candidate_documents(query_vector)
-        print(f" Documentos candidatos: {len(candidate_docs)}")
-        
-        # Calcular similitudes
-        scores = self._calculate_similarities(query_vector, candidate_docs)
+        if SCIPY_AVAILABLE or NUMBA_AVAILABLE:
+            # Solo se tocan los postings de los términos de la consulta, en una pasada compilada
+            doc_ids, similarities, candidates = self._sparse_similarities(query_vector)
+            print(f" Documentos candidatos: {candidates}")
+            top = self._top_k_positions(similarities, k)
+            top_k = list(zip(doc_ids[top].tolist(), similarities[top].tolist()))
+        else:
+            # Obtener documentos candidatos
+            candidate_docs = self._get_candidate_documents(query_vector)
+            print(f" Documentos candidatos: {len(candidate_docs)}")
+            
+            # Calcular similitudes
+            scores = self._calculate_similarities(query_vector, candidate_docs)
+            top_k = heapq.nlargest(k, scores, key=lambda x: x[1])
         
-        # Retornar top-k resultados
-        top_k_results = heapq.nlargest(k, scores, key=lambda x: x[1])
+        # Retornar top-k resultados: los metadatos se resuelven solo para estos k documentos
+        top_k_results = [(self._document(doc_id), score) for doc_id, score in top_k]
         
         search_time = time.time() - start_time
         print(f" Búsqueda completada en {search_time:.3f}s - {len(top_k_results)} resultados")
@@ -425,6 +480,12 @@ class InvertedIndex:
         # Convertir a diccionario normal
         self.inverted_index = dict(self.inverted_index)
     
+    def _document(self, doc_id: int) -> Dict:
+        """Metadatos de un documento; ``document_metadata`` puede ser un dict o una lista por doc_id"""
+        if isinstance(self.document_metadata, list):
+            return self.document_metadata[doc_id] if 0 <= doc_id < len(self.document_metadata) else {}
+        return self.document_metadata.get(doc_id, {})
+    
     def _get_candidate_documents(self, query_vector: Dict[str, float]) -> set:
         """Obtiene documentos candidatos que contienen términos de la consulta"""
         candidate_docs = set()
@@ -438,11 +499,12 @@ class InvertedIndex:
         return candidate_docs
     
     def _calculate_similarities(self, query_vector: Dict[str, float], 
-                               candidate_docs: set) -> List[Tuple[Dict, float]]:
-        """Calcula similitudes de coseno para documentos candidatos"""
+                               candidate_docs: set) -> List[Tuple[int, float]]:
+        """Calcula similitudes de coseno (doc_id, score) para documentos candidatos"""
         scores = []
+        candidate_list = list(candidate_docs)
         
-        for doc_id in candidate_docs:
+        for doc_id, doc_norm in zip(candidate_list, self._candidate_norms(candidate_list)):
             # Construir vector del documento
             doc_vector = {}
             for term in query_vector.keys():
@@ -455,18 +517,123 @@ class InvertedIndex:
                             break
             
             # Calcular similitud
-            doc_norm = self.tfidf_calculator.document_norms.get(doc_id, 0)
             if doc_norm > 0:
                 similarity = self.tfidf_calculator.cosine_similarity(
                     query_vector, doc_vector, doc_norm
                 )
                 
                 if similarity > 0:
-                    doc_metadata = self.document_metadata.get(doc_id, {})
-                    scores.append((doc_metadata, similarity))
+                    scores.append((doc_id, similarity))
         
         return scores
     
+    def _postings_arrays(self, term: str):
+        """(doc_ids, pesos) del término como arrays; el índice plano ya los entrega así"""
+        if hasattr(self.inverted_index, 'postings_arrays'):
+            return self.inverted_index.postings_arrays(term)
+        postings = self.inverted_index[term]
+        doc_ids = np.fromiter((doc_id for doc_id, _ in postings), dtype=np.int64, count=len(postings))
+        weights = np.fromiter((weight for _, weight in postings), dtype=np.float64, count=len(postings))
+        return doc_ids, weights
+    
+    def _query_postings(self, query_vector: Dict[str, float]) -> Tuple[List[str], List[Tuple[Any, Any]]]:
+        """
+        Términos de la consulta presentes en el índice y sus postings como arrays.
+        
+        En el índice plano cada término se traduce una sola vez a su term_id y desde ahí
+        se trabaja con enteros; si hay suficientes postings se desempaquetan en paralelo.
+        """
+        index = self.inverted_index
+        if not hasattr(index, 'postings_by_id'):
+            terms = [term for term in query_vector if term in index]
+            return terms, [self._postings_arrays(term) for term in terms]
+        
+        terms, term_ids = [], []
+        for term in query_vector:
+            term_id = index.term_id(term)
+            if term_id is not None:
+                terms.append(term)
+                term_ids.append(term_id)
+        workers = min(QUERY_WORKERS, len(term_ids))
+        if workers < 2 or sum(map(index.posting_count, term_ids)) < PARALLEL_QUERY_MIN_POSTINGS:
+            return terms, [index.postings_by_id(term_id) for term_id in term_ids]
+        # map conserva el orden de los términos: la suma posterior no cambia
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return terms, list(pool.map(index.postings_by_id, term_ids))
+    
+    def _sparse_similarities(self, query_vector: Dict[str, float]):
+        """
+        Similitud de coseno como ``(Q^T @ q) / (|q| * normas)``, con Q la matriz CSR
+        término x documento de los postings de la consulta (con Numba, el mismo producto
+        se acumula en un bucle compilado sin armar la matriz).
+        
+        Returns:
+            (doc_ids, similitudes) de los documentos con similitud > 0, y el número de candidatos
+        """
+        terms, arrays = self._query_postings(query_vector)
+        if not terms:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64), 0
+        lengths = np.fromiter((len(doc_ids) for doc_ids, _ in arrays), dtype=np.int64, count=len(arrays))
+        all_doc_ids = np.concatenate([doc_ids for doc_ids, _ in arrays]).astype(np.int64, copy=False)
+        # Los pesos llegan como float32 del índice plano; el producto se acumula en float64
+        all_weights = np.concatenate([weights for _, weights in arrays])
+        if not len(all_doc_ids):
+            return all_doc_ids, all_weights, 0
+        
+        n_docs = int(all_doc_ids.max()) + 1
+        query_weights = np.fromiter((query_vector[term] for term in terms), dtype=np.float64, count=len(terms))
+        # Los productos se acumulan término a término, en el orden de la consulta
+        if NUMBA_AVAILABLE:
+            dot_products = _accumulate_dot_products(all_doc_ids, all_weights, lengths, query_weights, n_docs)
+        else:
+            indptr = np.concatenate(([0], np.cumsum(lengths)))
+            matrix = sp.csr_matrix((all_weights, all_doc_ids, indptr), shape=(len(terms), n_docs))
+            dot_products = matrix.T @ query_weights
+        
+        candidates = np.unique(all_doc_ids)
+        dots = dot_products[candidates]
+        doc_norms = self._norms_at(candidates)
+        query_norm = math.sqrt(sum(weight ** 2 for weight in query_vector.values()))
+        keep = (doc_norms > 0) & (dots != 0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            similarities = dots[keep] / (query_norm * doc_norms[keep])
+        positive = similarities > 0
+        return candidates[keep][positive], similarities[positive], len(candidates)
+    
+    @staticmethod
+    def _top_k_positions(scores, k: int):
+        """
+        Posiciones de los k mayores scores en orden descendente, en O(n) con argpartition.
+        
+        Los empates se resuelven por posición, igual que ``heapq.nlargest``.
+        """
+        if k <= 0 or not len(scores):
+            return np.empty(0, dtype=np.int64)
+        if k < len(scores):
+            kth_score = scores[np.argpartition(scores, -k)[-k]]
+            selected = np.flatnonzero(scores >= kth_score)
+        else:
+            selected = np.arange(len(scores))
+        return selected[np.argsort(-scores[selected], kind='stable')][:k]
+    
+    def _norms_at(self, doc_ids):
+        """Normas de ``doc_ids`` (array); doc_id sin norma => 0, igual que document_norms.get(doc_id, 0)"""
+        norms = self.tfidf_calculator.document_norms
+        if not isinstance(norms, np.ndarray):
+            return np.fromiter((norms.get(doc_id, 0) for doc_id in doc_ids.tolist()),
+                               dtype=np.float64, count=len(doc_ids))
+        inside = (doc_ids >= 0) & (doc_ids < len(norms))
+        found = np.zeros(len(doc_ids), dtype=norms.dtype)
+        found[inside] = norms[doc_ids[inside]]
+        return found
+    
+    def _candidate_norms(self, doc_ids: List[int]) -> List[float]:
+        """Normas de los candidatos: un solo indexado vectorial si las normas son un arreglo por doc_id"""
+        norms = self.tfidf_calculator.document_norms
+        if NUMPY_AVAILABLE and isinstance(norms, np.ndarray):
+            return self._norms_at(np.asarray(doc_ids, dtype=np.int64)).tolist()
+        return [norms.get(doc_id, 0) for doc_id in doc_ids]
+    
     def _save_index(self):
         """Guarda el índice y metadatos al disco"""
         print(" Guardando índice al disco...")
@@ -2,7 +2,8 @@
 
 import os
 import struct
-from typing import List, Dict, Any
+from collections import namedtuple
+from typing import List, Dict, Any, Iterable, Iterator, Sequence, Union
 from indices.base_index import BaseIndex
 
 class RegistroGenerico:
@@ -11,11 +12,15 @@ class RegistroGenerico:
         self.schema = schema
         self.format = ''.join([t[1] for t in schema])
         self.size = struct.calcsize(self.format)
+        # Fila compacta (namedtuple, sin __dict__ por registro) que comparte los nombres del schema
+        self.fila = namedtuple('Fila', [t[0] for t in schema])
 
-    def pack(self, valores: Dict[str, Any]) -> bytes:
+    def pack(self, valores: Union[Dict[str, Any], Sequence[Any]]) -> bytes:
+        # Acepta un dict por nombre de campo o una secuencia en el orden del schema
+        if isinstance(valores, dict):
+            valores = [valores[campo] for campo, _, _ in self.schema]
         datos = []
-        for campo, tipo, tam in self.schema:
-            val = valores[campo]
+        for (campo, tipo, tam), val in zip(self.schema, valores):
             if tipo.endswith('s'):
                 b = str(val).encode('latin1')
                 datos.append(b.ljust(int(tipo[:-1]), b' ')[:int(tipo[:-1])])
@@ -49,6 +54,8 @@ class ISAM(BaseIndex):
         self.overflow_file = f"{data_file}.ovf"
         self.reg = RegistroGenerico(schema)
         self.index_field = index_field
+        # Nombre del campo indexado: evita list(rec.values())[index_field] por registro
+        self.key_name = schema[index_field][0]
         self.block_factor_data = block_factor_data
         self.block_factor_index = block_factor_index
 
@@ -125,31 +132,31 @@ class ISAM(BaseIndex):
         with open(self.overflow_file, 'ab') as f:
             f.write(self.reg.pack(valores))
 
-    def load_csv(self, rows: List[Dict[str, Any]]) -> None:
-        # Ordenar según campo de índice
-        rows.sort(key=lambda r: list(r.values())[self.index_field])
+    def load_csv(self, rows: Iterable[Union[Dict[str, Any], Sequence[Any]]]) -> None:
+        # Ordenar según campo de índice (acepta cualquier iterable, p.ej. un generador,
+        # de dicts o de filas en el orden del schema como self.reg.fila)
+        rows = sorted(rows, key=lambda r: r[self.key_name] if isinstance(r, dict) else r[self.index_field])
 
-        # Reset archivos: data, índices y overflow
-        with open(self.data_file, 'wb') as f:
-            f.write(struct.pack('i', len(rows)))
-        open(self.index_lvl1_file, 'wb').close()
-        open(self.index_lvl2_file, 'wb').close()
+        # Reset overflow
         with open(self.overflow_file, 'wb') as f:
             f.write(struct.pack('i', 0))
 
-        # Escribir registros en data y entradas en índice nivel 1
-        with open(self.data_file, 'r+b') as f:
-            f.seek(4)
+        # Una sola pasada: cada registro se empaqueta una vez y los mismos bytes van a
+        # data, al nivel 1 (uno por bloque de datos) y al nivel 2 (uno por bloque del nivel 1),
+        # sin releer el nivel 1 desde disco
+        with open(self.data_file, 'wb') as data_f, \
+             open(self.index_lvl1_file, 'wb') as lvl1_f, \
+             open(self.index_lvl2_file, 'wb') as lvl2_f:
+            data_f.write(struct.pack('i', len(rows)))
+            lvl1_count = 0
             for i, row in enumerate(rows):
-                f.write(self.reg.pack(row))
+                packed = self.reg.pack(row)
+                data_f.write(packed)
                 if i % self.block_factor_data == 0:
-                    self._append_index_lvl1_entry(row)
-
-        # Escribir entradas en índice nivel 2 a partir del nivel 1
-        lvl1_entries = self._read_index_lvl1()
-        for j, entry in enumerate(lvl1_entries):
-            if j % self.block_factor_index == 0:
-                self._append_index_lvl2_entry(entry)
+                    lvl1_f.write(packed)
+                    if lvl1_count % self.block_factor_index == 0:
+                        lvl2_f.write(packed)
+                    lvl1_count += 1
 
     def insert(self, _: None, val_dict: Dict[str, Any]) -> None:
         # Inserción dinámica a overflow
@@ -158,18 +165,19 @@ class ISAM(BaseIndex):
         self._append_overflow(val_dict)
 
     def search(self, valor: Any) -> List[Dict[str, Any]]:
-        key = str(valor)
+        key = str(valor).strip()
         lvl2 = self._read_index_lvl2()
         lvl1 = self._read_index_lvl1()
 
-        # Seleccionar bloque de nivel 1 usando nivel 2
+        # Los índices apuntan al último bloque cuya primera clave es estrictamente menor:
+        # así una clave repetida que empieza en un bloque anterior no se pierde
         if lvl2:
             low, high = 0, len(lvl2) - 1
             l2_block = 0
             while low <= high:
                 mid = (low + high) // 2
-                mid_key = str(list(lvl2[mid].values())[self.index_field])
-                if mid_key <= key:
+                mid_key = str(lvl2[mid][self.key_name])
+                if mid_key < key:
                     l2_block = mid
                     low = mid + 1
                 else:
@@ -187,8 +195,8 @@ class ISAM(BaseIndex):
             l1_block = 0
             while low <= high:
                 mid = (low + high) // 2
-                mid_key = str(list(subset[mid].values())[self.index_field])
-                if mid_key <= key:
+                mid_key = str(subset[mid][self.key_name])
+                if mid_key < key:
                     l1_block = mid
                     low = mid + 1
                 else:
@@ -197,13 +205,20 @@ class ISAM(BaseIndex):
         else:
             data_block = 0
 
+        # Desde ese bloque se lee en secuencia (un solo open) hasta pasar la clave,
+        # cubriendo las repeticiones que cruzan varios bloques
         results: List[Dict[str, Any]] = []
         total = self._read_header()
         start = data_block * self.block_factor_data
-        for i in range(start, min(start + self.block_factor_data, total)):
-            rec = self._read_record(i)
-            if str(list(rec.values())[self.index_field]) == key:
-                results.append(rec)
+        with open(self.data_file, 'rb') as f:
+            f.seek(4 + start * self.reg.size)
+            for _ in range(start, total):
+                rec = self.reg.unpack(f.read(self.reg.size))
+                rec_key = str(rec[self.key_name])
+                if rec_key == key:
+                    results.append(rec)
+                elif rec_key > key:
+                    break
 
         # Buscar también en overflow
         ov_total = self._read_overflow_header()
@@ -212,11 +227,17 @@ class ISAM(BaseIndex):
             for _ in range(ov_total):
                 data = f.read(self.reg.size)
                 rec = self.reg.unpack(data)
-                if str(list(rec.values())[self.index_field]) == key:
+                if str(rec[self.key_name]) == key:
                     results.append(rec)
 
         return results
 
+    def search_column(self, column: int, key: Any) -> List[Dict[str, Any]]:
+        """Solo el campo indexado se resuelve con los niveles del índice"""
+        if column != self.index_field:
+            raise NotImplementedError("ISAM solo busca directamente por su campo indexado")
+        return self.search(key)
+
     def range_search(self, begin_key: Any, end_key: Any) -> List[str]:
         begin_key = str(begin_key)
         end_key = str(end_key)
@@ -224,7 +245,7 @@ class ISAM(BaseIndex):
         total = self._read_header()
         for i in range(total):
             rec = self._read_record(i)
-            val = str(list(rec.values())[self.index_field])
+            val = str(rec[self.key_name])
             if begin_key <= val <= end_key:
                 results.append(' | '.join(str(v) for v in rec.values()))
 
@@ -234,34 +255,37 @@ class ISAM(BaseIndex):
             for _ in range(ov_total):
                 data = f.read(self.reg.size)
                 rec = self.reg.unpack(data)
-                val = str(list(rec.values())[self.index_field])
+                val = str(rec[self.key_name])
                 if begin_key <= val <= end_key:
                     results.append(' | '.join(str(v) for v in rec.values()))
 
         return results
 
-    def scan_all(self) -> List[Dict[str, Any]]:
-        results: List[Dict[str, Any]] = []
+    def iter_all(self) -> Iterator[Dict[str, Any]]:
+        # Lectura secuencial con un solo open por archivo
         total = self._read_header()
-        for i in range(total):
-            results.append(self._read_record(i))
+        with open(self.data_file, 'rb') as f:
+            f.seek(4)
+            for _ in range(total):
+                yield self.reg.unpack(f.read(self.reg.size))
 
         ov_total = self._read_overflow_header()
         with open(self.overflow_file, 'rb') as f:
             f.seek(4)
             for _ in range(ov_total):
                 data = f.read(self.reg.size)
-                results.append(self.reg.unpack(data))
+                yield self.reg.unpack(data)
 
-        return results
+    def scan_all(self) -> List[Dict[str, Any]]:
+        return list(self.iter_all())
 
     def remove(self, key: Any) -> List[str]:
         key_str = str(key)
-        all_records = self.scan_all()
         kept: List[Dict[str, Any]] = []
         removed: List[Dict[str, Any]] = []
-        for rec in all_records:
-            if str(list(rec.values())[self.index_field]) == key_str:
+        # Se particiona en streaming: no se materializa una copia completa aparte de kept/removed
+        for rec in self.iter_all():
+            if str(rec[self.key_name]) == key_str:
                 removed.append(rec)
             else:
                 kept.append(rec)
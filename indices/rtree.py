@@ -264,16 +264,18 @@ class MultidimensionalRTree(BaseIndex):
         """Usar distancia haversine en lugar de euclidiana para coordenadas geográficas"""
         return self._haversine_distance(a, b)
 
+    def iter_all(self):
+        """Itera los pares (vector, obj) sin armar la lista completa"""
+        vector_map = self.vector_map
+        for item_id, obj in self.data_map.items():
+            vector = vector_map.get(item_id)
+            if vector is not None:
+                yield (vector, obj)
+
     def scan_all(self):
         """Escanear todos los datos desde archivos"""
         try:
-            result = []
-            for item_id in self.data_map:
-                if item_id in self.vector_map:
-                    vector = self.vector_map[item_id]
-                    obj = self.data_map[item_id]
-                    result.append((vector, obj))
-            return result
+            return list(self.iter_all())
         except:
             return []
 
@@ -1,9 +1,35 @@
 import os
 import struct
 import csv
-from typing import List, Optional
+import logging
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterator, List, Optional, Tuple
 from .base_index import BaseIndex
 
+# pandas es opcional: acelera los full-scan por columnas no indexadas
+try:
+    import numpy as np
+    import pandas as pd
+    PANDAS_AVAILABLE = True
+except ImportError:
+    np = None
+    pd = None
+    PANDAS_AVAILABLE = False
+
+# PyArrow es opcional: parser CSV multihilo en C para load_csv
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pacsv
+    PYARROW_AVAILABLE = True
+except ImportError:
+    pa = None
+    pc = None
+    pacsv = None
+    PYARROW_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
 HEADER_SIZE = 8   # 4 bytes head + 4 bytes num_campos
 MAX_AUX = 10      # límite de aux antes de rebuild
 
@@ -39,6 +65,12 @@ class SequentialFile(BaseIndex):
         self.head = -1
         self.format = ''
         self.num_campos = 0
+        self._rows_cache: Optional[List[str]] = None  # filas en orden lógico (un recorrido por versión)
+        self._rows_version: Optional[tuple] = None  # (mtime, tamaño) de data y aux al llenar los caches
+        self._column_lists: Dict[int, List[Optional[str]]] = {}  # columna -> valores limpios (sin pandas)
+        self._columnar_cache = None  # (filas, DataFrame) para full-scans vectorizados
+        self._numeric_columns: Dict[int, object] = {}  # columna -> float64 o None si no es numérica
+        self._sorted_columns: Dict[Tuple[int, Optional[bool]], tuple] = {}  # (columna, numérica) -> (valores ordenados, posiciones)
         if os.path.exists(data_file):
             with open(data_file, 'rb') as f:
                 self.head = struct.unpack('i', f.read(4))[0]
@@ -85,32 +117,189 @@ class SequentialFile(BaseIndex):
     def _count_records(self, path: str) -> int:
         return (os.path.getsize(path) - HEADER_SIZE) // self._record_size()
 
+    def _invalidate_cache(self) -> None:
+        self._rows_cache = None
+        self._rows_version = None
+        self._column_lists = {}
+        self._columnar_cache = None
+        self._numeric_columns = {}
+        self._sorted_columns = {}
+
+    def _columnar_view(self):
+        """Filas en orden lógico y un DataFrame con sus columnas (se construye una vez)."""
+        rows = self._scan_rows()  # valida la versión de los datos antes de usar el DataFrame
+        if self._columnar_cache is None:
+            frame = pd.DataFrame([[c.strip() for c in row.split('|')] for row in rows])
+            self._columnar_cache = (rows, frame)
+        return self._columnar_cache
+
+    def _scan_rows(self) -> List[str]:
+        """Filas en orden lógico; se recorren una sola vez hasta la próxima modificación."""
+        # Si los archivos cambiaron por fuera de esta instancia, los caches ya no valen
+        version = self._data_version()
+        if self._rows_cache is not None and version != self._rows_version:
+            self._invalidate_cache()
+        if self._rows_cache is None:
+            self._rows_cache = list(self.iter_all())
+            self._rows_version = version
+        return self._rows_cache
+
+    def _data_version(self) -> tuple:
+        """(mtime, tamaño) de data y aux: identifica el contenido que vieron los caches."""
+        version = []
+        for path in (self.data_file, self.aux_file):
+            try:
+                st = os.stat(path)
+                version.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                version.append(None)
+        return tuple(version)
+
+    def _column_list(self, col: int) -> List[Optional[str]]:
+        """Sin pandas: valores limpios de ``col`` por fila (None si la fila no la tiene);
+        cada fila se parte una sola vez por versión de los datos."""
+        rows = self._scan_rows()
+        if col not in self._column_lists:
+            values: List[Optional[str]] = []
+            append = values.append
+            for row in rows:
+                cols = row.split('|')
+                append(cols[col].strip() if col < len(cols) else None)
+            self._column_lists[col] = values
+        return self._column_lists[col]
+
+    def _sorted_column_list(self, col: int):
+        """Sin pandas: valores de ``col`` ordenados y su posición en el scan (listas para bisect)."""
+        cache_key = (col, None)
+        column = self._column_list(col)
+        if cache_key not in self._sorted_columns:
+            pairs = [(v, i) for i, v in enumerate(column) if v is not None]
+            pairs.sort()  # (valor, posición): empates quedan en orden de scan
+            self._sorted_columns[cache_key] = ([v for v, _ in pairs], [i for _, i in pairs])
+        return self._sorted_columns[cache_key]
+
+    def _numeric_column(self, col: int):
+        """La columna ``col`` como array float64 si todos sus valores son numéricos, si no None."""
+        if col not in self._numeric_columns:
+            values = self._columnar_view()[1][col]
+            numeric = pd.to_numeric(values, errors='coerce')
+            if numeric.notna().sum() == values.notna().sum() > 0:
+                self._numeric_columns[col] = numeric.to_numpy(dtype=np.float64)
+            else:
+                self._numeric_columns[col] = None
+        return self._numeric_columns[col]
+
+    def _sorted_column(self, col: int, numeric: bool):
+        """Valores no nulos de ``col`` ordenados y la posición de cada uno en el scan (para bisect)."""
+        cache_key = (col, numeric)
+        if cache_key not in self._sorted_columns:
+            if numeric:
+                values = self._numeric_column(col)
+                positions = np.flatnonzero(~np.isnan(values))
+                values = values[positions]
+            else:
+                series = self._columnar_view()[1][col]
+                series = series[series.notna()]
+                positions = series.index.to_numpy()
+                values = series.to_numpy(dtype=object)
+            order = np.argsort(values, kind='stable')
+            self._sorted_columns[cache_key] = (values[order], positions[order])
+        return self._sorted_columns[cache_key]
+
     def load_csv(self, csv_path: str) -> None:
-        rows = list(csv.reader(open(csv_path, newline='', encoding='latin1')))
-        self.num_campos = len(rows[0])
+        self._invalidate_cache()
+        with open(csv_path, newline='', encoding='latin1') as f:
+            self.num_campos = len(next(csv.reader(f), []))
         self.format = self._gen_fmt(self.num_campos)
 
-        # reinicia archivos (8 bytes cabecera en ambos)
-        with open(self.data_file, 'wb') as f:
-            f.write(struct.pack('ii', -1, self.num_campos))
-        with open(self.aux_file, 'wb') as f:
-            f.write(struct.pack('ii', -1, self.num_campos))
+        # cargar (en streaming: cada fila pasa directo a Registro), ordenar y escribir de corrido
+        self._write_sorted([Registro(row) for row in self._iter_csv_rows(csv_path, self.num_campos)])
 
-        # cargar y ordenar
-        regs = [Registro([str(v)[:40] for v in row]) for row in rows]
+    def _iter_csv_rows(self, csv_path: str, num_campos: int) -> Iterator[List[str]]:
+        """Filas del CSV (incluida la primera) como str de máximo 40 caracteres."""
+        if PYARROW_AVAILABLE and num_campos > 0:
+            names = [f'col{i}' for i in range(num_campos)]
+            try:
+                table = pacsv.read_csv(
+                    csv_path,
+                    read_options=pacsv.ReadOptions(encoding='latin1', use_threads=True,
+                                                   block_size=1 << 20, column_names=names),
+                    convert_options=pacsv.ConvertOptions(column_types={n: pa.string() for n in names})
+                )
+            except pa.ArrowInvalid as e:
+                # Filas irregulares (p.ej. distinto número de columnas): csv.reader las tolera
+                logger.debug("PyArrow no pudo leer %s, usando csv.reader: %s", csv_path, e)
+            else:
+                # Recorte a 40 caracteres vectorizado; conversión a Python lote por lote
+                for batch in table.to_batches():
+                    columns = [pc.utf8_slice_codeunits(column, 0, 40).to_pylist() for column in batch.columns]
+                    for row in zip(*columns):
+                        yield list(row)
+                return
+
+        with open(csv_path, newline='', encoding='latin1') as f:
+            for row in csv.reader(f):
+                yield [v[:40] for v in row]  # csv.reader ya entrega str
+
+    def _write_sorted(self, regs: List[Registro]) -> None:
+        """Ordena los registros por la clave, los enlaza en secuencia y reescribe data
+        (y un aux vacío) con escrituras contiguas."""
         regs.sort(key=lambda r: r.campos[self.field_index])
         # enlazar
         for i, r in enumerate(regs):
             r.next_pos = i+1 if i+1 < len(regs) else -1
 
-        with open(self.data_file, 'r+b') as f:
-            f.seek(0)
-            f.write(struct.pack('i', 0))
-            f.write(struct.pack('i', self.num_campos))
-            for r in regs:
-                f.write(r.pack(self.format))
+        with open(self.data_file, 'wb') as f:
+            f.write(struct.pack('ii', 0 if regs else -1, self.num_campos))
+            f.writelines(r.pack(self.format) for r in regs)
+        with open(self.aux_file, 'wb') as f:
+            f.write(struct.pack('ii', -1, self.num_campos))
+
+    def _linked_records(self) -> List[Registro]:
+        """Todos los registros en el orden de la lista enlazada (data + aux)."""
+        records = []
+        pos = self._read_header(self.data_file)
+        total_data = self._count_records(self.data_file)
+        while pos != -1:
+            is_data = pos < total_data
+            path = self.data_file if is_data else self.aux_file
+            idx = pos if is_data else pos - total_data
+            rec = self._read_record(path, idx)
+            records.append(rec)
+            pos = rec.next_pos
+        return records
+
+    def _adjust_values(self, values: List[str]) -> List[str]:
+        """Ajusta la fila al número de campos del esquema y a 40 caracteres por campo."""
+        adjusted_values = list(values[:self.num_campos])  # Truncar si hay más
+        while len(adjusted_values) < self.num_campos:  # Rellenar si hay menos
+            adjusted_values.append("")
+        
+        # Truncar cada campo a 40 caracteres máximo
+        return [str(v)[:40] for v in adjusted_values]
+
+    def insert_bulk(self, rows) -> None:
+        """Inserta varias filas de una vez: en lugar de enlazar cada fila recorriendo la
+        lista (y reconstruir cada MAX_AUX), mezcla con lo existente, ordena una vez y
+        reescribe data."""
+        rows = list(rows)
+        if len(rows) < MAX_AUX:
+            # Pocas filas: caben en el auxiliar sin forzar un rebuild
+            return super().insert_bulk(rows)
+
+        self._invalidate_cache()
+        if self.num_campos == 0 or not os.path.exists(self.data_file):
+            # Sin esquema definido: lo fijan las filas recibidas
+            self.num_campos = self.num_campos or len(rows[0])
+            self.format = self._gen_fmt(self.num_campos)
+            regs = []
+        else:
+            regs = self._linked_records()
+        regs.extend(Registro(self._adjust_values(values)) for values in rows)
+        self._write_sorted(regs)
 
     def insert(self, _: None, values: List[str]) -> None:
+        self._invalidate_cache()
         # VALIDACIÓN: Verificar que el número de campos coincida
         if self.num_campos == 0:
             # Si no hay esquema definido, usar los valores proporcionados
@@ -123,12 +312,7 @@ class SequentialFile(BaseIndex):
                 f.write(struct.pack('ii', -1, self.num_campos))
         
         # Ajustar los valores al número de campos esperado
-        adjusted_values = values[:self.num_campos]  # Truncar si hay más
-        while len(adjusted_values) < self.num_campos:  # Rellenar si hay menos
-            adjusted_values.append("")
-        
-        # Truncar cada campo a 40 caracteres máximo
-        adjusted_values = [str(v)[:40] for v in adjusted_values]
+        adjusted_values = self._adjust_values(values)
         
         rec = Registro(adjusted_values)
         head = self._read_header(self.data_file)
@@ -187,45 +371,56 @@ class SequentialFile(BaseIndex):
         # 5) Actualizar número de campos en el header
         self._write_numcampos(self.data_file)
 
-    def scan_all(self) -> List[str]:
-        out = []
+    def iter_all(self) -> Iterator[str]:
         pos = self._read_header(self.data_file)
         while pos != -1:
             is_data = pos < self._count_records(self.data_file)
             path = self.data_file if is_data else self.aux_file
             idx = pos if is_data else pos - self._count_records(self.data_file)
             rec = self._read_record(path, idx)
-            out.append(str(rec))
+            yield str(rec)
             pos = rec.next_pos
-        return out
+
+    def scan_all(self) -> List[str]:
+        return list(self.iter_all())
 
     def search(self, key: str, column: Optional[int] = None) -> List[str]:
         col = self.field_index if column is None else column
         results: List[str] = []
 
+        # Invariantes del recorrido: clave limpia y tamaño de data (no cambia al buscar)
+        key_s = key.strip()
+        append = results.append
+
         if col == self.field_index:
             # === lógica indexada original ===
+            count_data = self._count_records(self.data_file)
+            field_index = self.field_index
             pos = self._read_header(self.data_file)
             while pos != -1:
                 # ¿estamos en data o aux?
-                count_data = self._count_records(self.data_file)
                 is_data    = pos < count_data
                 path       = self.data_file if is_data else self.aux_file
                 idx        = pos if is_data else pos - count_data
 
                 rec = self._read_record(path, idx)
-                val = rec.campos[self.field_index].strip()
-                if val == key.strip():
-                    results.append(str(rec))
+                if rec.campos[field_index].strip() == key_s:
+                    append(str(rec))
                 pos = rec.next_pos
             return results
 
-        # === fallback full-scan ===
-        for row in self.scan_all():
-            cols = [c.strip() for c in row.split('|')]
-            if col < len(cols) and cols[col] == key.strip():
-                results.append(row)
-        return results
+        # === fallback full-scan sobre columnas cacheadas (cada fila se parte una vez) ===
+        if PANDAS_AVAILABLE:
+            rows, frame = self._columnar_view()
+            if col >= frame.shape[1]:
+                return results
+            return [rows[i] for i in np.flatnonzero((frame[col] == key_s).to_numpy())]
+
+        rows = self._scan_rows()
+        return [rows[i] for i, value in enumerate(self._column_list(col)) if value == key_s]
+
+    def search_column(self, column: int, key: str) -> List[str]:
+        return self.search(key, column)
 
     def range_search(self,
                      begin_key: str,
@@ -235,77 +430,103 @@ class SequentialFile(BaseIndex):
         col = self.field_index if column is None else column
         results: List[str] = []
 
+        append = results.append
+
         if col == self.field_index:
             # === lógica indexada original ===
+            count_data = self._count_records(self.data_file)  # no cambia durante la búsqueda
+            field_index = self.field_index
             pos = self._read_header(self.data_file)
             while pos != -1:
-                count_data = self._count_records(self.data_file)
                 is_data    = pos < count_data
                 path       = self.data_file if is_data else self.aux_file
                 idx        = pos if is_data else pos - count_data
 
                 rec = self._read_record(path, idx)
-                val = rec.campos[self.field_index].strip()
+                val = rec.campos[field_index].strip()
                 if begin_key <= val <= end_key:
-                    results.append(str(rec))
+                    append(str(rec))
                 pos = rec.next_pos
             return results
 
         # === fallback full-scan ===
-        for row in self.scan_all():
-            cols = [c.strip() for c in row.split('|')]
-            if col < len(cols) and begin_key <= cols[col] <= end_key:
-                results.append(row)
-        return results
+        if PANDAS_AVAILABLE:
+            # Bisect sobre la columna cacheada y ordenada: O(log n + k) por consulta
+            rows, frame = self._columnar_view()
+            if col >= frame.shape[1]:
+                return results
+
+            # Columna numérica: comparar como float64
+            lo, hi = begin_key, end_key
+            numeric = self._numeric_column(col) is not None
+            if numeric:
+                try:
+                    lo, hi = float(begin_key), float(end_key)
+                except ValueError:
+                    lo, hi = begin_key, end_key
+                    numeric = False
+
+            sorted_values, positions = self._sorted_column(col, numeric)
+            start = np.searchsorted(sorted_values, lo, side='left')
+            stop = np.searchsorted(sorted_values, hi, side='right')
+            # Devolver en el orden del scan, como el resto de búsquedas
+            return [rows[i] for i in np.sort(positions[start:stop])]
+
+        # Sin pandas: mismo bisect sobre listas ordenadas de Python (comparación de str)
+        rows = self._scan_rows()
+        keys, positions = self._sorted_column_list(col)
+        start = bisect_left(keys, begin_key)
+        stop = bisect_right(keys, end_key)
+        return [rows[i] for i in sorted(positions[start:stop])]
 
     # En indices/sequential.py - REEMPLAZAR el método remove con esta versión mejorada:
 
     def remove(self, key: str) -> List[str]:
         """Eliminar registros por clave del campo indexado - VERSIÓN MEJORADA"""
         removed: List[str] = []
+        self._invalidate_cache()
         
-        print(f"\n SEQUENTIAL REMOVE:")
-        print(f"   - Clave a eliminar: '{key}'")
-        print(f"   - Campo indexado: {self.field_index}")
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug("SEQUENTIAL REMOVE: clave '%s', campo indexado %d", key, self.field_index)
         
         # Obtener estado inicial
         initial_head = self._read_header(self.data_file)
-        total_data = self._count_records(self.data_file)
-        total_aux = self._count_records(self.aux_file)
         
-        print(f"   - Head inicial: {initial_head}")
-        print(f"   - Registros en data: {total_data}")
-        print(f"   - Registros en aux: {total_aux}")
+        if debug:
+            logger.debug("Head inicial: %d, registros en data: %d, en aux: %d", initial_head,
+                         self._count_records(self.data_file), self._count_records(self.aux_file))
         
         if initial_head == -1:
-            print("    Tabla vacía, no hay nada que eliminar")
+            logger.debug("Tabla vacía, no hay nada que eliminar")
             return removed
         
         # Recorrer la lista enlazada buscando registros a eliminar
         prev, cur = None, initial_head
         eliminated_count = 0
+        key_s = key.strip()
+        # remove solo reenlaza registros: el tamaño de data no cambia durante el recorrido
+        count_data = self._count_records(self.data_file)
         
         while cur != -1:
             try:
                 # Determinar archivo y posición
-                count_data = self._count_records(self.data_file)
                 is_data = cur < count_data
                 path = self.data_file if is_data else self.aux_file
                 idx = cur if is_data else cur - count_data
                 
-                print(f"    Examinando posición {cur} ({'data' if is_data else 'aux'}[{idx}])")
-                
                 # Leer registro
                 rec = self._read_record(path, idx)
                 record_key = rec.campos[self.field_index].strip()
                 
-                print(f"      - Valor en campo indexado: '{record_key}'")
-                print(f"      - ¿Coincide con '{key}'? {record_key == key}")
+                if debug:
+                    logger.debug("Posición %d (%s[%d]): valor '%s'", cur, 'data' if is_data else 'aux', idx, record_key)
                 
-                if record_key == key.strip():
+                if record_key == key_s:
                     # ¡ENCONTRADO! Eliminar este registro
-                    print(f"    ELIMINANDO registro: {str(rec)}")
                     removed.append(str(rec))
+                    if debug:
+                        logger.debug("ELIMINANDO registro: %s", removed[-1])
                     eliminated_count += 1
                     
                     # Desenlazar el nodo
@@ -313,17 +534,18 @@ class SequentialFile(BaseIndex):
                     
                     if prev is None:
                         # El registro a eliminar es el head
-                        print(f"      - Actualizando head de {cur} a {next_pos}")
+                        if debug:
+                            logger.debug("Actualizando head de %d a %d", cur, next_pos)
                         self._write_header(self.data_file, next_pos)
                     else:
                         # Actualizar el next_pos del nodo anterior
-                        print(f"      - Actualizando next_pos de posición {prev} a {next_pos}")
+                        if debug:
+                            logger.debug("Actualizando next_pos de posición %d a %d", prev, next_pos)
                         
                         # Leer el nodo anterior
-                        prev_count_data = self._count_records(self.data_file)
-                        prev_is_data = prev < prev_count_data
+                        prev_is_data = prev < count_data
                         prev_path = self.data_file if prev_is_data else self.aux_file
-                        prev_idx = prev if prev_is_data else prev - prev_count_data
+                        prev_idx = prev if prev_is_data else prev - count_data
                         
                         prev_rec = self._read_record(prev_path, prev_idx)
                         prev_rec.next_pos = next_pos
@@ -344,40 +566,17 @@ class SequentialFile(BaseIndex):
                     prev, cur = cur, rec.next_pos
                     
             except Exception as e:
-                print(f"    Error procesando posición {cur}: {e}")
+                logger.warning("Error procesando posición %d: %s", cur, e)
                 break
         
-        print(f"    RESULTADO: {eliminated_count} registros eliminados")
-        
-        # Verificar estado final
-        final_head = self._read_header(self.data_file)
-        print(f"   - Head final: {final_head}")
+        if debug:
+            # Verificar estado final
+            logger.debug("RESULTADO: %d registros eliminados, head final: %d",
+                         eliminated_count, self._read_header(self.data_file))
         
         return removed
 
     def rebuild(self) -> None:
+        self._invalidate_cache()
         # Merge main and aux files, sort, and rebuild the main file
-        all_records = []
-        pos = self._read_header(self.data_file)
-        total_data = self._count_records(self.data_file)
-        total_aux = self._count_records(self.aux_file)
-        while pos != -1:
-            is_data = pos < total_data
-            path = self.data_file if is_data else self.aux_file
-            idx = pos if is_data else pos - total_data
-            rec = self._read_record(path, idx)
-            all_records.append(rec)
-            pos = rec.next_pos
-        # Sort all records
-        all_records.sort(key=lambda r: r.campos[self.field_index])
-        # Relink
-        for i, r in enumerate(all_records):
-            r.next_pos = i+1 if i+1 < len(all_records) else -1
-        # Rewrite data file
-        with open(self.data_file, 'wb') as f:
-            f.write(struct.pack('ii', 0 if all_records else -1, self.num_campos))
-            for r in all_records:
-                f.write(r.pack(self.format))
-        # Reset aux file
-        with open(self.aux_file, 'wb') as f:
-            f.write(struct.pack('ii', -1, self.num_campos))
\ No newline at end of file
+        self._write_sorted(self._linked_records())
\ No newline at end of file
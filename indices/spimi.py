@@ -4,14 +4,19 @@ Versión adaptada para el proyecto de base de datos multimedia con método load_
 """
 
 import os
+import json
 import pickle
 import heapq
 import tempfile
 import csv
+import io
+import re
 import math
-from typing import Dict, List, Tuple, Iterator, Optional
+from typing import Any, Dict, List, Tuple, Iterable, Iterator, Optional
 from collections import defaultdict, Counter
+from collections.abc import Mapping
 import gc
+from numbers import Integral
 
 # Imports con manejo de errores para compatibilidad
 try:
@@ -20,6 +25,323 @@ try:
 except ImportError:
     TEXT_PROCESSING_AVAILABLE = False
 
+# NumPy es opcional: permite guardar los postings como arrays planos mapeados en memoria
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+# msgpack es opcional: el léxico se decodifica bastante más rápido que en JSON
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    msgpack = None
+    MSGPACK_AVAILABLE = False
+
+# Sufijos de los archivos planos que acompañan al pickle del índice final
+FLAT_DOCGAPS = '.docgaps'    # uint8: d-gaps de los doc_ids empaquetados a b bits por bloque
+FLAT_BLOCKS = '.blocks'      # uint8: bits por valor (b) de cada bloque de POSTING_BLOCK gaps
+FLAT_WEIGHTS = '.weights'    # float32: peso TF-IDF de cada posting (mismo orden)
+FLAT_NORMS = '.norms'        # float64: norma de cada documento, indexada por doc_id
+FLAT_LEXICON = '.lexicon.json'  # término -> term_id (orden alfabético) y metadatos
+FLAT_TERMS = '.terms'        # int64 (V+1, 3): [offset del posting, primer bloque, byte inicial] por term_id
+FLAT_DF = '.df'              # int32: document frequency de cada término, indexada por term_id
+FLAT_ROWS = '.rows'          # int64: byte de inicio de cada fila del CSV de origen, indexado por doc_id
+FLAT_LEXICON_MSGPACK = '.lexicon.msgpack'  # el mismo léxico en msgpack, precedido por un byte de versión
+LEXICON_VERSION = 1
+# Tipo de los pesos al escribir; el léxico lo registra (índices sin el campo son float64)
+WEIGHTS_DTYPE = 'float32'
+
+# Gaps por bloque en el empaquetado FOR (cada bloque usa el ancho de su gap más grande)
+POSTING_BLOCK = 128
+
+
+def _pack_gaps(gaps, bits: int):
+    """Empaqueta enteros no negativos con ``bits`` bits cada uno (big-endian dentro del byte)."""
+    if bits == 0:
+        return np.empty(0, dtype=np.uint8)
+    shifts = np.arange(bits - 1, -1, -1, dtype=np.uint32)
+    matrix = ((gaps.astype(np.uint32)[:, None] >> shifts) & 1).astype(np.uint8)
+    return np.packbits(matrix.ravel())
+
+
+def _unpack_gaps(packed, count: int, bits: int):
+    """Inverso de ``_pack_gaps``: ``count`` enteros de ``bits`` bits."""
+    if bits == 0:
+        return np.zeros(count, dtype=np.int64)
+    matrix = np.unpackbits(packed)[:count * bits].reshape(count, bits).astype(np.int64)
+    return matrix @ (np.int64(1) << np.arange(bits - 1, -1, -1, dtype=np.int64))
+
+
+def write_flat_postings(index_path: str, index: Dict[str, List[Tuple[int, float]]],
+                        document_norms: Dict[int, float], header: Dict[str, Any]) -> None:
+    """Escribe el índice como arrays planos más un léxico JSON.
+
+    Los doc_ids de cada término (ordenados) se guardan como d-gaps en bloques de
+    ``POSTING_BLOCK`` valores, cada bloque empaquetado con los bits justos para su
+    gap más grande (FOR); los pesos quedan como float32 (4 bytes por posting, la
+    precisión sobra para el coseno), las normas como float64 y la df de cada
+    término como int32 en el orden de su term_id.
+    """
+    # term_id denso: posición del término en el vocabulario ordenado
+    vocabulary = sorted(index)
+    lexicon: Dict[str, int] = {term: term_id for term_id, term in enumerate(vocabulary)}
+    term_table = np.zeros((len(vocabulary) + 1, 3), dtype=np.int64)
+    packed_parts = []
+    block_bits: List[int] = []
+    offset = 0
+    byte_offset = 0
+    for term_id, term in enumerate(vocabulary):
+        postings = index[term]
+        doc_ids = np.fromiter((doc_id for doc_id, _ in postings), dtype=np.int64, count=len(postings))
+        gaps = np.diff(doc_ids, prepend=0)
+        term_table[term_id] = (offset, len(block_bits), byte_offset)
+        for start in range(0, len(gaps), POSTING_BLOCK):
+            block = gaps[start:start + POSTING_BLOCK]
+            bits = int(block.max()).bit_length()
+            packed = _pack_gaps(block, bits)
+            packed_parts.append(packed)
+            block_bits.append(bits)
+            byte_offset += len(packed)
+        offset += len(postings)
+    # Fila centinela: la longitud de cada lista es offset[t + 1] - offset[t]
+    term_table[len(vocabulary)] = (offset, len(block_bits), byte_offset)
+
+    weights = np.fromiter((weight for term in vocabulary for _, weight in index[term]),
+                          dtype=np.float64, count=offset).astype(WEIGHTS_DTYPE)
+    norms = np.zeros(header.get('total_documents', 0), dtype=np.float64)
+    for doc_id, norm in document_norms.items():
+        if 0 <= doc_id < len(norms):
+            norms[doc_id] = norm
+
+    packed_all = np.concatenate(packed_parts) if packed_parts else np.empty(0, dtype=np.uint8)
+    packed_all.tofile(index_path + FLAT_DOCGAPS)
+    np.asarray(block_bits, dtype=np.uint8).tofile(index_path + FLAT_BLOCKS)
+    weights.tofile(index_path + FLAT_WEIGHTS)
+    norms.tofile(index_path + FLAT_NORMS)
+    np.fromiter((len(index[term]) for term in vocabulary), dtype=np.int32, count=len(vocabulary)).tofile(index_path + FLAT_DF)
+    term_table.tofile(index_path + FLAT_TERMS)
+    _write_lexicon(index_path, {'header': header, 'terms': lexicon, 'weights_dtype': WEIGHTS_DTYPE})
+
+
+def _write_lexicon(index_path: str, data: Dict[str, Any]) -> None:
+    """Guarda el léxico en msgpack si está disponible (JSON si no) y borra la otra variante."""
+    if MSGPACK_AVAILABLE:
+        target, stale = index_path + FLAT_LEXICON_MSGPACK, index_path + FLAT_LEXICON
+        with open(target, 'wb') as f:
+            f.write(bytes([LEXICON_VERSION]))
+            f.write(msgpack.packb(data, use_bin_type=True))
+    else:
+        target, stale = index_path + FLAT_LEXICON, index_path + FLAT_LEXICON_MSGPACK
+        with open(target, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+    if os.path.exists(stale):
+        os.remove(stale)
+
+
+def _read_lexicon(index_path: str) -> Dict[str, Any]:
+    """Lee el léxico en msgpack (verificando el byte de versión) o, en índices antiguos, en JSON."""
+    if MSGPACK_AVAILABLE and os.path.exists(index_path + FLAT_LEXICON_MSGPACK):
+        with open(index_path + FLAT_LEXICON_MSGPACK, 'rb') as f:
+            raw = f.read()
+        if raw[:1] != bytes([LEXICON_VERSION]):
+            raise ValueError(f"Versión de léxico no soportada en {index_path + FLAT_LEXICON_MSGPACK}")
+        return msgpack.unpackb(raw[1:], raw=False)
+    with open(index_path + FLAT_LEXICON, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class FlatPostings:
+    """
+    Vista de solo lectura de un índice guardado con ``write_flat_postings``.
+
+    Los postings viven en arrays NumPy mapeados en memoria: abrir el índice solo
+    lee el léxico, y los doc_ids de un término se desempaquetan (y se convierten a
+    lista de (doc_id, peso)) recién cuando se consulta. Expone la interfaz de dict
+    que usa ``InvertedIndex``.
+    """
+
+    def __init__(self, index_path: str):
+        data = _read_lexicon(index_path)
+        self.header: Dict[str, Any] = data.get('header', {})
+        self.terms: Dict[str, int] = data.get('terms', {})
+        self.term_table = self._map(index_path + FLAT_TERMS, np.int64).reshape(-1, 3)
+        self.doc_gaps = self._map(index_path + FLAT_DOCGAPS, np.uint8)
+        self.block_bits = self._map(index_path + FLAT_BLOCKS, np.uint8)
+        self.weights = self._map(index_path + FLAT_WEIGHTS, np.dtype(data.get('weights_dtype', 'float64')))
+        self.norms = self._map(index_path + FLAT_NORMS, np.float64)
+        self.df = self._map(index_path + FLAT_DF, np.int32)
+
+    @staticmethod
+    def exists(index_path: str) -> bool:
+        if not NUMPY_AVAILABLE or not all(os.path.exists(index_path + suffix) for suffix in
+                                          (FLAT_DOCGAPS, FLAT_BLOCKS, FLAT_WEIGHTS, FLAT_NORMS, FLAT_DF, FLAT_TERMS)):
+            return False
+        return (os.path.exists(index_path + FLAT_LEXICON) or
+                (MSGPACK_AVAILABLE and os.path.exists(index_path + FLAT_LEXICON_MSGPACK)))
+
+    @staticmethod
+    def _map(path: str, dtype) -> Any:
+        # np.memmap no admite archivos vacíos
+        if os.path.getsize(path) == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode='r')
+
+    def term_id(self, term: str) -> Optional[int]:
+        """term_id del término (None si no está en el vocabulario)."""
+        return self.terms.get(term)
+
+    def posting_count(self, term_id: int) -> int:
+        return int(self.term_table[term_id + 1, 0] - self.term_table[term_id, 0])
+
+    def postings_arrays(self, term: str) -> Tuple[Any, Any]:
+        """(doc_ids int32 desempaquetados, vista de los pesos) del término."""
+        return self.postings_by_id(self.terms[term])
+
+    def postings_by_id(self, term_id: int) -> Tuple[Any, Any]:
+        """Como ``postings_arrays`` pero a partir del term_id, sin volver a buscar el string."""
+        offset, block, byte_offset = (int(value) for value in self.term_table[term_id])
+        length = int(self.term_table[term_id + 1, 0]) - offset
+        doc_ids = np.empty(length, dtype=np.int32)
+        for start in range(0, length, POSTING_BLOCK):
+            count = min(POSTING_BLOCK, length - start)
+            bits = int(self.block_bits[block])
+            size = (count * bits + 7) // 8
+            doc_ids[start:start + count] = _unpack_gaps(self.doc_gaps[byte_offset:byte_offset + size], count, bits)
+            byte_offset += size
+            block += 1
+        # Los gaps se acumulan sobre todo el término: el primero es relativo a 0
+        np.cumsum(doc_ids, out=doc_ids)
+        return doc_ids, self.weights[offset:offset + length]
+
+    def __getitem__(self, term: str) -> List[Tuple[int, float]]:
+        doc_ids, weights = self.postings_arrays(term)
+        return list(zip(doc_ids.tolist(), weights.tolist()))
+
+    def get(self, term: str, default=None):
+        return self[term] if term in self.terms else default
+
+    def __contains__(self, term) -> bool:
+        return term in self.terms
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.terms)
+
+    def keys(self):
+        return self.terms.keys()
+
+    def items(self) -> Iterator[Tuple[str, List[Tuple[int, float]]]]:
+        for term in self.terms:
+            yield term, self[term]
+
+    def values(self) -> Iterator[List[Tuple[int, float]]]:
+        for term in self.terms:
+            yield self[term]
+
+    def document_frequencies(self) -> 'TermFrequencies':
+        """df de cada término como vista sobre el léxico (sin armar un dict de tamaño V)."""
+        return TermFrequencies(self.terms, self.df)
+
+
+class TermFrequencies(Mapping):
+    """Mapping término -> df que resuelve ``df[term_id]`` con el term_id guardado en el léxico."""
+
+    def __init__(self, terms: Dict[str, int], df):
+        self.terms = terms
+        self.df = df
+
+    def __getitem__(self, term: str) -> int:
+        return int(self.df[self.terms[term]])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.terms)
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+
+def csv_row_offsets(csv_path: str):
+    """
+    Byte de inicio de cada registro del CSV (sin el header), en el orden de ``csv.DictReader``.
+
+    Un registro termina en el primer salto de línea con un número par de comillas
+    acumuladas, así los campos entre comillas con saltos de línea quedan en un solo
+    registro; las líneas vacías se omiten igual que en DictReader.
+    """
+    offsets = []
+    header_read = False
+    position = 0
+    start = None
+    quotes = 0
+    with open(csv_path, 'rb') as f:
+        for line in f:
+            if start is None:
+                if line in (b'\n', b'\r\n'):
+                    position += len(line)
+                    continue
+                start = position
+            quotes += line.count(b'"')
+            position += len(line)
+            if quotes % 2 == 0:
+                if header_read:
+                    offsets.append(start)
+                header_read = True
+                start = None
+                quotes = 0
+    if start is not None and header_read:
+        offsets.append(start)
+    return np.asarray(offsets, dtype=np.int64) if NUMPY_AVAILABLE else offsets
+
+
+class CsvRows(Mapping):
+    """
+    Filas de un CSV como dicts (los mismos que daría ``csv.DictReader``) leídas bajo
+    demanda: ``rows[doc_id]`` hace un seek al offset de la fila y decodifica solo esa.
+    """
+
+    def __init__(self, csv_path: str, offsets, encoding: str = 'utf-8'):
+        self.csv_path = csv_path
+        self.offsets = offsets
+        self.encoding = encoding
+        with open(csv_path, 'r', encoding=encoding) as f:
+            self.fieldnames = csv.DictReader(f).fieldnames or []
+        self._size = os.path.getsize(csv_path)
+
+    def __getitem__(self, doc_id) -> Dict[str, Any]:
+        if not isinstance(doc_id, Integral) or not 0 <= doc_id < len(self.offsets):
+            raise KeyError(doc_id)
+        doc_id = int(doc_id)
+        start = int(self.offsets[doc_id])
+        end = int(self.offsets[doc_id + 1]) if doc_id + 1 < len(self.offsets) else self._size
+        with open(self.csv_path, 'rb') as f:
+            f.seek(start)
+            raw = f.read(end - start)
+        # newline=None: mismos saltos de línea que el archivo abierto en modo texto
+        row = next(csv.reader(io.StringIO(raw.decode(self.encoding), newline=None)), [])
+        record = dict(zip(self.fieldnames, row))
+        # Mismo criterio que DictReader para filas con más o menos campos que el header
+        if len(row) > len(self.fieldnames):
+            record[None] = row[len(self.fieldnames):]
+        for field in self.fieldnames[len(row):]:
+            record[field] = None
+        return record
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(range(len(self.offsets)))
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+# Acentos básicos -> ASCII y patrón de palabras, preparados una vez para todos los textos
+ACCENT_TABLE = str.maketrans({'á': 'a', 'é': 'e', 'í': 'i', 'ó': 'o', 'ú': 'u', 'ñ': 'n'})
+WORD_PATTERN = re.compile(r'\b[a-z]+\b')
+
 # Procesador de texto simplificado integrado
 class SimpleTextProcessor:
     """Procesador de texto básico sin dependencias externas"""
@@ -47,18 +369,14 @@ class SimpleTextProcessor:
         if not text or not isinstance(text, str):
             return []
         
-        import re
-        
         # Limpiar y normalizar
         text = text.lower()
         
-        # Quitar acentos básicos
-        replacements = {'á': 'a', 'é': 'e', 'í': 'i', 'ó': 'o', 'ú': 'u', 'ñ': 'n'}
-        for old, new in replacements.items():
-            text = text.replace(old, new)
+        # Quitar acentos básicos (una sola pasada en C)
+        text = text.translate(ACCENT_TABLE)
         
         # Extraer palabras
-        words = re.findall(r'\b[a-z]+\b', text)
+        words = WORD_PATTERN.findall(text)
         
         # Filtrar stopwords y palabras cortas
         words = [w for w in words if len(w) >= 3 and w not in self.stopwords]
@@ -214,8 +532,7 @@ class SPIMIIndexBuilder:
         print(f" Campos de texto: {self.text_fields}")
         
         try:
-            # Paso 1: Cargar datos del CSV
-            data = []
+            # Paso 1 y 2: leer el CSV en streaming y preprocesar cada registro al vuelo
             with open(csv_path, 'r', encoding=encoding) as f:
                 reader = csv.DictReader(f)
                 headers = list(reader.fieldnames) if reader.fieldnames else []
@@ -236,14 +553,7 @@ class SPIMIIndexBuilder:
                 
                 self.text_fields = available_text_fields
                 
-                # Cargar registros
-                for row in reader:
-                    data.append(row)
-            
-            print(f" Registros cargados: {len(data)}")
-            
-            # Paso 2: Preprocesar documentos
-            processed_docs, doc_metadata = self._preprocess_documents(data)
+                processed_docs = self._preprocess_documents(reader)
             
             if not processed_docs:
                 print(" No se procesaron documentos válidos")
@@ -255,6 +565,10 @@ class SPIMIIndexBuilder:
             # Paso 4: Construir índice usando SPIMI
             index_path = self.build_index(processed_docs, tfidf_vectors)
             
+            # Offsets de cada fila del CSV: la búsqueda lee solo las filas del top-k
+            if NUMPY_AVAILABLE and index_path:
+                csv_row_offsets(csv_path).tofile(index_path + FLAT_ROWS)
+            
             print(f" Índice SPIMI construido exitosamente: {index_path}")
             return index_path
             
@@ -264,16 +578,16 @@ class SPIMIIndexBuilder:
             traceback.print_exc()
             return ""
     
-    def _preprocess_documents(self, data: List[dict]) -> Tuple[List[Tuple[int, List[str]]], Dict[int, dict]]:
-        """Preprocesa los documentos concatenando campos de texto"""
+    def _preprocess_documents(self, records: Iterable[dict]) -> List[Tuple[int, List[str]]]:
+        """Preprocesa los documentos (en streaming) concatenando campos de texto"""
         processed_docs = []
-        doc_metadata = {}
         
         print(" Preprocesando documentos...")
         
-        for doc_id, record in enumerate(data):
+        doc_id = -1
+        for doc_id, record in enumerate(records):
             if doc_id % 1000 == 0:
-                print(f"   Procesando documento {doc_id + 1}/{len(data)}")
+                print(f"   Procesando documento {doc_id + 1}")
             
             # Concatenar campos de texto
             text_content = self.preprocessor.concatenate_fields(record, self.text_fields)
@@ -283,10 +597,10 @@ class SPIMIIndexBuilder:
             
             if tokens:  # Solo incluir documentos con contenido
                 processed_docs.append((doc_id, tokens))
-                doc_metadata[doc_id] = record.copy()
         
+        print(f" Registros leídos: {doc_id + 1}")
         print(f" Preprocesados {len(processed_docs)} documentos con contenido")
-        return processed_docs, doc_metadata
+        return processed_docs
     
     def _calculate_tfidf_vectors(self, processed_docs: List[Tuple[int, List[str]]]) -> List[Dict[str, float]]:
         """Calcula vectores TF-IDF para todos los documentos"""
@@ -392,7 +706,7 @@ class SPIMIIndexBuilder:
                 'index': dict(block.index),
                 'doc_count': block.doc_count,
                 'term_count': len(block.index)
-            }, f)
+            }, f, protocol=5)
         
         self.block_files.append(block_path)
         print(f" Bloque {block.block_id}: {len(block.index)} términos, {block.doc_count} docs")
@@ -406,7 +720,7 @@ class SPIMIIndexBuilder:
             os.makedirs("embeddings", exist_ok=True)
             final_index_path = "embeddings/spimi_index.pkl"
             with open(final_index_path, 'wb') as f:
-                pickle.dump({'index': {}, 'total_terms': 0, 'build_method': 'SPIMI'}, f)
+                pickle.dump({'index': {}, 'total_terms': 0, 'build_method': 'SPIMI'}, f, protocol=5)
             return final_index_path
         
         # Cargar todos los bloques
@@ -482,7 +796,17 @@ class SPIMIIndexBuilder:
                 # ========== NUEVOS CAMPOS ==========
                 'document_norms': document_norms,
                 'document_frequencies': document_frequencies
-            }, f)
+            }, f, protocol=5)
+        
+        # Copia plana del mismo índice para abrirlo con mmap sin deserializar el pickle
+        if NUMPY_AVAILABLE:
+            write_flat_postings(final_index_path, final_index, document_norms, {
+                'total_terms': len(final_index),
+                'total_documents': total_documents,
+                'text_fields': self.text_fields,
+                'language': self.language,
+                'build_method': 'SPIMI'
+            })
         
         print(f" Merge completado: {len(final_index)} términos únicos")
         print(f" Normas guardadas: {len(document_norms)} documentos")
@@ -103,15 +103,17 @@ def select_image_method():
     print("1. SIFT - Descriptores locales (robusto, tradicional)")
     print("2. ResNet50 - Red neuronal preentrenada (características globales)")
     print("3. InceptionV3 - Red neuronal preentrenada (características complejas)")
+    print("4. ORB - Descriptores locales binarios (más rápido que SIFT)")
     
     methods = {
         '1': 'sift',
         '2': 'resnet50',
-        '3': 'inception_v3'
+        '3': 'inception_v3',
+        '4': 'orb'
     }
     
     while True:
-        choice = input("\nSeleccione el método (1-3): ").strip()
+        choice = input("\nSeleccione el método (1-4): ").strip()
         if choice in methods:
             return methods[choice]
         else:
@@ -75,21 +75,25 @@ class CodebookBuilder:
             
         else:
             # For images: standard bag-of-words clustering
-            all_descriptors = []
+            descriptor_blocks = []
             for file_path, features in features_data:
                 if features.ndim == 1:
                     # If 1D, it might be a summary feature - skip or handle differently
                     print(f" Advertencia: características 1D encontradas para {file_path}")
                     continue
-                else:
-                    # 2D array: multiple descriptors (e.g., SIFT keypoints)
-                    for descriptor in features:
-                        all_descriptors.append(descriptor)
+                # 2D array: multiple descriptors (e.g., SIFT keypoints)
+                descriptor_blocks.append(features)
             
-            if not all_descriptors:
+            total_descriptors = sum(block.shape[0] for block in descriptor_blocks)
+            if total_descriptors == 0:
                 raise ValueError("No se encontraron descriptores válidos para clustering")
             
-            descriptors = np.vstack(all_descriptors)
+            # Single preallocation filled in place (no per-descriptor list, no vstack copy)
+            descriptors = np.empty((total_descriptors, descriptor_blocks[0].shape[1]), dtype=np.float32)
+            offset = 0
+            for block in descriptor_blocks:
+                descriptors[offset:offset + block.shape[0]] = block
+                offset += block.shape[0]
             print(f"📊 Total descriptores para clustering: {len(descriptors)}")
             
             if normalize:
@@ -203,7 +207,7 @@ class CodebookBuilder:
         }
         os.makedirs(os.path.dirname(save_path), exist_ok=True)
         with open(save_path, 'wb') as f:
-            pickle.dump(data, f)
+            pickle.dump(data, f, protocol=5)
         print(f"Codebook guardado: {save_path}")
     
     def load_codebook(self, load_path):
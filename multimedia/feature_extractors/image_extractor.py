@@ -2,6 +2,7 @@
 import numpy as np
 import pickle
 import os
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Tuple, Optional, Any, Union
 
 # Importaciones seguras para evitar errores
@@ -39,17 +40,22 @@ except ImportError:
     PIL_AVAILABLE = False
     Image = None
 
+# Decodificación de imágenes en paralelo con el cálculo de descriptores locales
+DECODE_WORKERS = 4
+DECODE_WINDOW = 32
+
 class ImageFeatureExtractor:
     def __init__(self, method='sift'):
         """
         Extractor de características para imágenes
         
         Args:
-            method: 'sift', 'resnet50', 'inception_v3'
+            method: 'sift', 'orb', 'resnet50', 'inception_v3'
         """
         self.method = method.lower()
         self.model: Optional[Any] = None
         self.sift: Optional[Any] = None
+        self.orb: Optional[Any] = None
         
         # Validar dependencias según el método
         if self.method == 'sift':
@@ -60,6 +66,13 @@ class ImageFeatureExtractor:
             self.sift = self._create_sift_detector()
             if self.sift is None:
                 raise ImportError("SIFT no está disponible en esta versión de OpenCV")
+        
+        elif self.method == 'orb':
+            if not CV2_AVAILABLE or cv2 is None:
+                raise ImportError("OpenCV no está instalado. Ejecuta: pip install opencv-python")
+            
+            # ORB: descriptores binarios de 256 bits, mucho más baratos que SIFT
+            self.orb = cv2.ORB_create(nfeatures=500)  # type: ignore
                     
         elif self.method in ['resnet50', 'inception_v3']:
             if not TENSORFLOW_AVAILABLE:
@@ -72,7 +85,7 @@ class ImageFeatureExtractor:
             else:
                 raise ImportError(f"No se pudo cargar el modelo {self.method}")
         else:
-            raise ValueError(f"Método '{method}' no soportado. Use: 'sift', 'resnet50', 'inception_v3'")
+            raise ValueError(f"Método '{method}' no soportado. Use: 'sift', 'orb', 'resnet50', 'inception_v3'")
     
     def _create_sift_detector(self) -> Optional[Any]:
         """Crea detector SIFT manejando diferentes versiones de OpenCV"""
@@ -113,30 +126,63 @@ class ImageFeatureExtractor:
         
         return None
     
-    def extract_sift_features(self, image_path: str) -> Optional[np.ndarray]:
-        """Extrae características SIFT de una imagen"""
-        if not CV2_AVAILABLE or cv2 is None or self.sift is None:
-            raise RuntimeError("SIFT no está disponible")
-            
+    def _load_gray(self, image_path: str) -> Optional[np.ndarray]:
+        """Decodifica una imagen en escala de grises (None si no se puede)"""
+        if not os.path.exists(image_path):
+            print(f"Archivo no encontrado: {image_path}")
+            return None
         try:
-            img = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
-            if img is None:
-                print(f"No se pudo cargar la imagen: {image_path}")
-                return None
-                
-            keypoints, descriptors = self.sift.detectAndCompute(img, None)
+            img = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)  # type: ignore
+        except Exception as e:
+            print(f"Error leyendo {image_path}: {e}")
+            return None
+        if img is None:
+            print(f"No se pudo cargar la imagen: {image_path}")
+        return img
+    
+    def _compute_local_descriptors(self, img: np.ndarray, image_path: str) -> Optional[np.ndarray]:
+        """Calcula descriptores SIFT u ORB sobre una imagen ya decodificada"""
+        is_sift = self.method == 'sift'
+        detector = self.sift if is_sift else self.orb
+        label = self.method.upper()
+        
+        try:
+            keypoints, descriptors = detector.detectAndCompute(img, None)  # type: ignore
             
             if descriptors is None:
-                print(f"No se encontraron características SIFT en: {image_path}")
+                print(f"No se encontraron características {label} en: {image_path}")
                 # Crear descriptor dummy para evitar errores
-                return np.random.rand(1, 128).astype(np.float32)
-                
-            return descriptors
+                return np.random.rand(1, 128 if is_sift else 32).astype(np.float32)
+            
+            if is_sift:
+                return descriptors
+            # Los descriptores uint8 de ORB se pasan a float32 para el mismo pipeline BoW (K-means)
+            return descriptors.astype(np.float32)
             
         except Exception as e:
-            print(f"Error extrayendo SIFT de {image_path}: {e}")
+            print(f"Error extrayendo {label} de {image_path}: {e}")
             return None
     
+    def extract_sift_features(self, image_path: str) -> Optional[np.ndarray]:
+        """Extrae características SIFT de una imagen"""
+        if not CV2_AVAILABLE or cv2 is None or self.sift is None:
+            raise RuntimeError("SIFT no está disponible")
+        
+        img = self._load_gray(image_path)
+        if img is None:
+            return None
+        return self._compute_local_descriptors(img, image_path)
+    
+    def extract_orb_features(self, image_path: str) -> Optional[np.ndarray]:
+        """Extrae características ORB de una imagen"""
+        if not CV2_AVAILABLE or cv2 is None or self.orb is None:
+            raise RuntimeError("ORB no está disponible")
+        
+        img = self._load_gray(image_path)
+        if img is None:
+            return None
+        return self._compute_local_descriptors(img, image_path)
+    
     def extract_cnn_features(self, image_path: str) -> Optional[np.ndarray]:
         """Extrae características CNN (ResNet50 o InceptionV3)"""
         if not TENSORFLOW_AVAILABLE or self.model is None or image is None:
@@ -182,6 +228,8 @@ class ImageFeatureExtractor:
             
         if self.method == 'sift':
             return self.extract_sift_features(image_path)
+        elif self.method == 'orb':
+            return self.extract_orb_features(image_path)
         else:
             return self.extract_cnn_features(image_path)
     
@@ -193,20 +241,36 @@ class ImageFeatureExtractor:
         print(f"\n🖼️  Extrayendo características de {total} imágenes usando {self.method.upper()}...")
         print("=" * 50)
         
-        for i, path in enumerate(image_paths, 1):
-            # Mostrar progreso más frecuentemente
-            if i == 1 or i % 5 == 0 or i == total:
-                progress = i / total * 100
-                bar_length = 40
-                filled = int(bar_length * i / total)
-                bar = '█' * filled + '░' * (bar_length - filled)
-                print(f"\r[{bar}] {progress:.1f}% - Procesando imagen {i}/{total}", end='', flush=True)
+        # Para SIFT/ORB, cv2.imread libera el GIL: se decodifican las siguientes
+        # imágenes en hilos mientras se calculan los descriptores de la actual
+        local_method = self.method in ('sift', 'orb')
+        decoder = ThreadPoolExecutor(max_workers=DECODE_WORKERS) if local_method else None
+        
+        try:
+            for start in range(0, total, DECODE_WINDOW):
+                window = image_paths[start:start + DECODE_WINDOW]
+                decoded = decoder.map(self._load_gray, window) if decoder else [None] * len(window)
                 
-            features = self.extract_features(path)
-            if features is not None:
-                results.append((path, features))
-            else:
-                print(f" No se pudieron extraer características de: {path}")
+                for i, (path, img) in enumerate(zip(window, decoded), start + 1):
+                    # Mostrar progreso más frecuentemente
+                    if i == 1 or i % 5 == 0 or i == total:
+                        progress = i / total * 100
+                        bar_length = 40
+                        filled = int(bar_length * i / total)
+                        bar = '█' * filled + '░' * (bar_length - filled)
+                        print(f"\r[{bar}] {progress:.1f}% - Procesando imagen {i}/{total}", end='', flush=True)
+                    
+                    if local_method:
+                        features = self._compute_local_descriptors(img, path) if img is not None else None
+                    else:
+                        features = self.extract_features(path)
+                    if features is not None:
+                        results.append((path, features))
+                    else:
+                        print(f" No se pudieron extraer características de: {path}")
+        finally:
+            if decoder is not None:
+                decoder.shutdown(wait=True)
         
         print(f"\n✅ Características extraídas exitosamente: {len(results)}/{total}")
         return results
@@ -216,7 +280,7 @@ class ImageFeatureExtractor:
         try:
             os.makedirs(os.path.dirname(output_path), exist_ok=True)
             with open(output_path, 'wb') as f:
-                pickle.dump(features_data, f)
+                pickle.dump(features_data, f, protocol=5)
             print(f" Características guardadas en: {output_path}")
         except Exception as e:
             print(f" Error guardando características: {e}")
@@ -243,6 +307,7 @@ class ImageFeatureExtractor:
             temp_extractor.method = 'sift'
             if temp_extractor._create_sift_detector() is not None:
                 methods.append('sift')
+            methods.append('orb')
         
         if TENSORFLOW_AVAILABLE:
             methods.extend(['resnet50', 'inception_v3'])
@@ -257,5 +322,6 @@ class ImageFeatureExtractor:
             'tensorflow_available': TENSORFLOW_AVAILABLE,
             'pil_available': PIL_AVAILABLE,
             'model_loaded': self.model is not None,
-            'sift_available': self.sift is not None
+            'sift_available': self.sift is not None,
+            'orb_available': self.orb is not None
         }
\ No newline at end of file
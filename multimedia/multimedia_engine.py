@@ -150,7 +150,7 @@ class MultimediaEngine:
         if save_histograms:
             import pickle
             with open(histograms_path, 'wb') as f:
-                pickle.dump(histograms_data, f)
+                pickle.dump(histograms_data, f, protocol=5)
         
         self.histograms_data = histograms_data
         print(f"Histogramas creados: {len(histograms_data)} objetos")
@@ -333,7 +333,7 @@ class MultimediaEngine:
         if self.histograms_data:
             import pickle
             with open(os.path.join(base_path, "histograms.pkl"), 'wb') as f:
-                pickle.dump(self.histograms_data, f)
+                pickle.dump(self.histograms_data, f, protocol=5)
         
         # Guardar índice invertido
         if self.is_built:
@@ -67,7 +67,7 @@ class SQLParser:
         """
         Parsea CREATE MULTIMEDIA TABLE
         Sintaxis: CREATE MULTIMEDIA TABLE tabla_name FROM FILE "archivo.csv" 
-                 USING media_type (image|audio) WITH method (sift|resnet50|mfcc) CLUSTERS n;
+                 USING media_type (image|audio) WITH method (sift|orb|resnet50|mfcc) CLUSTERS n;
         """
         pattern = r'create\s+multimedia\s+table\s+(\w+)\s+from\s+file\s+"([^"]+)"\s+using\s+(image|audio)\s+with\s+method\s+(\w+)(?:\s+clusters\s+(\d+))?'
         match = re.search(pattern, query, re.IGNORECASE)
@@ -213,7 +213,7 @@ class SQLParser:
             
             # También registrar en el engine tradicional para mantener metadatos
             self.engine.tables[table_name] = f"multimedia_{media_type}_{method}"
-            self.engine.table_headers[table_name] = list(df.columns)
+            self.engine.table_headers[table_name] = tuple(df.columns)
             self.engine.table_file_paths[table_name] = file_path
             
             total_time = extraction_time + codebook_time + histograms_time + indices_time
@@ -861,8 +861,7 @@ class SQLParser:
         match = re.search(basic_pattern, query.strip(), re.IGNORECASE)
         if match:
             table_name = match.group(1)
-            result = self.engine.scan(table_name)
-            return result.split('\n') if result else []
+            return list(self.engine.scan_iter(table_name))
         
         raise ValueError(f"Sintaxis SELECT no reconocida: {query}")
     
@@ -0,0 +1,41 @@
+from indices.btree import BPlusTree
+
+
+def _tree(tmp_path, rows, order=4):
+    tree = BPlusTree(str(tmp_path / 'tree.pkl'), order=order)
+    tree.load_csv(iter(rows))
+    return tree
+
+
+def test_int_bounds_on_float_keys(tmp_path):
+    rows = [[str(lat), f'p{i}'] for i, lat in enumerate([46.9, 47.0, 47.25, 47.5, 48.0, 48.1, 12])]
+    tree = _tree(tmp_path, rows)
+
+    assert [row[0] for row in tree.range_search('47', '48')] == ['47.0', '47.25', '47.5', '48.0']
+    assert [row[0] for row in tree.range_search(12, 47)] == ['12', '46.9', '47.0']
+    assert tree.search('48') == [['48.0', 'p4']]
+    assert tree.remove('47') == ['47.0,p1']
+    assert [row[0] for row in tree.range_search('47', '48')] == ['47.25', '47.5', '48.0']
+
+
+def test_numbers_sort_before_strings(tmp_path):
+    tree = _tree(tmp_path, [['b', '1'], ['10', '2'], ['2.5', '3'], ['a', '4']])
+
+    assert [row[0] for row in tree.scan_all()] == ['2.5', '10', 'a', 'b']
+    assert [row[0] for row in tree.range_search('a', 'z')] == ['a', 'b']
+
+
+def test_context_manager_batches_and_restores_autosave(tmp_path):
+    path = tmp_path / 'tree.pkl'
+    tree = BPlusTree(str(path), order=4)
+    assert tree._autosave_outer is True
+
+    with tree:
+        assert tree.autosave is False
+        tree.insert(None, ['1', 'a'])
+    assert tree.autosave is True
+
+    # Sin __enter__ (p.ej. __exit__ llamado directamente) también se restaura
+    tree.__exit__(None, None, None)
+    assert tree.autosave is True
+    assert BPlusTree(str(path), order=4).search('1') == [['1', 'a']]
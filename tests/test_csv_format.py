@@ -0,0 +1,54 @@
+import pytest
+
+from engine import Engine
+
+
+def _baseline_format(record):
+    """_format_record_to_csv de la versión original (referencia del formato de salida)"""
+    if isinstance(record, dict):
+        values = [str(v) for v in record.values()]
+    elif isinstance(record, (list, tuple)):
+        values = [str(v) for v in record]
+    elif isinstance(record, str):
+        values = [v.strip() for v in record.split('|')] if '|' in record else [record]
+    else:
+        values = [str(record)]
+    cleaned_values = []
+    for v in values:
+        cleaned = str(v).strip()
+        if ',' in cleaned or '"' in cleaned or '\n' in cleaned:
+            cleaned = '"' + cleaned.replace('"', '""') + '"'
+        cleaned_values.append(cleaned)
+    return ','.join(cleaned_values)
+
+
+RECORDS = [
+    '', '   ', [''], [' '], ('',), {'a': ''}, {'a': '  '},
+    ['', ''], ['x', ''], ['', 'x'], '|', 'a|', ' | b ',
+    ['say "hi"'], ['"'], ['a,b'], ['x\ny'], 'plain', [1, 2.5, None],
+]
+
+
+@pytest.mark.parametrize('record', RECORDS, ids=repr)
+def test_single_record_matches_baseline(record):
+    engine = Engine()
+    expected = _baseline_format(record)
+
+    assert engine._format_record_to_csv(record) == expected
+    assert list(engine._iter_records_csv([record])) == [expected]
+    assert engine._format_records_to_csv([record]) == [expected]
+
+
+@pytest.mark.parametrize('records', [
+    [[''], ['a'], [''], ['say "hi"']],
+    [('',), ('b',)],
+    [{'a': ''}, {'a': 'x'}, {'a': ''}],
+    ['', 'x', '  ', 'y|'],
+    [['a', ''], ['', 'b'], ['', '']],
+], ids=repr)
+def test_record_batches_match_baseline(records):
+    engine = Engine()
+    expected = [_baseline_format(record) for record in records]
+
+    assert engine._format_records_to_csv(records) == expected
+    assert engine._write_records_csv(records) == ''.join(line + '\n' for line in expected)
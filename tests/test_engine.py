@@ -0,0 +1,118 @@
+import os
+
+import pytest
+
+from engine import Engine
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    # Los índices escriben sus archivos relativos al directorio actual
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def _write_csv(path, header, rows):
+    with open(path, 'w', encoding='latin1') as f:
+        f.write(','.join(header) + '\n')
+        for row in rows:
+            f.write(','.join(row) + '\n')
+    return str(path)
+
+
+def test_scan_does_not_write_view_files(workdir):
+    path = _write_csv(workdir / 'people.csv', ['id', 'name'], [['1', 'ana'], ['2', 'luis']])
+    engine = Engine()
+    engine.load_csv('people', path, 'sequential', 0)
+    before = set(os.listdir(workdir))
+
+    first = engine.scan('people')
+
+    assert first == engine.scan('people')
+    assert set(os.listdir(workdir)) == before
+
+
+def test_scan_view_is_released_on_change_and_close(workdir):
+    path = _write_csv(workdir / 'people.csv', ['id', 'name'], [['1', 'ana']])
+    engine = Engine()
+    engine.load_csv('people', path, 'sequential', 0)
+    engine.scan('people')
+    view_file, _ = engine.table_views['people']
+
+    engine.insert('people', ['2', 'luis'])
+
+    assert view_file.closed and 'people' not in engine.table_views
+    assert '2,luis' in engine.scan('people').split('\n')
+    engine.close()
+    assert not engine.table_views
+
+
+def test_engines_sharing_cwd_keep_their_own_scan(workdir):
+    a = Engine()
+    a.load_csv('t', _write_csv(workdir / 'a.csv', ['id'], [['1']]), 'bplustree', 0)
+    first = a.scan('t')
+    b = Engine()
+    b.load_csv('u', _write_csv(workdir / 'b.csv', ['id'], [['2']]), 'bplustree', 0)
+    b.scan('u')
+
+    assert a.scan('t') == first == '1'
+
+
+def test_text_search_with_header_only_csv_uses_placeholders(workdir):
+    from indices.spimi import SPIMIIndexBuilder
+    docs = _write_csv(workdir / 'docs.csv', ['title', 'lyrics'],
+                      [['a', 'amor noche'], ['b', 'fuego cielo'], ['c', 'amor fuego']])
+    empty = _write_csv(workdir / 'empty.csv', ['title', 'lyrics'], [])
+    builder = SPIMIIndexBuilder(output_dir=str(workdir / 'idx'), text_fields=['lyrics'], language='spanish')
+    index_path = builder.load_csv(docs, ['lyrics'])
+    engine = Engine()
+    engine.register_text_table('songs', index_path, ['lyrics'], empty)
+
+    results = engine.textual_search('songs', 'amor', 5)
+
+    assert sorted(doc['doc_id'] for doc, _ in results) == [0, 2]
+    assert all(doc['content'] == f"Documento {doc['doc_id']}" for doc, _ in results)
+
+
+@pytest.mark.parametrize('tipo', ['sequential', 'bplustree', 'isam'])
+def test_search_and_scan_are_fresh_after_insert_and_remove(workdir, tipo):
+    path = _write_csv(workdir / 'pets.csv', ['id', 'kind'],
+                      [['1', 'cat'], ['2', 'dog'], ['3', 'cat'], ['4', 'fish']])
+    engine = Engine()
+    engine.load_csv('pets', path, tipo, 0)
+
+    def kinds(key):
+        return sorted(line.split(',')[0] for line in engine.search('pets', key, 1))
+
+    # Varias búsquedas por la columna no indexada: la segunda ya usa el hash secundario
+    assert kinds('cat') == kinds('cat') == ['1', '3']
+    scan = engine.scan('pets')
+    assert engine.scan('pets') == scan
+
+    engine.insert('pets', ['5', 'cat'])
+    assert kinds('cat') == ['1', '3', '5']
+    assert '5,cat' in engine.scan('pets').split('\n')
+
+    if tipo != 'isam':  # ISAM no implementa remove
+        engine.remove('pets', '1')
+        assert kinds('cat') == ['3', '5']
+        assert '1,cat' not in engine.scan('pets').split('\n')
+
+
+def test_invalidation_drops_every_cache_of_the_table(workdir):
+    engine = Engine()
+    engine.load_csv('a', _write_csv(workdir / 'a.csv', ['id', 'v'], [['1', 'x']]), 'bplustree', 0)
+    engine.load_csv('b', _write_csv(workdir / 'b.csv', ['id', 'v'], [['1', 'x']]), 'bplustree', 0)
+    for table in ('a', 'b'):
+        engine.search(table, 'x', 1)
+        engine.search(table, 'x', 1)
+        engine.scan(table)
+
+    engine.insert('a', ['2', 'y'])
+
+    for cache in engine._table_caches:
+        assert 'a' not in cache
+    for cache in engine._column_caches:
+        assert not [key for key in cache if key[0] == 'a']
+    assert 'a' not in engine.table_views
+    assert 'b' in engine.table_views and ('b', 1) in engine.secondary_hash
@@ -0,0 +1,13 @@
+from engine import Engine
+
+
+def test_key_search_ignores_surrounding_whitespace(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    path = tmp_path / 'items.csv'
+    path.write_text('id,name\n' + ''.join(f'{i},item{i}\n' for i in range(1, 30)), encoding='latin1')
+    engine = Engine()
+    engine.load_csv('items', str(path), 'isam', 0)
+    engine.insert('items', ['31', 'extra'])
+
+    assert engine.search('items', ' 7 ', 0) == engine.search('items', '7', 0) == ['7,item7']
+    assert engine.search('items', '31 ', 0) == ['31,extra']
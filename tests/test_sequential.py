@@ -0,0 +1,112 @@
+import pytest
+
+from engine import Engine
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    path = tmp_path / 'cities.csv'
+    # SequentialFile guarda también la cabecera como registro: en mayúsculas queda fuera de los rangos
+    path.write_text('ID,CITY,POPULATION\n'
+                    '1,lima,900\n'
+                    '2,cusco,45\n'
+                    '3,arequipa,1000\n'
+                    '4,puno,120\n', encoding='latin1')
+    engine = Engine()
+    engine.load_csv('cities', str(path), 'sequential', 0)
+    return engine
+
+
+def _ids(lines):
+    return [line.split(',')[0] for line in lines]
+
+
+def test_range_on_non_indexed_column(engine):
+    assert _ids(engine.range_search('cities', 'a', 'm', column=1)) == ['1', '2', '3']
+
+
+def test_range_on_indexed_column(engine):
+    assert _ids(engine.range_search('cities', '2', '3')) == ['2', '3']
+    assert _ids(engine.range_search('cities', '2', '3', column=0)) == ['2', '3']
+
+
+def test_range_on_column_sees_inserts_and_removes(engine):
+    assert _ids(engine.range_search('cities', 'a', 'm', column=1)) == ['1', '2', '3']
+    engine.insert('cities', ['5', 'ica', '300'])
+    engine.remove('cities', '2')
+
+    assert _ids(engine.range_search('cities', 'a', 'm', column=1)) == ['1', '3', '5']
+
+
+def test_range_on_column_of_other_index_is_rejected(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    path = tmp_path / 't.csv'
+    path.write_text('id,name\n1,a\n', encoding='latin1')
+    engine = Engine()
+    engine.load_csv('t', str(path), 'bplustree', 0)
+
+    assert _ids(engine.range_search('t', '1', '1', column=0)) == ['1']
+    with pytest.raises(ValueError):
+        engine.range_search('t', 'a', 'z', column=1)
+
+
+@pytest.fixture
+def seq(tmp_path):
+    from indices.sequential import SequentialFile
+    path = tmp_path / 'rows.csv'
+    path.write_text('1,lima,900\n'
+                    '2,cusco,45\n'
+                    '3,arequipa,1000\n'
+                    '4,puno,120\n', encoding='latin1')
+    seq = SequentialFile(str(tmp_path / 'data.bin'), str(tmp_path / 'aux.bin'))
+    seq.load_csv(str(path))
+    return seq
+
+
+def _seq_ids(rows):
+    return [row.split('|')[0].strip() for row in rows]
+
+
+def test_numeric_column_range_compares_as_numbers(seq):
+    # Como texto '900' > '1000'; como números entra en el rango
+    assert _seq_ids(seq.range_search('100', '1000', column=2)) == ['1', '3', '4']
+    assert _seq_ids(seq.range_search('45', '45', column=2)) == ['2']
+
+
+def test_column_stops_being_numeric_after_insert(seq):
+    assert _seq_ids(seq.range_search('100', '1000', column=2)) == ['1', '3', '4']
+    seq.insert(None, ['5', 'ica', 'n/a'])
+
+    # Con un valor no numérico la columna vuelve a compararse como texto
+    assert _seq_ids(seq.range_search('100', '1000', column=2)) == ['3']
+
+
+def test_sorted_column_cache_is_reused_and_rebuilt_on_remove(seq):
+    assert _seq_ids(seq.range_search('c', 'p', column=1)) == ['1', '2']
+    cached = dict(seq._sorted_columns)
+    assert _seq_ids(seq.range_search('a', 'l', column=1)) == ['2', '3']
+    assert all(seq._sorted_columns[key] is value for key, value in cached.items())
+
+    seq.remove('2')
+
+    assert _seq_ids(seq.range_search('c', 'p', column=1)) == ['1']
+
+
+@pytest.mark.parametrize('begin, end', [('a', 'm'), ('c', 'p'), ('lima', 'lima'), ('zz', 'zz')])
+def test_range_without_pandas_matches_pandas(seq, monkeypatch, begin, end):
+    import indices.sequential as sequential
+    expected = seq.range_search(begin, end, column=1)
+    seq._invalidate_cache()
+    monkeypatch.setattr(sequential, 'PANDAS_AVAILABLE', False)
+
+    assert seq.range_search(begin, end, column=1) == expected
+
+
+def test_range_without_pandas_compares_as_text(seq, monkeypatch):
+    import indices.sequential as sequential
+    monkeypatch.setattr(sequential, 'PANDAS_AVAILABLE', False)
+
+    assert _seq_ids(seq.range_search('100', '1000', column=2)) == ['3']
+    seq.remove('3')
+    assert _seq_ids(seq.range_search('100', '1000', column=2)) == []
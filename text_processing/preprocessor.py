@@ -1,5 +1,6 @@
 import re
 import string
+from functools import lru_cache
 from typing import List, Set
 import nltk
 from nltk.corpus import stopwords
@@ -7,6 +8,16 @@ from nltk.stem import SnowballStemmer
 from nltk.tokenize import word_tokenize
 import unicodedata
 
+# Patrones compilados una sola vez: se aplican a cada documento y a cada consulta
+URL_PATTERN = re.compile(r'http\S+|www\S+|https\S+', re.MULTILINE)
+EMAIL_PATTERN = re.compile(r'\S+@\S+')
+NUMBER_PATTERN = re.compile(r'\b\d+\b')
+PUNCTUATION_PATTERN = re.compile(r'[^\w\s]')
+SPACES_PATTERN = re.compile(r'\s+')
+
+# Palabras distintas cuyo stem se recuerda (el vocabulario se repite mucho entre textos)
+STEM_CACHE_SIZE = 100_000
+
 class TextPreprocessor:
     """
     Clase para preprocesamiento de texto según los requerimientos del proyecto:
@@ -46,6 +57,7 @@ class TextPreprocessor:
             self.stemmer = SnowballStemmer('spanish')
         else:
             self.stemmer = SnowballStemmer('english')
+        self._stem = lru_cache(maxsize=STEM_CACHE_SIZE)(self.stemmer.stem)
         
         # Stopwords
         try:
@@ -93,19 +105,19 @@ class TextPreprocessor:
             Texto limpio
         """
         # Eliminar URLs
-        text = re.sub(r'http\S+|www\S+|https\S+', '', text, flags=re.MULTILINE)
+        text = URL_PATTERN.sub('', text)
         
         # Eliminar emails
-        text = re.sub(r'\S+@\S+', '', text)
+        text = EMAIL_PATTERN.sub('', text)
         
         # Eliminar números solos (pero mantener palabras con números)
-        text = re.sub(r'\b\d+\b', '', text)
+        text = NUMBER_PATTERN.sub('', text)
         
         # Eliminar puntuación pero mantener espacios
-        text = re.sub(r'[^\w\s]', ' ', text)
+        text = PUNCTUATION_PATTERN.sub(' ', text)
         
         # Eliminar espacios múltiples
-        text = re.sub(r'\s+', ' ', text)
+        text = SPACES_PATTERN.sub(' ', text)
         
         return text.strip()
     
@@ -152,7 +164,7 @@ class TextPreprocessor:
         Returns:
             Lista de tokens con stemming aplicado
         """
-        return [self.stemmer.stem(token) for token in tokens]
+        return [self._stem(token) for token in tokens]
     
     def preprocess(self, text: str) -> List[str]:
         """